@@ -6,21 +6,160 @@ Lightweight ML models for token launch scoring and price prediction
 import asyncio
 import logging
 import numpy as np
+import mmap
 import pickle
 import json
-from typing import Dict, List, Optional, Tuple, Any
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Any
 from dataclasses import dataclass
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from pathlib import Path
 
 # ML imports
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
+from numba import njit, prange
+
+# Optional compiled predictor backend
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    convert_sklearn = None
 
 logger = logging.getLogger(__name__)
 
+# Shared features_used tuples for non-model predictions
+_FN_PRICE_HISTORY = ("price_history",)
+_FN_TREND = ("price_trend", "volatility")
+_FN_NO_DATA = ("no_data",)
+_FN_ERROR = ("error",)
+_FN_PUMP = ("volume", "buy_pressure", "price_change")
+
+# Packed 16-byte forest node with an int16 threshold rank
+_NODE_DTYPE = np.dtype([
+    ('feat', np.uint8),
+    ('pad', np.uint8),
+    ('thr', np.int16),
+    ('lc', np.int32),
+    ('rc', np.int32),
+    ('val', np.float32)
+])
+_QUANT_MAX = 32767
+
+# Heuristic tier tables: searchsorted(thresholds, x) counts thresholds
+# strictly below x, so each delta matches the `x > threshold` tiers.
+# Strict `x < t` tiers use the next float below t as their boundary.
+# Thresholds are float32 so they compare exactly against float32 features.
+_F32_NEG_INF = np.float32(-np.inf)
+_LIQ_THR = np.array([np.nextafter(np.float32(0.1), _F32_NEG_INF), 1.0, 10.0], dtype=np.float32)
+_LIQ_DELTA = np.array([-20.0, 0.0, 10.0, 20.0])
+_HOLDER_THR = np.array([np.nextafter(np.float32(10.0), _F32_NEG_INF), 50.0, 100.0], dtype=np.float32)
+_HOLDER_DELTA = np.array([-10.0, 0.0, 10.0, 15.0])
+_TX_THR = np.array([100.0, 1000.0], dtype=np.float32)
+_TX_DELTA = np.array([0.0, 5.0, 15.0])
+_BUY_SELL_THR = np.array([np.nextafter(np.float32(0.5), _F32_NEG_INF), 1.5], dtype=np.float32)
+_BUY_SELL_DELTA = np.array([-15.0, 0.0, 10.0])
+_HONEYPOT_THR = np.array([0.3, 0.7], dtype=np.float32)
+_HONEYPOT_DELTA = np.array([0.0, -10.0, -30.0])
+_SOCIAL_THR = np.array([50.0, 100.0], dtype=np.float32)
+_SOCIAL_DELTA = np.array([0.0, 5.0, 10.0])
+
+def _floor_f32(values: np.ndarray) -> np.ndarray:
+    """Largest float32 values not greater than the given float64 values"""
+    rounded = values.astype(np.float32)
+    return np.where(rounded > values, np.nextafter(rounded, _F32_NEG_INF), rounded)
+
+@njit(cache=True, fastmath=True)
+def _forest_proba(nodes, roots, edges, edge_ptr, bias, logistic, x):
+    """Class-1 probability of a single sample across all trees"""
+    # Rank the sample among each feature's sorted split thresholds, so
+    # x <= threshold[k] becomes the exact integer test rank <= k
+    n_features = x.shape[0]
+    xq = np.empty(n_features, dtype=np.int32)
+    for j in range(n_features):
+        xq[j] = np.searchsorted(edges[edge_ptr[j]:edge_ptr[j + 1]], x[j])
+    
+    n_trees = roots.shape[0]
+    total = 0.0
+    for t in range(n_trees):
+        node = roots[t]
+        # Leaves are marked with a negative left child
+        while nodes[node].lc >= 0:
+            current = nodes[node]
+            if xq[current.feat] <= current.thr:
+                node = current.lc
+            else:
+                node = current.rc
+        total += nodes[node].val
+    
+    # Boosted trees sum raw scores through a sigmoid, forests average votes
+    if logistic:
+        return 1.0 / (1.0 + np.exp(-(bias + total)))
+    return total / n_trees
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _forest_proba_batch(nodes, roots, edges, edge_ptr, bias, logistic, X):
+    """Class-1 probability for every row of X"""
+    # Parallelize over samples, not trees: each thread walks the whole
+    # forest for its rows, keeping the per-sample reduction thread-local
+    n_samples = X.shape[0]
+    out = np.empty(n_samples)
+    for i in prange(n_samples):
+        out[i] = _forest_proba(nodes, roots, edges, edge_ptr, bias, logistic, X[i])
+    return out
+
+@njit(cache=True)
+def _trend_kernel(prices):
+    """Trend direction and return volatility of a short price window"""
+    n = prices.shape[0]
+    
+    # Moving averages over the last 5 and 10 prices
+    short_sum = 0.0
+    for i in range(n - 5, n):
+        short_sum += prices[i]
+    long_sum = short_sum
+    for i in range(n - 10, n - 5):
+        long_sum += prices[i]
+    short_ma = short_sum / 5
+    long_ma = long_sum / 10
+    
+    if short_ma > long_ma:
+        trend = 1  # Upward
+    elif short_ma < long_ma:
+        trend = -1  # Downward
+    else:
+        trend = 0  # Neutral
+    
+    # Population std of simple returns, two passes so the variance can't
+    # cancel catastrophically; returns from non-positive prices are skipped
+    total = 0.0
+    m = 0
+    for i in range(n - 1):
+        if prices[i] > 0:
+            total += (prices[i + 1] - prices[i]) / prices[i]
+            m += 1
+    if m == 0:
+        return trend, 0.0
+    mean = total / m
+    
+    variance = 0.0
+    for i in range(n - 1):
+        if prices[i] > 0:
+            d = (prices[i + 1] - prices[i]) / prices[i] - mean
+            variance += d * d
+    return trend, np.sqrt(variance / m)
+
+# Compile the trend kernel up front so the first prediction isn't penalized
+_trend_kernel(np.ones(10))
+
 @dataclass
 class TokenFeatures:
     """Features for token analysis"""
@@ -37,7 +176,13 @@ class TokenFeatures:
     
     def to_array(self) -> np.ndarray:
         """Convert to numpy array for ML"""
-        return np.array([
+        out = np.empty(9, dtype=np.float32)
+        self.fill(out)
+        return out
+    
+    def fill(self, out: np.ndarray) -> None:
+        """Write the features in place into a preallocated 9-element row"""
+        out[:] = (
             self.liquidity_eth,
             self.holder_count,
             self.transaction_count_24h,
@@ -47,7 +192,7 @@ class TokenFeatures:
             self.contract_age_hours,
             self.honeypot_score,
             self.social_mentions
-        ])
+        )
 
 @dataclass
 class PredictionResult:
@@ -56,9 +201,9 @@ class PredictionResult:
     prediction_type: str
     confidence: float
     prediction_value: float
-    features_used: List[str]
+    features_used: Sequence[str]
     model_version: str
-    created_at: datetime
+    created_at_ns: int  # Nanoseconds since the epoch
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -67,9 +212,9 @@ class PredictionResult:
             'prediction_type': self.prediction_type,
             'confidence': self.confidence,
             'prediction_value': self.prediction_value,
-            'features_used': self.features_used,
+            'features_used': list(self.features_used),
             'model_version': self.model_version,
-            'created_at': self.created_at.isoformat()
+            'created_at': datetime.fromtimestamp(self.created_at_ns / 1e9, tz=timezone.utc).isoformat()
         }
 
 class AIPredictor:
@@ -80,8 +225,18 @@ class AIPredictor:
         self.model_path.mkdir(exist_ok=True)
         
         # Models
-        self.launch_classifier: Optional[RandomForestClassifier] = None
-        self.price_scaler: Optional[StandardScaler] = None
+        self.launch_classifier: Optional[HistGradientBoostingClassifier] = None
+        
+        # Packed quantized trees for the JIT predictor
+        self._tree_nodes: Optional[np.ndarray] = None
+        self._tree_roots: Optional[np.ndarray] = None
+        self._quant_edges: Optional[np.ndarray] = None
+        self._quant_ptr: Optional[np.ndarray] = None
+        self._tree_bias = 0.0
+        self._tree_logistic = False
+        
+        # Compiled ONNX Runtime session (preferred when available)
+        self._ort_session = None
         
         # Feature names
         self.feature_names = [
@@ -97,72 +252,205 @@ class AIPredictor:
         ]
         
         # Model metadata
-        self.model_version = "1.0.0"
+        self.model_version = "2.0.0"
         self.last_training_date: Optional[datetime] = None
         
         # Prediction cache
-        self.prediction_cache: Dict[str, PredictionResult] = {}
-        self.cache_ttl = timedelta(minutes=30)
+        # Bounded LRU; entries expire by their created_at_ns
+        self.prediction_cache: OrderedDict[Tuple[str, str], PredictionResult] = OrderedDict()
+        self._cache_ttl_ns = 1800 * 1_000_000_000  # 30 minutes
+        self.max_cache_size = 10000
         
-        # Initialize or load models
-        self._initialize_models()
+    async def initialize(self) -> None:
+        """Initialize or load ML models without blocking the event loop"""
+        await self._initialize_models()
     
-    def _initialize_models(self) -> None:
+    async def _initialize_models(self) -> None:
         """Initialize or load ML models"""
         try:
             # Try to load existing models
             classifier_path = self.model_path / "launch_classifier.pkl"
-            scaler_path = self.model_path / "price_scaler.pkl"
             
-            if classifier_path.exists() and scaler_path.exists():
-                with open(classifier_path, 'rb') as f:
-                    self.launch_classifier = pickle.load(f)
-                
-                with open(scaler_path, 'rb') as f:
-                    self.price_scaler = pickle.load(f)
-                
+            classifier = None
+            if classifier_path.exists():
+                classifier = await asyncio.to_thread(self._load_pickle, classifier_path)
+                # Pre-2.0.0 forests were trained on scaled features
+                if not isinstance(classifier, HistGradientBoostingClassifier):
+                    logger.warning("Discarding pre-2.0.0 launch classifier, retraining required")
+                    classifier = None
+                elif not hasattr(classifier, 'classes_'):
+                    logger.warning("Discarding unfitted launch classifier")
+                    classifier = None
+            
+            if classifier is not None:
+                self.launch_classifier = classifier
+                await asyncio.to_thread(self._compile_forest)
+                await asyncio.to_thread(self._load_onnx_session)
                 logger.info("Loaded existing ML models")
             else:
-                # Create new models
-                self.launch_classifier = RandomForestClassifier(
-                    n_estimators=100,
-                    max_depth=10,
-                    random_state=42
-                )
-                self.price_scaler = StandardScaler()
-                
-                logger.info("Created new ML models")
+                # Score with the heuristic until train_models fits a classifier
+                logger.info("No trained launch classifier, using heuristic scoring")
                 
         except Exception as e:
             logger.error(f"Error initializing models: {e}")
-            # Create fallback models
-            self.launch_classifier = RandomForestClassifier(
-                n_estimators=50, max_depth=5, random_state=42
+            self.launch_classifier = None
+    
+    @staticmethod
+    def _new_launch_classifier() -> HistGradientBoostingClassifier:
+        """Unfitted launch classifier with the default hyperparameters"""
+        return HistGradientBoostingClassifier(
+            max_iter=100,
+            max_depth=6,
+            learning_rate=0.1,
+            random_state=42
+        )
+    
+    @staticmethod
+    def _load_pickle(path: Path) -> Any:
+        """Unpickle straight from a read-only memory map of the file"""
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return pickle.loads(mapped)
+    
+    def _load_onnx_session(self) -> None:
+        """Load the compiled ONNX classifier if present and supported"""
+        self._ort_session = None
+        onnx_path = self.model_path / "launch_classifier.onnx"
+        
+        if ort is None or not onnx_path.exists():
+            return
+        
+        try:
+            self._ort_session = ort.InferenceSession(
+                str(onnx_path), providers=['CPUExecutionProvider']
             )
-            self.price_scaler = StandardScaler()
+            logger.info("Loaded ONNX launch classifier")
+        except Exception as e:
+            logger.error(f"Error loading ONNX model: {e}")
+    
+    def _compile_forest(self) -> None:
+        """Pack fitted trees into quantized nodes for the JIT traversal kernel"""
+        self._tree_nodes = None
+        self._tree_roots = None
+        self._quant_edges = None
+        self._quant_ptr = None
+        self._tree_bias = 0.0
+        self._tree_logistic = False
+        
+        classifier = self.launch_classifier
+        if classifier is None or not hasattr(classifier, 'classes_'):
+            return
+        
+        # Keep sklearn's fallback behaviour for single-class models
+        if len(classifier.classes_) != 2:
+            return
+        
+        if not hasattr(classifier, '_predictors'):
+            return
+        
+        # Each tree as (feature, threshold, left, right, value), leaves with left < 0;
+        # gradient boosting leaf values are summed into a logit
+        trees = []
+        for predictors in classifier._predictors:
+            tree_nodes = predictors[0].nodes
+            if tree_nodes['is_categorical'].any():
+                return
+            is_leaf = tree_nodes['is_leaf'].astype(bool)
+            trees.append((
+                tree_nodes['feature_idx'].astype(np.intp),
+                tree_nodes['num_threshold'],
+                np.where(is_leaf, -1, tree_nodes['left'].astype(np.intp)),
+                np.where(is_leaf, -1, tree_nodes['right'].astype(np.intp)),
+                tree_nodes['value']
+            ))
+        bias = float(np.ravel(classifier._baseline_prediction)[0])
+        logistic = True
+        
+        if not trees:
+            return
+        
+        n_features = classifier.n_features_in_
+        
+        # Round thresholds down to float32 so x <= t is unchanged for float32 x
+        trees = [
+            (feature, _floor_f32(threshold), left, right, value)
+            for feature, threshold, left, right, value in trees
+        ]
+        
+        # Sorted unique thresholds per feature, concatenated CSR-style
+        split_features = np.concatenate([tree[0][tree[2] >= 0] for tree in trees])
+        split_thresholds = np.concatenate([tree[1][tree[2] >= 0] for tree in trees])
+        tables = [np.unique(split_thresholds[split_features == j]) for j in range(n_features)]
+        if max(len(table) for table in tables) > _QUANT_MAX:
+            return
+        edges = np.concatenate(tables)
+        edge_ptr = np.zeros(n_features + 1, dtype=np.int64)
+        edge_ptr[1:] = np.cumsum([len(table) for table in tables])
+        
+        nodes = np.zeros(sum(len(tree[0]) for tree in trees), dtype=_NODE_DTYPE)
+        roots = np.empty(len(trees), dtype=np.int32)
+        
+        base = 0
+        for t, (feature, threshold, left, right, value) in enumerate(trees):
+            n = len(feature)
+            is_split = left >= 0
+            feature = np.where(is_split, feature, 0)
+            block = nodes[base:base + n]
+            
+            # Store each threshold as its rank in the feature's table
+            rank = np.zeros(n, dtype=np.int64)
+            for j in np.unique(feature[is_split]):
+                at = is_split & (feature == j)
+                rank[at] = np.searchsorted(tables[j], threshold[at])
+            
+            block['feat'] = feature
+            block['thr'] = rank
+            block['lc'] = np.where(is_split, left + base, -1)
+            block['rc'] = np.where(is_split, right + base, -1)
+            block['val'] = value
+            
+            roots[t] = base
+            base += n
+        
+        self._tree_nodes = nodes
+        self._tree_roots = roots
+        self._quant_edges = edges
+        self._quant_ptr = edge_ptr
+        self._tree_bias = bias
+        self._tree_logistic = logistic
     
-    async def score_token_launch(self, features: TokenFeatures) -> PredictionResult:
+    async def score_token_launch(self, features: TokenFeatures,
+                                 now_ns: Optional[int] = None) -> PredictionResult:
         """Score a token launch (0-100, higher is better)"""
+        # Callers scoring many tokens can read the clock once and pass it in
+        if now_ns is None:
+            now_ns = time.time_ns()
+        
         try:
             # Check cache first
-            cache_key = f"launch_{features.token_address}"
-            if cache_key in self.prediction_cache:
-                cached_result = self.prediction_cache[cache_key]
-                if datetime.now(timezone.utc) - cached_result.created_at < self.cache_ttl:
-                    return cached_result
+            cache_key = ("launch", features.token_address)
+            cached_result = self._get_cached(cache_key, now_ns)
+            if cached_result is not None:
+                return cached_result
             
             # Prepare features
             feature_array = features.to_array().reshape(1, -1)
             
-            # Scale features
-            if self.price_scaler:
-                scaled_features = self.price_scaler.transform(feature_array)
-            else:
-                scaled_features = feature_array
-            
             # Make prediction
-            if self.launch_classifier:
-                prediction_proba = self.launch_classifier.predict_proba(scaled_features)[0]
+            if self._ort_session is not None:
+                prediction_proba = self._ort_session.run(
+                    None, {'X': feature_array.astype(np.float32)}
+                )[1][0]
+                confidence = float(prediction_proba[1]) if len(prediction_proba) > 1 else 0.5
+                prediction_value = confidence * 100  # Convert to 0-100 scale
+            elif self._tree_nodes is not None:
+                confidence = float(_forest_proba(
+                    self._tree_nodes, self._tree_roots, self._quant_edges,
+                    self._quant_ptr, self._tree_bias, self._tree_logistic,
+                    feature_array[0]
+                ))
+                prediction_value = confidence * 100  # Convert to 0-100 scale
+            elif self.launch_classifier is not None:
+                prediction_proba = self.launch_classifier.predict_proba(feature_array)[0]
                 # Assuming binary classification: 0 = bad, 1 = good
                 confidence = prediction_proba[1] if len(prediction_proba) > 1 else 0.5
                 prediction_value = confidence * 100  # Convert to 0-100 scale
@@ -178,11 +466,11 @@ class AIPredictor:
                 prediction_value=prediction_value,
                 features_used=self.feature_names,
                 model_version=self.model_version,
-                created_at=datetime.now(timezone.utc)
+                created_at_ns=now_ns
             )
             
             # Cache result
-            self.prediction_cache[cache_key] = result
+            self._cache_result(cache_key, result)
             
             return result
             
@@ -196,54 +484,58 @@ class AIPredictor:
                 prediction_value=50.0,
                 features_used=self.feature_names,
                 model_version="fallback",
-                created_at=datetime.now(timezone.utc)
+                created_at_ns=now_ns
             )
     
+    def _get_cached(self, cache_key: Tuple[str, str], now_ns: int) -> Optional[PredictionResult]:
+        """Return a fresh cached prediction and mark it recently used"""
+        result = self.prediction_cache.get(cache_key)
+        if result is None:
+            return None
+        
+        if now_ns - result.created_at_ns >= self._cache_ttl_ns:
+            del self.prediction_cache[cache_key]
+            return None
+        
+        self.prediction_cache.move_to_end(cache_key)
+        return result
+    
+    def _cache_result(self, cache_key: Tuple[str, str], result: PredictionResult) -> None:
+        """Cache a prediction, evicting the least recently used entry when full"""
+        self.prediction_cache[cache_key] = result
+        self.prediction_cache.move_to_end(cache_key)
+        if len(self.prediction_cache) > self.max_cache_size:
+            self.prediction_cache.popitem(last=False)
+    
     def _heuristic_score(self, features: TokenFeatures) -> float:
         """Fallback heuristic scoring"""
-        score = 50.0  # Base score
+        return float(self._heuristic_score_batch(features.to_array().reshape(1, -1))[0])
+    
+    @staticmethod
+    def _heuristic_score_batch(X: np.ndarray) -> np.ndarray:
+        """Vectorized fallback heuristic scoring over an (N, 9) feature matrix"""
+        score = np.full(X.shape[0], 50.0)  # Base score
         
         # Liquidity scoring
-        if features.liquidity_eth > 10:
-            score += 20
-        elif features.liquidity_eth > 1:
-            score += 10
-        elif features.liquidity_eth < 0.1:
-            score -= 20
+        score += _LIQ_DELTA[np.searchsorted(_LIQ_THR, X[:, 0])]
         
         # Holder count scoring
-        if features.holder_count > 100:
-            score += 15
-        elif features.holder_count > 50:
-            score += 10
-        elif features.holder_count < 10:
-            score -= 10
+        score += _HOLDER_DELTA[np.searchsorted(_HOLDER_THR, X[:, 1])]
         
         # Transaction activity
-        if features.transaction_count_24h > 1000:
-            score += 15
-        elif features.transaction_count_24h > 100:
-            score += 5
+        score += _TX_DELTA[np.searchsorted(_TX_THR, X[:, 2])]
         
         # Buy/sell ratio (more buys is good)
-        if features.buy_sell_ratio > 1.5:
-            score += 10
-        elif features.buy_sell_ratio < 0.5:
-            score -= 15
+        score += _BUY_SELL_DELTA[np.searchsorted(_BUY_SELL_THR, X[:, 3])]
         
         # Honeypot penalty
-        if features.honeypot_score > 0.7:
-            score -= 30
-        elif features.honeypot_score > 0.3:
-            score -= 10
+        score += _HONEYPOT_DELTA[np.searchsorted(_HONEYPOT_THR, X[:, 7])]
         
         # Social mentions
-        if features.social_mentions > 100:
-            score += 10
-        elif features.social_mentions > 50:
-            score += 5
+        score += _SOCIAL_DELTA[np.searchsorted(_SOCIAL_THR, X[:, 8])]
         
-        return max(0, min(100, score))
+        np.clip(score, 0, 100, out=score)
+        return score
     
     async def predict_price_movement(self, token_address: str, 
                                    historical_prices: List[float],
@@ -257,29 +549,15 @@ class AIPredictor:
                     prediction_type="price_movement",
                     confidence=0.2,
                     prediction_value=0.0,
-                    features_used=["price_history"],
+                    features_used=_FN_PRICE_HISTORY,
                     model_version="insufficient_data",
-                    created_at=datetime.now(timezone.utc)
+                    created_at_ns=time.time_ns()
                 )
             
-            # Simple moving average and trend analysis
-            prices = np.array(historical_prices[-20:])  # Last 20 prices
-            
-            # Calculate moving averages
-            short_ma = np.mean(prices[-5:])
-            long_ma = np.mean(prices[-10:])
-            
-            # Calculate trend
-            if short_ma > long_ma:
-                trend = 1  # Upward
-            elif short_ma < long_ma:
-                trend = -1  # Downward
-            else:
-                trend = 0  # Neutral
-            
-            # Calculate volatility
-            returns = np.diff(prices) / prices[:-1]
-            volatility = np.std(returns) if len(returns) > 0 else 0
+            # Trend and volatility over the last 20 prices
+            trend, volatility = _trend_kernel(
+                np.asarray(historical_prices[-20:], dtype=np.float64)
+            )
             
             # Simple prediction based on trend and volatility
             predicted_change = trend * volatility * 2  # Simple scaling
@@ -290,9 +568,9 @@ class AIPredictor:
                 prediction_type="price_movement",
                 confidence=confidence,
                 prediction_value=predicted_change * 100,  # Percentage change
-                features_used=["price_trend", "volatility"],
+                features_used=_FN_TREND,
                 model_version="simple_trend",
-                created_at=datetime.now(timezone.utc)
+                created_at_ns=time.time_ns()
             )
             
             return result
@@ -304,9 +582,9 @@ class AIPredictor:
                 prediction_type="price_movement",
                 confidence=0.1,
                 prediction_value=0.0,
-                features_used=["error"],
+                features_used=_FN_ERROR,
                 model_version="error",
-                created_at=datetime.now(timezone.utc)
+                created_at_ns=time.time_ns()
             )
     
     async def detect_pump_signals(self, token_address: str,
@@ -319,15 +597,29 @@ class AIPredictor:
                     prediction_type="pump_signal",
                     confidence=0.1,
                     prediction_value=0.0,
-                    features_used=["no_data"],
+                    features_used=_FN_NO_DATA,
                     model_version="no_data",
-                    created_at=datetime.now(timezone.utc)
+                    created_at_ns=time.time_ns()
                 )
             
-            # Analyze recent trades for pump patterns
-            total_volume = sum(trade.get('amount', 0) for trade in recent_trades)
-            buy_count = sum(1 for trade in recent_trades if trade.get('type') == 'buy')
-            sell_count = sum(1 for trade in recent_trades if trade.get('type') == 'sell')
+            # Analyze recent trades for pump patterns in a single pass
+            get = dict.get
+            total_volume = 0.0
+            buy_count = 0
+            sell_count = 0
+            price_count = 0
+            first_price = last_price = 0
+            for trade in recent_trades:
+                total_volume += get(trade, 'amount', 0)
+                side = get(trade, 'type')
+                buy_count += side == 'buy'
+                sell_count += side == 'sell'
+                price = get(trade, 'price')
+                if price:
+                    if not price_count:
+                        first_price = price
+                    last_price = price
+                    price_count += 1
             
             # Calculate pump score
             pump_score = 0
@@ -345,9 +637,8 @@ class AIPredictor:
                 pump_score += 10
             
             # Rapid price increase (if price data available)
-            prices = [trade.get('price', 0) for trade in recent_trades if trade.get('price')]
-            if len(prices) > 5:
-                price_change = (prices[-1] - prices[0]) / prices[0] if prices[0] > 0 else 0
+            if price_count > 5:
+                price_change = (last_price - first_price) / first_price if first_price > 0 else 0
                 if price_change > 0.5:  # 50%+ increase
                     pump_score += 25
                 elif price_change > 0.2:  # 20%+ increase
@@ -361,9 +652,9 @@ class AIPredictor:
                 prediction_type="pump_signal",
                 confidence=confidence,
                 prediction_value=min(100, pump_score),
-                features_used=["volume", "buy_pressure", "price_change"],
+                features_used=_FN_PUMP,
                 model_version="pattern_analysis",
-                created_at=datetime.now(timezone.utc)
+                created_at_ns=time.time_ns()
             )
             
             return result
@@ -375,9 +666,9 @@ class AIPredictor:
                 prediction_type="pump_signal",
                 confidence=0.1,
                 prediction_value=0.0,
-                features_used=["error"],
+                features_used=_FN_ERROR,
                 model_version="error",
-                created_at=datetime.now(timezone.utc)
+                created_at_ns=time.time_ns()
             )
     
     async def train_models(self, training_data: List[Tuple[TokenFeatures, int]]) -> bool:
@@ -388,7 +679,7 @@ class AIPredictor:
                 return False
             
             # Prepare training data
-            X = np.array([features.to_array() for features, _ in training_data])
+            X = np.array([features.to_array() for features, _ in training_data], dtype=np.float32)
             y = np.array([label for _, label in training_data])
             
             # Split data
@@ -396,50 +687,68 @@ class AIPredictor:
                 X, y, test_size=0.2, random_state=42
             )
             
-            # Scale features
-            if self.price_scaler:
-                X_train_scaled = self.price_scaler.fit_transform(X_train)
-                X_test_scaled = self.price_scaler.transform(X_test)
-            else:
-                X_train_scaled = X_train
-                X_test_scaled = X_test
+            # Train classifier on raw features: tree splits are invariant to
+            # monotonic per-feature scaling, so a scaler would change nothing.
+            # Scoring only switches to the new model once it is fitted.
+            classifier = self._new_launch_classifier()
+            classifier.fit(X_train, y_train)
             
-            # Train classifier
-            if self.launch_classifier:
-                self.launch_classifier.fit(X_train_scaled, y_train)
-                
-                # Evaluate
-                y_pred = self.launch_classifier.predict(X_test_scaled)
-                accuracy = accuracy_score(y_test, y_pred)
-                
-                logger.info(f"Model training completed. Accuracy: {accuracy:.2f}")
-                
-                # Save models
-                self._save_models()
-                
-                self.last_training_date = datetime.now(timezone.utc)
-                return True
+            # Evaluate
+            y_pred = classifier.predict(X_test)
+            accuracy = accuracy_score(y_test, y_pred)
+            
+            logger.info(f"Model training completed. Accuracy: {accuracy:.2f}")
+            
+            self.launch_classifier = classifier
+            self._compile_forest()
+            self._ort_session = None
+            
+            # Save models
+            await self._save_models()
+            
+            self.last_training_date = datetime.now(timezone.utc)
+            return True
             
         except Exception as e:
             logger.error(f"Error training models: {e}")
             return False
     
-    def _save_models(self) -> None:
+    async def _save_models(self) -> None:
         """Save trained models to disk"""
         try:
-            if self.launch_classifier:
-                with open(self.model_path / "launch_classifier.pkl", 'wb') as f:
-                    pickle.dump(self.launch_classifier, f)
-            
-            if self.price_scaler:
-                with open(self.model_path / "price_scaler.pkl", 'wb') as f:
-                    pickle.dump(self.price_scaler, f)
-            
+            await asyncio.to_thread(self._write_models)
             logger.info("Models saved successfully")
             
         except Exception as e:
             logger.error(f"Error saving models: {e}")
     
+    def _write_models(self) -> None:
+        """Blocking model serialization, run in a worker thread"""
+        if self.launch_classifier is not None:
+            with open(self.model_path / "launch_classifier.pkl", 'wb') as f:
+                pickle.dump(self.launch_classifier, f)
+        
+        # Export a compiled copy of the classifier for ONNX Runtime, never
+        # leaving an export of a previous model behind if this one fails
+        onnx_path = self.model_path / "launch_classifier.onnx"
+        onnx_path.unlink(missing_ok=True)
+        if self.launch_classifier is not None and convert_sklearn is not None:
+            # The export is optional; the pickle above is already saved
+            try:
+                onnx_model = convert_sklearn(
+                    self.launch_classifier,
+                    initial_types=[('X', FloatTensorType([None, len(self.feature_names)]))],
+                    options={'zipmap': False}
+                )
+                with open(onnx_path, 'wb') as f:
+                    f.write(onnx_model.SerializeToString())
+            except Exception as e:
+                onnx_path.unlink(missing_ok=True)
+                logger.error(f"Error exporting ONNX model: {e}")
+                return
+            
+            self._load_onnx_session()
+    
     async def get_model_info(self) -> Dict[str, Any]:
         """Get model information"""
         return {
@@ -455,17 +764,89 @@ class AIPredictor:
         self.prediction_cache.clear()
         logger.info("AI prediction cache cleared")
     
+    def _predict_launch_proba(self, X: np.ndarray) -> Optional[np.ndarray]:
+        """Class-1 probability for each raw feature row, None without a model"""
+        if self._ort_session is not None:
+            proba = self._ort_session.run(None, {'X': X.astype(np.float32)})[1]
+            if proba.shape[1] > 1:
+                return proba[:, 1]
+            return np.full(len(X), 0.5)
+        
+        if self._tree_nodes is not None:
+            return _forest_proba_batch(
+                self._tree_nodes, self._tree_roots, self._quant_edges,
+                self._quant_ptr, self._tree_bias, self._tree_logistic, X
+            )
+        
+        if self.launch_classifier is not None:
+            proba = self.launch_classifier.predict_proba(X)
+            if proba.shape[1] > 1:
+                return proba[:, 1]
+            return np.full(len(X), 0.5)
+        
+        return None
+    
     async def batch_predict(self, features_list: List[TokenFeatures]) -> List[PredictionResult]:
-        """Batch prediction for multiple tokens"""
-        tasks = [self.score_token_launch(features) for features in features_list]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filter out exceptions
-        valid_results = []
-        for result in results:
-            if isinstance(result, PredictionResult):
-                valid_results.append(result)
+        """Batch prediction for multiple tokens using a single matrix predict"""
+        results: List[Optional[PredictionResult]] = [None] * len(features_list)
+        now_ns = time.time_ns()
+        
+        # Serve fresh cache entries, collect the rest for one predict call
+        pending = []
+        for i, features in enumerate(features_list):
+            cached_result = self._get_cached(("launch", features.token_address), now_ns)
+            if cached_result is not None:
+                results[i] = cached_result
             else:
-                logger.error(f"Batch prediction error: {result}")
+                pending.append(i)
+        
+        if not pending:
+            return results
+        
+        try:
+            # Fill one matrix per call; rows only live as long as the prediction
+            X = np.empty((len(pending), len(self.feature_names)), dtype=np.float32)
+            for row, i in enumerate(pending):
+                features_list[i].fill(X[row])
+            
+            proba = self._predict_launch_proba(X)
+            if proba is None:
+                # Fallback: simple heuristic scoring
+                heuristic = self._heuristic_score_batch(X)
+            
+            for row, i in enumerate(pending):
+                features = features_list[i]
+                if proba is not None:
+                    confidence = float(proba[row])
+                    prediction_value = confidence * 100  # Convert to 0-100 scale
+                else:
+                    prediction_value = float(heuristic[row])
+                    confidence = 0.6  # Lower confidence for heuristic
+                
+                result = PredictionResult(
+                    token_address=features.token_address,
+                    prediction_type="launch_score",
+                    confidence=confidence,
+                    prediction_value=prediction_value,
+                    features_used=self.feature_names,
+                    model_version=self.model_version,
+                    created_at_ns=now_ns
+                )
+                
+                self._cache_result(("launch", features.token_address), result)
+                results[i] = result
+                
+        except Exception as e:
+            logger.error(f"Batch prediction error: {e}")
+            for i in pending:
+                results[i] = PredictionResult(
+                    token_address=features_list[i].token_address,
+                    prediction_type="launch_score",
+                    confidence=0.3,
+                    prediction_value=50.0,
+                    features_used=self.feature_names,
+                    model_version="fallback",
+                    created_at_ns=now_ns
+                )
         
-        return valid_results
+        return results
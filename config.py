@@ -11,9 +11,9 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Bot configuration class"""
+    """Bot configuration (immutable, instantiated once as CONFIG)"""
     
     # Telegram Configuration
     TELEGRAM_TOKEN: str = os.getenv("TELEGRAM_TOKEN", "")
@@ -24,9 +24,22 @@ class Config:
     MEGAETH_WS: str = os.getenv("MEGAETH_WS", "wss://ws.megaeth.com")
     CHAIN_ID: int = 534352  # MegaETH chain ID
     
+    # RPC HTTP connection pool (shared by every async web3 call)
+    RPC_POOL_SIZE: int = int(os.getenv("RPC_POOL_SIZE", "200"))
+    RPC_POOL_PER_HOST: int = int(os.getenv("RPC_POOL_PER_HOST", "100"))
+    RPC_TIMEOUT: int = int(os.getenv("RPC_TIMEOUT", "30"))  # seconds
+    
+    # "ws" keeps one persistent WebSocket for async RPCs (web3>=7), "http" uses the pool below
+    RPC_TRANSPORT: str = os.getenv("RPC_TRANSPORT", "http").lower()
+    
+    # Coalesce concurrent eth_calls into Multicall3/JSON-RPC batches (needs dank_mids)
+    RPC_AUTO_BATCH: bool = os.getenv("RPC_AUTO_BATCH", "false").lower() == "true"
+    
     # Contract Addresses
     KUMBADYA_FACTORY: str = "0x53447989580f541bc138d29A0FcCf72AfbBE1355"
     KUMBADYA_ROUTER: str = "0x8268DC930BA98759E916DEd4c9F367A844814023"
+    MULTICALL3: str = "0xcA11bde05977b3631167028862bE2a173976CA11"
+    WETH_ADDRESS: str = os.getenv("WETH_ADDRESS", "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE")
     
     # Additional DEX Addresses (to be updated with actual addresses)
     PRISMFI_ROUTER: str = os.getenv("PRISMFI_ROUTER", "")
@@ -78,20 +91,22 @@ class Config:
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE: str = "atalanta.log"
     
-    @classmethod
-    def validate(cls) -> None:
+    def validate(self) -> None:
         """Validate critical configuration"""
-        if not cls.TELEGRAM_TOKEN:
+        if not self.TELEGRAM_TOKEN:
             raise ValueError("TELEGRAM_TOKEN is required")
         
-        if not cls.MEGAETH_RPC:
+        if not self.MEGAETH_RPC:
             raise ValueError("MEGAETH_RPC is required")
         
         # WalletConnect is optional for now
-        if not cls.WALLETCONNECT_PROJECT_ID:
+        if not self.WALLETCONNECT_PROJECT_ID:
             import logging
             logging.warning("WALLETCONNECT_PROJECT_ID not set - wallet features will be limited")
 
+# Configuration loaded once at startup; import this instead of the class
+CONFIG = Config()
+
 # ERC-20 ABI (minimal)
 ERC20_ABI = [
     {
@@ -212,6 +227,36 @@ PAIR_ABI = [
     }
 ]
 
+# Multicall3 ABI (minimal)
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
 # Message templates
 WELCOME_MESSAGE = """
 🚀 **Welcome to Atalanta - The Ultimate MegaETH Trading Bot!**
@@ -6,15 +6,221 @@ SQLite wrapper using aiosqlite for user data, trades, points, and referrals
 import sqlite3
 import aiosqlite
 import asyncio
-from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any, Tuple
-from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import AsyncIterator, Optional, List, Dict, Any, Tuple
+from contextlib import asynccontextmanager
+import functools
+import operator
+from dataclasses import dataclass, replace
 import json
 import logging
 
+# Optional fast JSON codec for bot_stats payloads
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from utils.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Connection tuning applied once when the connection is opened
+_SQL_CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-64000;
+    PRAGMA mmap_size=268435456;
+    PRAGMA busy_timeout=5000;
+"""
+
+# Store datetimes in SQLite's own "YYYY-MM-DD HH:MM:SS" layout so they
+# compare correctly against datetime('now', ...) in queries
+def _adapt_datetime(value: datetime) -> str:
+    return value.isoformat(" ")
+
+def _convert_timestamp(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+
+_SQL_CREATE_USER_STATS = """
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        total_trades INTEGER DEFAULT 0,
+        successful_trades INTEGER DEFAULT 0,
+        total_profit REAL DEFAULT 0,
+        total_volume REAL DEFAULT 0,
+        best_trade REAL DEFAULT 0,
+        avg_slippage REAL DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (telegram_id)
+    ) WITHOUT ROWID
+"""
+
+_SQL_CREATE_BOT_STATS = """
+    CREATE TABLE IF NOT EXISTS bot_stats (
+        stat_key TEXT PRIMARY KEY,
+        stat_value BLOB,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) WITHOUT ROWID
+"""
+
+# Statement text shared by every call, so SQLite's statement cache can reuse it
+_SQL_INSERT_USER = """
+    INSERT INTO users
+    (telegram_id, username, first_name, wallet_address, is_premium, points,
+     referral_code, referred_by, created_at, last_active)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?,
+            COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP))
+"""
+
+_SQL_INSERT_USER_STATS = """
+    INSERT INTO user_stats (user_id, total_trades, successful_trades,
+                            total_profit, total_volume, best_trade, avg_slippage)
+    VALUES (?, 0, 0, 0, 0, 0, 0)
+"""
+
+# Explicit column lists keep ordinal positions stable for positional row reads
+_SQL_SELECT_USER = """
+    SELECT telegram_id, username, first_name, wallet_address, is_premium, points,
+           referral_code, referred_by, created_at, last_active
+    FROM users WHERE telegram_id = ?
+"""
+
+_SQL_UPDATE_USER = """
+    UPDATE users SET
+        username = ?, first_name = ?, wallet_address = ?,
+        is_premium = ?, points = ?, last_active = COALESCE(?, CURRENT_TIMESTAMP)
+    WHERE telegram_id = ?
+"""
+
+_SQL_ADD_POINTS = "UPDATE users SET points = points + ? WHERE telegram_id = ?"
+
+_SQL_INSERT_TRADE = """
+    INSERT INTO trades
+    (user_id, token_address, token_symbol, trade_type, amount_in, amount_out,
+     token_amount, price_usd, gas_used, gas_cost, tx_hash, status, profit_loss)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(tx_hash) DO NOTHING
+"""
+
+# executemany() rejects RETURNING, so the bulk paths keep the plain INSERTs
+_SQL_INSERT_TRADE_RETURNING_ID = _SQL_INSERT_TRADE + "    RETURNING id\n"
+
+_SQL_UPDATE_TRADE_STATUS_PNL = """
+    UPDATE trades SET status = ?, profit_loss = ?
+    WHERE tx_hash = ?
+"""
+
+_SQL_UPDATE_TRADE_STATUS = "UPDATE trades SET status = ? WHERE tx_hash = ?"
+
+# Trade columns in dataclass field order, for positional row reads
+_TRADE_FIELDS = (
+    'id', 'user_id', 'token_address', 'token_symbol', 'trade_type',
+    'amount_in', 'amount_out', 'token_amount', 'price_usd', 'gas_used',
+    'gas_cost', 'tx_hash', 'status', 'profit_loss', 'created_at'
+)
+
+_SQL_SELECT_USER_TRADES = f"""
+    SELECT {', '.join(_TRADE_FIELDS)} FROM trades
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+
+_SQL_INSERT_OPPORTUNITY = """
+    INSERT INTO arbitrage_opportunities
+    (token_address, token_symbol, dex_a, dex_b, price_a, price_b,
+     profit_percentage, gas_estimate, net_profit, is_executable)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_INSERT_OPPORTUNITY_RETURNING_ID = _SQL_INSERT_OPPORTUNITY + "    RETURNING id\n"
+
+_SQL_SELECT_RECENT_OPPORTUNITIES = """
+    SELECT id, token_address, token_symbol, dex_a, dex_b, price_a, price_b,
+           profit_percentage, gas_estimate, net_profit, is_executable, discovered_at
+    FROM arbitrage_opportunities
+    WHERE discovered_at > datetime('now', ?)
+    ORDER BY discovered_at DESC
+"""
+
+# Matches the partial index idx_arb_executable_recent
+_SQL_SELECT_RECENT_EXECUTABLE_OPPORTUNITIES = """
+    SELECT id, token_address, token_symbol, dex_a, dex_b, price_a, price_b,
+           profit_percentage, gas_estimate, net_profit, is_executable, discovered_at
+    FROM arbitrage_opportunities
+    WHERE is_executable = 1 AND discovered_at > datetime('now', ?)
+    ORDER BY discovered_at DESC
+"""
+
+_SQL_INSERT_PREDICTION = """
+    INSERT INTO predictions
+    (token_address, token_symbol, prediction_type, confidence, prediction_value,
+     actual_value, is_correct, created_at, resolved_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?)
+    RETURNING id
+"""
+
+_SQL_SELECT_LEADERBOARD = """
+    SELECT telegram_id, username, points
+    FROM users
+    ORDER BY points DESC
+    LIMIT ?
+"""
+
+_USER_STATS_FIELDS = (
+    'user_id', 'total_trades', 'successful_trades', 'total_profit',
+    'total_volume', 'best_trade', 'avg_slippage'
+)
+
+_SQL_SELECT_USER_STATS = f"""
+    SELECT {', '.join(_USER_STATS_FIELDS)} FROM user_stats WHERE user_id = ?
+"""
+
+_SQL_DELETE_OLD_OPPORTUNITIES = """
+    DELETE FROM arbitrage_opportunities
+    WHERE discovered_at < datetime('now', ?)
+"""
+
+_SQL_UPSERT_STAT = """
+    INSERT INTO bot_stats (stat_key, stat_value) VALUES (?, ?)
+    ON CONFLICT(stat_key) DO UPDATE SET
+        stat_value = excluded.stat_value, updated_at = CURRENT_TIMESTAMP
+"""
+
+_SQL_SELECT_STAT = "SELECT stat_value FROM bot_stats WHERE stat_key = ?"
+
+def _dump_stat(value: Any) -> bytes:
+    """Encode a bot_stats payload as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':')).encode()
+
+def _load_stat(payload: bytes) -> Any:
+    """Decode a bot_stats payload written by _dump_stat"""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+@functools.lru_cache(maxsize=64)
+def _build_stats_update(keys: Tuple[str, ...]) -> str:
+    """UPDATE statement setting the given user_stats columns"""
+    return f"UPDATE user_stats SET {', '.join(k + ' = ?' for k in keys)} WHERE user_id = ?"
+
+@functools.lru_cache(maxsize=64)
+def _build_stats_increment(keys: Tuple[str, ...]) -> str:
+    """UPDATE statement incrementing the given user_stats columns"""
+    return f"UPDATE user_stats SET {', '.join(f'{k} = {k} + ?' for k in keys)} WHERE user_id = ?"
+
+# user_stats columns that record_completed_trade may increment
+_STAT_COUNTER_COLUMNS = frozenset({
+    'total_trades', 'successful_trades', 'total_profit', 'total_volume'
+})
+
+@dataclass(slots=True)
 class User:
     """User data model"""
     telegram_id: int
@@ -25,16 +231,10 @@ class User:
     points: int = 0
     referral_code: Optional[str] = None
     referred_by: Optional[str] = None
-    created_at: datetime = None
-    last_active: datetime = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now(timezone.utc)
-        if self.last_active is None:
-            self.last_active = datetime.now(timezone.utc)
+    created_at: Optional[datetime] = None  # None lets the database default apply
+    last_active: Optional[datetime] = None
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     """Trade data model"""
     id: Optional[int]
@@ -51,13 +251,9 @@ class Trade:
     tx_hash: str
     status: str  # 'pending', 'completed', 'failed'
     profit_loss: Optional[float]
-    created_at: datetime
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now(timezone.utc)
+    created_at: Optional[datetime]  # Set by the database on insert
 
-@dataclass
+@dataclass(slots=True)
 class ArbitrageOpportunity:
     """Arbitrage opportunity data model"""
     id: Optional[int]
@@ -71,13 +267,9 @@ class ArbitrageOpportunity:
     gas_estimate: float
     net_profit: float
     is_executable: bool
-    discovered_at: datetime
-    
-    def __post_init__(self):
-        if self.discovered_at is None:
-            self.discovered_at = datetime.now(timezone.utc)
+    discovered_at: Optional[datetime]  # Set by the database on insert
 
-@dataclass
+@dataclass(slots=True)
 class Prediction:
     """AI prediction data model"""
     id: Optional[int]
@@ -88,148 +280,298 @@ class Prediction:
     prediction_value: float
     actual_value: Optional[float]
     is_correct: Optional[bool]
-    created_at: datetime
+    created_at: Optional[datetime]  # None lets the database default apply
     resolved_at: Optional[datetime]
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now(timezone.utc)
+
+def _build_trades(rows: List[Tuple]) -> List[Trade]:
+    """Build Trade objects from positional rows without running __init__"""
+    trades = []
+    for row in rows:
+        # Rows are already typed by the converters
+        trade = Trade.__new__(Trade)
+        for name, value in zip(_TRADE_FIELDS, row):
+            setattr(trade, name, value)
+        trades.append(trade)
+    return trades
+
+def _build_opportunities(rows: List[Tuple]) -> List[ArbitrageOpportunity]:
+    """Build ArbitrageOpportunity objects from positional rows"""
+    return [ArbitrageOpportunity(*row[:10], bool(row[10]), row[11]) for row in rows]
+
+# Positional INSERT/UPDATE parameters for each model, extracted in one C call
+_user_to_row = operator.attrgetter(
+    'telegram_id', 'username', 'first_name', 'wallet_address', 'is_premium', 'points',
+    'referral_code', 'referred_by', 'created_at', 'last_active'
+)
+_user_to_update_row = operator.attrgetter(
+    'username', 'first_name', 'wallet_address', 'is_premium', 'points', 'last_active',
+    'telegram_id'
+)
+_trade_to_row = operator.attrgetter(
+    'user_id', 'token_address', 'token_symbol', 'trade_type', 'amount_in', 'amount_out',
+    'token_amount', 'price_usd', 'gas_used', 'gas_cost', 'tx_hash', 'status', 'profit_loss'
+)
+_opportunity_to_row = operator.attrgetter(
+    'token_address', 'token_symbol', 'dex_a', 'dex_b', 'price_a', 'price_b',
+    'profit_percentage', 'gas_estimate', 'net_profit', 'is_executable'
+)
+_prediction_to_row = operator.attrgetter(
+    'token_address', 'token_symbol', 'prediction_type', 'confidence', 'prediction_value',
+    'actual_value', 'is_correct', 'created_at', 'resolved_at'
+)
 
 class Database:
     """Async SQLite database wrapper for Atalanta bot"""
     
-    def __init__(self, db_path: str = "atalanta.db"):
+    def __init__(self, db_path: str = "atalanta.db", read_pool_size: int = 4):
         self.db_path = db_path
         self._lock = asyncio.Lock()
         
+        # One writer guarded by the lock, a pool of readers that WAL lets run alongside it
+        self._write_db: Optional[aiosqlite.Connection] = None
+        # Autocommit connection for single-statement writes that need no Python lock
+        self._atomic_db: Optional[aiosqlite.Connection] = None
+        self._read_pool: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._read_pool_size = read_pool_size
+        
+        # Hot per-user reads, invalidated by the write paths
+        self._user_cache = TTLCache(maxsize=10_000, ttl=30)
+        self._stats_cache = TTLCache(maxsize=10_000, ttl=10)
+        
+        # Periodic planner/WAL upkeep
+        self.maintenance_task: Optional[asyncio.Task] = None
+    
     async def initialize(self) -> None:
-        """Initialize database tables"""
+        """Open the connection and initialize database tables"""
         async with self._lock:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        telegram_id INTEGER PRIMARY KEY,
-                        username TEXT,
-                        first_name TEXT,
-                        wallet_address TEXT,
-                        is_premium BOOLEAN DEFAULT FALSE,
-                        points INTEGER DEFAULT 0,
-                        referral_code TEXT UNIQUE,
-                        referred_by TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS trades (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER,
-                        token_address TEXT,
-                        token_symbol TEXT,
-                        trade_type TEXT,
-                        amount_in REAL,
-                        amount_out REAL,
-                        token_amount REAL,
-                        price_usd REAL,
-                        gas_used INTEGER,
-                        gas_cost REAL,
-                        tx_hash TEXT UNIQUE,
-                        status TEXT,
-                        profit_loss REAL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (telegram_id)
-                    )
-                """)
-                
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        token_address TEXT,
-                        token_symbol TEXT,
-                        dex_a TEXT,
-                        dex_b TEXT,
-                        price_a REAL,
-                        price_b REAL,
-                        profit_percentage REAL,
-                        gas_estimate REAL,
-                        net_profit REAL,
-                        is_executable BOOLEAN,
-                        discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS predictions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        token_address TEXT,
-                        token_symbol TEXT,
-                        prediction_type TEXT,
-                        confidence REAL,
-                        prediction_value REAL,
-                        actual_value REAL,
-                        is_correct BOOLEAN,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        resolved_at TIMESTAMP
-                    )
-                """)
-                
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS user_stats (
-                        user_id INTEGER PRIMARY KEY,
-                        total_trades INTEGER DEFAULT 0,
-                        successful_trades INTEGER DEFAULT 0,
-                        total_profit REAL DEFAULT 0,
-                        total_volume REAL DEFAULT 0,
-                        best_trade REAL DEFAULT 0,
-                        avg_slippage REAL DEFAULT 0,
-                        FOREIGN KEY (user_id) REFERENCES users (telegram_id)
-                    )
-                """)
+            # Long-lived connections shared by all methods
+            self._write_db = await self._connect()
+            
+            db = self._write_db
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    telegram_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    first_name TEXT,
+                    wallet_address TEXT,
+                    is_premium BOOLEAN DEFAULT FALSE,
+                    points INTEGER DEFAULT 0,
+                    referral_code TEXT UNIQUE,
+                    referred_by TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS trades (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    token_address TEXT,
+                    token_symbol TEXT,
+                    trade_type TEXT,
+                    amount_in REAL,
+                    amount_out REAL,
+                    token_amount REAL,
+                    price_usd REAL,
+                    gas_used INTEGER,
+                    gas_cost REAL,
+                    tx_hash TEXT UNIQUE,
+                    status TEXT,
+                    profit_loss REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (telegram_id)
+                )
+            """)
+            
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS arbitrage_opportunities (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    token_address TEXT,
+                    token_symbol TEXT,
+                    dex_a TEXT,
+                    dex_b TEXT,
+                    price_a REAL,
+                    price_b REAL,
+                    profit_percentage REAL,
+                    gas_estimate REAL,
+                    net_profit REAL,
+                    is_executable BOOLEAN,
+                    discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS predictions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    token_address TEXT,
+                    token_symbol TEXT,
+                    prediction_type TEXT,
+                    confidence REAL,
+                    prediction_value REAL,
+                    actual_value REAL,
+                    is_correct BOOLEAN,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    resolved_at TIMESTAMP
+                )
+            """)
+            
+            # Small keyed tables stored directly in their primary-key B-tree
+            await self._create_without_rowid(db, 'user_stats', _SQL_CREATE_USER_STATS)
+            await self._create_without_rowid(db, 'bot_stats', _SQL_CREATE_BOT_STATS)
+            
+            # Create indexes for performance
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_trades_token_address ON trades(token_address)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_predictions_token_address ON predictions(token_address)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_arbitrage_discovered_at ON arbitrage_opportunities(discovered_at)")
+            
+            # Composite indexes that also satisfy the ORDER BY of the hot queries
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_trades_user_created ON trades(user_id, created_at DESC)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_users_points ON users(points DESC)")
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_arb_executable_recent
+                ON arbitrage_opportunities(discovered_at DESC)
+                WHERE is_executable = 1
+            """)
+            
+            # Superseded by idx_trades_user_created
+            await db.execute("DROP INDEX IF EXISTS idx_trades_user_id")
+            await db.execute("DROP INDEX IF EXISTS idx_trades_created_at")
+            await db.execute("DROP INDEX IF EXISTS idx_arb_exec_time")
+            
+            # Refresh planner statistics for the new indexes
+            await db.execute("ANALYZE")
+            
+            await db.commit()
+            
+            # Other connections are opened after the schema exists
+            self._atomic_db = await self._connect(autocommit=True)
+            for _ in range(self._read_pool_size):
+                self._read_pool.put_nowait(await self._connect(read_only=True))
+            
+            if self.maintenance_task is None:
+                self.maintenance_task = asyncio.create_task(self._maintenance_loop())
+            
+            logger.info("Database initialized successfully")
+    
+    async def _maintenance_loop(self) -> None:
+        """Prune old opportunities, refresh planner statistics and truncate the WAL periodically"""
+        while True:
+            try:
+                await asyncio.sleep(900)  # Every 15 minutes
                 
-                await db.execute("""
-                    CREATE TABLE IF NOT EXISTS bot_stats (
-                        stat_key TEXT PRIMARY KEY,
-                        stat_value TEXT,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+                # Keep the opportunity table and its indexes small
+                await self.cleanup_old_data()
                 
-                # Create indexes for performance
-                await db.execute("CREATE INDEX IF NOT EXISTS idx_trades_user_id ON trades(user_id)")
-                await db.execute("CREATE INDEX IF NOT EXISTS idx_trades_token_address ON trades(token_address)")
-                await db.execute("CREATE INDEX IF NOT EXISTS idx_trades_created_at ON trades(created_at)")
-                await db.execute("CREATE INDEX IF NOT EXISTS idx_predictions_token_address ON predictions(token_address)")
-                await db.execute("CREATE INDEX IF NOT EXISTS idx_arbitrage_discovered_at ON arbitrage_opportunities(discovered_at)")
+                async with self._lock:
+                    await self._write_db.execute("PRAGMA optimize")
+                    await self._write_db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
                 
-                await db.commit()
-                logger.info("Database initialized successfully")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in database maintenance: {e}")
+    
+    async def _create_without_rowid(self, db: aiosqlite.Connection, table: str, ddl: str) -> None:
+        """Create a WITHOUT ROWID table, rebuilding an existing rowid version in place"""
+        cursor = await db.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        )
+        row = await cursor.fetchone()
+        
+        if row is None or 'WITHOUT ROWID' in row[0].upper():
+            await db.execute(ddl)
+            return
+        
+        # Migrate: move the old table aside, recreate it and copy the rows over,
+        # all in one transaction so a crash can't strand rows in {table}_old
+        await db.commit()
+        await db.execute("BEGIN IMMEDIATE")
+        try:
+            await db.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+            await db.execute(ddl)
+            await db.execute(f"INSERT INTO {table} SELECT * FROM {table}_old")
+            await db.execute(f"DROP TABLE {table}_old")
+            await db.execute("COMMIT")
+        except Exception:
+            await db.execute("ROLLBACK")
+            raise
+        logger.info(f"Migrated {table} to a WITHOUT ROWID table")
+    
+    async def _connect(self, read_only: bool = False,
+                       autocommit: bool = False) -> aiosqlite.Connection:
+        """Open a tuned connection, optionally refusing writes or in autocommit mode"""
+        db = await aiosqlite.connect(
+            self.db_path,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            isolation_level=None if autocommit else ""
+        )
+        await db.executescript(_SQL_CONNECTION_PRAGMAS)
+        if read_only:
+            await db.execute("PRAGMA query_only=ON")
+        return db
+    
+    async def close(self) -> None:
+        """Close all database connections"""
+        if self.maintenance_task:
+            self.maintenance_task.cancel()
+            try:
+                await self.maintenance_task
+            except asyncio.CancelledError:
+                pass
+            self.maintenance_task = None
+        
+        async with self._lock:
+            while not self._read_pool.empty():
+                await self._read_pool.get_nowait().close()
+            
+            if self._atomic_db is not None:
+                await self._atomic_db.close()
+                self._atomic_db = None
+            
+            if self._write_db is not None:
+                await self._write_db.close()
+                self._write_db = None
+    
+    @asynccontextmanager
+    async def _writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Serialize writes on the writer connection, rolling back on error"""
+        async with self._lock:
+            try:
+                yield self._write_db
+            except BaseException:
+                # Don't leave a half-written transaction for the next writer to commit
+                await self._write_db.rollback()
+                raise
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Run several writes as a single BEGIN IMMEDIATE ... COMMIT"""
+        async with self._writer() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            yield db
+            await db.commit()
+    
+    @asynccontextmanager
+    async def _reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection from the pool without taking the write lock"""
+        db = await self._read_pool.get()
+        try:
+            yield db
+        finally:
+            self._read_pool.put_nowait(db)
     
     async def create_user(self, user: User) -> bool:
         """Create a new user"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    await db.execute("""
-                        INSERT INTO users 
-                        (telegram_id, username, first_name, wallet_address, is_premium, points, 
-                         referral_code, referred_by, created_at, last_active)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        user.telegram_id, user.username, user.first_name, user.wallet_address,
-                        user.is_premium, user.points, user.referral_code, user.referred_by,
-                        user.created_at, user.last_active
-                    ))
-                    
-                    # Initialize user stats
-                    await db.execute("""
-                        INSERT INTO user_stats (user_id, total_trades, successful_trades, 
-                                              total_profit, total_volume, best_trade, avg_slippage)
-                        VALUES (?, 0, 0, 0, 0, 0, 0)
-                    """, (user.telegram_id,))
-                    
-                    await db.commit()
-                    return True
+            async with self.transaction() as db:
+                await db.execute(_SQL_INSERT_USER, _user_to_row(user))
+                
+                # Initialize user stats
+                await db.execute(_SQL_INSERT_USER_STATS, (user.telegram_id,))
+            self._user_cache.pop(user.telegram_id)
+            self._stats_cache.pop(user.telegram_id)
+            return True
         except sqlite3.IntegrityError as e:
             logger.warning(f"User already exists: {user.telegram_id} - {e}")
             return False
@@ -239,28 +581,22 @@ class Database:
     
     async def get_user(self, telegram_id: int) -> Optional[User]:
         """Get user by telegram ID"""
+        # Callers mutate users before update_user, so the cache only hands out copies
+        user = self._user_cache.get(telegram_id)
+        if user is not None:
+            return replace(user)
+        
+        # A write committing while this read is in flight revokes the fill
+        token = self._user_cache.reserve(telegram_id)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(
-                    "SELECT * FROM users WHERE telegram_id = ?",
-                    (telegram_id,)
-                )
+            async with self._reader() as db:
+                cursor = await db.execute(_SQL_SELECT_USER, (telegram_id,))
                 row = await cursor.fetchone()
                 
                 if row:
-                    return User(
-                        telegram_id=row['telegram_id'],
-                        username=row['username'],
-                        first_name=row['first_name'],
-                        wallet_address=row['wallet_address'],
-                        is_premium=bool(row['is_premium']),
-                        points=row['points'],
-                        referral_code=row['referral_code'],
-                        referred_by=row['referred_by'],
-                        created_at=datetime.fromisoformat(row['created_at']),
-                        last_active=datetime.fromisoformat(row['last_active'])
-                    )
+                    user = User(*row[:4], bool(row[4]), *row[5:])
+                    self._user_cache.fill(telegram_id, user, token)
+                    return replace(user)
                 return None
         except Exception as e:
             logger.error(f"Error getting user {telegram_id}: {e}")
@@ -269,20 +605,11 @@ class Database:
     async def update_user(self, user: User) -> bool:
         """Update user data"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    await db.execute("""
-                        UPDATE users SET 
-                            username = ?, first_name = ?, wallet_address = ?, 
-                            is_premium = ?, points = ?, last_active = ?
-                        WHERE telegram_id = ?
-                    """, (
-                        user.username, user.first_name, user.wallet_address,
-                        user.is_premium, user.points, user.last_active,
-                        user.telegram_id
-                    ))
-                    await db.commit()
-                    return True
+            async with self._writer() as db:
+                await db.execute(_SQL_UPDATE_USER, _user_to_update_row(user))
+                await db.commit()
+            self._user_cache.pop(user.telegram_id)
+            return True
         except Exception as e:
             logger.error(f"Error updating user {user.telegram_id}: {e}")
             return False
@@ -290,14 +617,10 @@ class Database:
     async def add_points(self, telegram_id: int, points: int) -> bool:
         """Add points to user"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    await db.execute(
-                        "UPDATE users SET points = points + ? WHERE telegram_id = ?",
-                        (points, telegram_id)
-                    )
-                    await db.commit()
-                    return True
+            # Single atomic statement: SQLite's busy_timeout serializes it
+            await self._atomic_db.execute(_SQL_ADD_POINTS, (points, telegram_id))
+            self._user_cache.pop(telegram_id)
+            return True
         except Exception as e:
             logger.error(f"Error adding points to user {telegram_id}: {e}")
             return False
@@ -305,133 +628,126 @@ class Database:
     async def create_trade(self, trade: Trade) -> Optional[int]:
         """Create a new trade record"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    cursor = await db.execute("""
-                        INSERT INTO trades 
-                        (user_id, token_address, token_symbol, trade_type, amount_in, amount_out,
-                         token_amount, price_usd, gas_used, gas_cost, tx_hash, status, profit_loss)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        trade.user_id, trade.token_address, trade.token_symbol, trade.trade_type,
-                        trade.amount_in, trade.amount_out, trade.token_amount, trade.price_usd,
-                        trade.gas_used, trade.gas_cost, trade.tx_hash, trade.status, trade.profit_loss
-                    ))
-                    await db.commit()
-                    return cursor.lastrowid
+            async with self._writer() as db:
+                trade_id = await self._insert_trade(db, trade)
+                await db.commit()
+                return trade_id
         except Exception as e:
             logger.error(f"Error creating trade: {e}")
             return None
     
+    async def record_completed_trade(self, trade: Trade, stats_delta: Dict[str, float],
+                                     points: int = 0) -> Optional[int]:
+        """Insert a trade, bump user stats and award points in one transaction"""
+        try:
+            unknown = stats_delta.keys() - _STAT_COUNTER_COLUMNS
+            if unknown:
+                raise ValueError(f"Unknown stat columns: {sorted(unknown)}")
+            
+            async with self.transaction() as db:
+                trade_id = await self._insert_trade(db, trade)
+                if trade_id is None:
+                    # Already recorded; don't count it twice
+                    return None
+                
+                if stats_delta:
+                    keys = tuple(sorted(stats_delta))
+                    await db.execute(
+                        _build_stats_increment(keys),
+                        (*(stats_delta[k] for k in keys), trade.user_id)
+                    )
+                
+                if points:
+                    await db.execute(_SQL_ADD_POINTS, (points, trade.user_id))
+            self._user_cache.pop(trade.user_id)
+            self._stats_cache.pop(trade.user_id)
+            return trade_id
+        except Exception as e:
+            logger.error(f"Error recording completed trade {trade.tx_hash}: {e}")
+            return None
+    
+    async def create_trades(self, trades: List[Trade]) -> int:
+        """Insert many trade records in one transaction, returning the count of new rows"""
+        if not trades:
+            return 0
+        try:
+            async with self.transaction() as db:
+                cursor = await db.executemany(_SQL_INSERT_TRADE, map(_trade_to_row, trades))
+                inserted = cursor.rowcount
+            return inserted
+        except Exception as e:
+            logger.error(f"Error creating {len(trades)} trades: {e}")
+            return 0
+    
+    async def _insert_trade(self, db: aiosqlite.Connection, trade: Trade) -> Optional[int]:
+        """Insert a trade row on the writer connection without committing, None if tx_hash exists"""
+        rows = await db.execute_fetchall(_SQL_INSERT_TRADE_RETURNING_ID, _trade_to_row(trade))
+        return rows[0][0] if rows else None
+    
     async def update_trade_status(self, tx_hash: str, status: str, 
                                  profit_loss: Optional[float] = None) -> bool:
         """Update trade status and profit/loss"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    if profit_loss is not None:
-                        await db.execute("""
-                            UPDATE trades SET status = ?, profit_loss = ?
-                            WHERE tx_hash = ?
-                        """, (status, profit_loss, tx_hash))
-                    else:
-                        await db.execute(
-                            "UPDATE trades SET status = ? WHERE tx_hash = ?",
-                            (status, tx_hash)
-                        )
-                    await db.commit()
-                    return True
+            if profit_loss is not None:
+                await self._atomic_db.execute(_SQL_UPDATE_TRADE_STATUS_PNL, (status, profit_loss, tx_hash))
+            else:
+                await self._atomic_db.execute(_SQL_UPDATE_TRADE_STATUS, (status, tx_hash))
+            return True
         except Exception as e:
             logger.error(f"Error updating trade status {tx_hash}: {e}")
             return False
     
-    async def get_user_trades(self, telegram_id: int, limit: int = 50) -> List[Trade]:
-        """Get user's trade history"""
+    async def iter_user_trades(self, telegram_id: int, limit: int = 50) -> AsyncIterator[Trade]:
+        """Stream user's trade history, releasing the pooled reader before the first yield"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute("""
-                    SELECT * FROM trades 
-                    WHERE user_id = ? 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                """, (telegram_id, limit))
-                
-                trades = []
-                async for row in cursor:
-                    trade = Trade(
-                        id=row['id'],
-                        user_id=row['user_id'],
-                        token_address=row['token_address'],
-                        token_symbol=row['token_symbol'],
-                        trade_type=row['trade_type'],
-                        amount_in=row['amount_in'],
-                        amount_out=row['amount_out'],
-                        token_amount=row['token_amount'],
-                        price_usd=row['price_usd'],
-                        gas_used=row['gas_used'],
-                        gas_cost=row['gas_cost'],
-                        tx_hash=row['tx_hash'],
-                        status=row['status'],
-                        profit_loss=row['profit_loss'],
-                        created_at=datetime.fromisoformat(row['created_at'])
-                    )
-                    trades.append(trade)
-                return trades
+            async with self._reader() as db:
+                # One thread hop for the whole page instead of one per row
+                async with db.execute(_SQL_SELECT_USER_TRADES, (telegram_id, limit)) as cursor:
+                    rows = await cursor.fetchmany(limit)
         except Exception as e:
             logger.error(f"Error getting trades for user {telegram_id}: {e}")
-            return []
+            return
+        
+        for trade in _build_trades(rows):
+            yield trade
+    
+    async def get_user_trades(self, telegram_id: int, limit: int = 50) -> List[Trade]:
+        """Get user's trade history"""
+        return [trade async for trade in self.iter_user_trades(telegram_id, limit)]
     
     async def save_arbitrage_opportunity(self, opp: ArbitrageOpportunity) -> Optional[int]:
         """Save arbitrage opportunity"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    cursor = await db.execute("""
-                        INSERT INTO arbitrage_opportunities 
-                        (token_address, token_symbol, dex_a, dex_b, price_a, price_b,
-                         profit_percentage, gas_estimate, net_profit, is_executable)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        opp.token_address, opp.token_symbol, opp.dex_a, opp.dex_b,
-                        opp.price_a, opp.price_b, opp.profit_percentage,
-                        opp.gas_estimate, opp.net_profit, opp.is_executable
-                    ))
-                    await db.commit()
-                    return cursor.lastrowid
+            async with self._writer() as db:
+                rows = await db.execute_fetchall(
+                    _SQL_INSERT_OPPORTUNITY_RETURNING_ID, _opportunity_to_row(opp)
+                )
+                await db.commit()
+                return rows[0][0]
         except Exception as e:
             logger.error(f"Error saving arbitrage opportunity: {e}")
             return None
     
-    async def get_recent_arbitrage_opportunities(self, hours: int = 1) -> List[ArbitrageOpportunity]:
-        """Get recent arbitrage opportunities"""
+    async def save_arbitrage_opportunities(self, opps: List[ArbitrageOpportunity]) -> int:
+        """Save many arbitrage opportunities in one transaction, returning the count"""
+        if not opps:
+            return 0
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute("""
-                    SELECT * FROM arbitrage_opportunities 
-                    WHERE discovered_at > datetime('now', '-{} hours')
-                    ORDER BY discovered_at DESC
-                """.format(hours))
-                
-                opportunities = []
-                async for row in cursor:
-                    opp = ArbitrageOpportunity(
-                        id=row['id'],
-                        token_address=row['token_address'],
-                        token_symbol=row['token_symbol'],
-                        dex_a=row['dex_a'],
-                        dex_b=row['dex_b'],
-                        price_a=row['price_a'],
-                        price_b=row['price_b'],
-                        profit_percentage=row['profit_percentage'],
-                        gas_estimate=row['gas_estimate'],
-                        net_profit=row['net_profit'],
-                        is_executable=bool(row['is_executable']),
-                        discovered_at=datetime.fromisoformat(row['discovered_at'])
-                    )
-                    opportunities.append(opp)
-                return opportunities
+            async with self.transaction() as db:
+                await db.executemany(_SQL_INSERT_OPPORTUNITY, map(_opportunity_to_row, opps))
+            return len(opps)
+        except Exception as e:
+            logger.error(f"Error saving {len(opps)} arbitrage opportunities: {e}")
+            return 0
+    
+    async def get_recent_arbitrage_opportunities(self, hours: int = 1,
+                                                 executable_only: bool = False) -> List[ArbitrageOpportunity]:
+        """Get recent arbitrage opportunities, optionally only executable ones"""
+        sql = _SQL_SELECT_RECENT_EXECUTABLE_OPPORTUNITIES if executable_only else _SQL_SELECT_RECENT_OPPORTUNITIES
+        try:
+            async with self._reader() as db:
+                rows = await db.execute_fetchall(sql, (f"-{hours} hours",))
+            return _build_opportunities(rows)
         except Exception as e:
             logger.error(f"Error getting recent arbitrage opportunities: {e}")
             return []
@@ -439,20 +755,10 @@ class Database:
     async def save_prediction(self, prediction: Prediction) -> Optional[int]:
         """Save AI prediction"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    cursor = await db.execute("""
-                        INSERT INTO predictions 
-                        (token_address, token_symbol, prediction_type, confidence, prediction_value,
-                         actual_value, is_correct, created_at, resolved_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        prediction.token_address, prediction.token_symbol, prediction.prediction_type,
-                        prediction.confidence, prediction.prediction_value, prediction.actual_value,
-                        prediction.is_correct, prediction.created_at, prediction.resolved_at
-                    ))
-                    await db.commit()
-                    return cursor.lastrowid
+            async with self._writer() as db:
+                rows = await db.execute_fetchall(_SQL_INSERT_PREDICTION, _prediction_to_row(prediction))
+                await db.commit()
+                return rows[0][0]
         except Exception as e:
             logger.error(f"Error saving prediction: {e}")
             return None
@@ -460,17 +766,12 @@ class Database:
     async def get_leaderboard(self, limit: int = 10) -> List[Tuple[int, str, int]]:
         """Get top users by points"""
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    SELECT telegram_id, username, points 
-                    FROM users 
-                    ORDER BY points DESC 
-                    LIMIT ?
-                """, (limit,))
+            async with self._reader() as db:
+                cursor = await db.execute(_SQL_SELECT_LEADERBOARD, (limit,))
                 
                 leaderboard = []
                 async for row in cursor:
-                    leaderboard.append((row['telegram_id'], row['username'], row['points']))
+                    leaderboard.append((row[0], row[1], row[2]))
                 return leaderboard
         except Exception as e:
             logger.error(f"Error getting leaderboard: {e}")
@@ -478,16 +779,21 @@ class Database:
     
     async def get_user_stats(self, telegram_id: int) -> Optional[Dict[str, Any]]:
         """Get user trading statistics"""
+        # Stats dicts are handed out as copies so callers can't alter the cached one
+        stats = self._stats_cache.get(telegram_id)
+        if stats is not None:
+            return dict(stats)
+        
+        token = self._stats_cache.reserve(telegram_id)
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute("""
-                    SELECT * FROM user_stats WHERE user_id = ?
-                """, (telegram_id,))
+            async with self._reader() as db:
+                cursor = await db.execute(_SQL_SELECT_USER_STATS, (telegram_id,))
                 
                 row = await cursor.fetchone()
                 if row:
-                    return dict(row)
+                    stats = dict(zip(_USER_STATS_FIELDS, row))
+                    self._stats_cache.fill(telegram_id, stats, token)
+                    return dict(stats)
                 return None
         except Exception as e:
             logger.error(f"Error getting user stats {telegram_id}: {e}")
@@ -496,34 +802,46 @@ class Database:
     async def update_user_stats(self, telegram_id: int, **kwargs) -> bool:
         """Update user statistics"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    set_clause = ", ".join([f"{k} = ?" for k in kwargs.keys()])
-                    values = list(kwargs.values()) + [telegram_id]
-                    
-                    await db.execute(f"""
-                        UPDATE user_stats SET {set_clause} WHERE user_id = ?
-                    """, values)
-                    await db.commit()
-                    return True
+            keys = tuple(sorted(kwargs))
+            values = [kwargs[k] for k in keys] + [telegram_id]
+            
+            await self._atomic_db.execute(_build_stats_update(keys), values)
+            self._stats_cache.pop(telegram_id)
+            return True
         except Exception as e:
             logger.error(f"Error updating user stats {telegram_id}: {e}")
             return False
     
-    async def cleanup_old_data(self, days: int = 30) -> int:
+    async def set_stat(self, key: str, value: Any) -> bool:
+        """Store a JSON-serializable bot statistic"""
+        try:
+            await self._atomic_db.execute(_SQL_UPSERT_STAT, (key, _dump_stat(value)))
+            return True
+        except Exception as e:
+            logger.error(f"Error setting bot stat {key}: {e}")
+            return False
+    
+    async def get_stat(self, key: str) -> Optional[Any]:
+        """Get a bot statistic stored with set_stat"""
+        try:
+            async with self._reader() as db:
+                cursor = await db.execute(_SQL_SELECT_STAT, (key,))
+                row = await cursor.fetchone()
+                return _load_stat(row[0]) if row else None
+        except Exception as e:
+            logger.error(f"Error getting bot stat {key}: {e}")
+            return None
+    
+    async def cleanup_old_data(self, days: int = 7) -> int:
         """Clean up old data (arbitrage opportunities, etc.)"""
         try:
-            async with self._lock:
-                async with aiosqlite.connect(self.db_path) as db:
-                    cursor = await db.execute("""
-                        DELETE FROM arbitrage_opportunities 
-                        WHERE discovered_at < datetime('now', '-{} days')
-                    """.format(days))
-                    
-                    deleted_count = cursor.rowcount
-                    await db.commit()
-                    logger.info(f"Cleaned up {deleted_count} old arbitrage opportunities")
-                    return deleted_count
+            async with self._writer() as db:
+                cursor = await db.execute(_SQL_DELETE_OLD_OPPORTUNITIES, (f"-{days} days",))
+                
+                deleted_count = cursor.rowcount
+                await db.commit()
+                logger.info(f"Cleaned up {deleted_count} old arbitrage opportunities")
+                return deleted_count
         except Exception as e:
             logger.error(f"Error cleaning up old data: {e}")
             return 0
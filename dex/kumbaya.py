@@ -4,183 +4,547 @@ Handles interactions with Kumbaya protocol on MegaETH
 """
 
 import asyncio
+import functools
 import logging
-from typing import Dict, List, Optional, Tuple, Any
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Any
+import aiohttp
+from eth_abi import decode as abi_decode, encode as abi_encode
 from web3 import Web3, AsyncWeb3
-from web3.contract import Contract
-from web3.exceptions import TransactionNotFound, ContractLogicError
-import json
-from datetime import datetime, timezone
 
-from config import Config, ROUTER_ABI, FACTORY_ABI, PAIR_ABI, ERC20_ABI
+from config import CONFIG, ROUTER_ABI, FACTORY_ABI
+from utils.rpc import json_rpc_batch, encode_aggregate3, decode_aggregate3
 
 logger = logging.getLogger(__name__)
 
+# Checksumming costs a keccak256; hot paths see the same few addresses
+@functools.lru_cache(maxsize=4096)
+def _checksum(address: str) -> str:
+    return Web3.to_checksum_address(address)
+
+def _a2i(address: str) -> int:
+    """Address as a 160-bit int, so comparisons skip string case and checksums"""
+    return int(address, 16)
+
+# ERC20 metadata selectors, in token info field order
+_TOKEN_INFO_SELECTORS = (
+    ('name', "0x06fdde03"),
+    ('symbol', "0x95d89b41"),
+    ('decimals', "0x313ce567"),
+)
+
+# Precomputed selectors for raw eth_calls and Multicall3 batches
+_SELECTOR_GET_RESERVES = bytes.fromhex("0902f1ac")
+_SELECTOR_TOKEN0 = bytes.fromhex("0dfe1681")
+_SELECTOR_GET_PAIR = bytes.fromhex("e6a43905")
+_SELECTOR_GET_AMOUNTS_OUT = bytes.fromhex("d06ca61f")
+_SELECTOR_SWAP_EXACT_ETH_FOR_TOKENS = bytes.fromhex("7ff36ab5")
+
+# ABI type lists for those calls, parsed once by eth_abi's codec registry
+_GET_PAIR_IN = ('address', 'address')
+_GET_AMOUNTS_OUT_IN = ('uint256', 'address[]')
+_SWAP_IN = ('uint256', 'address[]', 'address', 'uint256')
+_GET_RESERVES_OUT = ('uint112', 'uint112', 'uint32')
+_ADDRESS_OUT = ('address',)
+_AMOUNTS_OUT = ('uint256[]',)
+_UINT8_OUT = ('uint8',)
+_STRING_OUT = ('string',)
+
+# Slippage is applied in integer basis points to keep wei amounts exact
+_BPS = 10_000
+
+# UniswapV2 constant-product swap fee: 0.3% of the input stays in the pool
+_FEE_NUMERATOR = 997
+_FEE_DENOMINATOR = 1000
+
+# Gas price is reused for this long before hitting the RPC again
+_GAS_PRICE_TTL = 0.5
+
+# Pending nonces are reused this long by retried gas estimates
+_NONCE_TTL = 0.5
+
+# "No pair yet" answers expire quickly since new launches create pairs
+_MISSING_PAIR_TTL = 60.0
+
+# bot_stats key holding the persisted immutable caches
+_CACHE_STAT_KEY = "kumbaya_cache"
+
+# Newly learned cache entries are written out at most this often, off the lookup paths
+_CACHE_FLUSH_INTERVAL = 30.0
+
+_ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+def _decode_token_field(field: str, result: str) -> Any:
+    """Decode an eth_call result for one ERC20 metadata field"""
+    data = bytes.fromhex(result[2:])
+    if field == 'decimals':
+        return abi_decode(_UINT8_OUT, data)[0]
+    if len(data) == 32:
+        # Legacy tokens return bytes32 instead of string
+        return data.rstrip(b'\x00').decode('utf-8', errors='replace')
+    return abi_decode(_STRING_OUT, data)[0]
+
 class KumbayaDEX:
     """Kumbaya DEX integration class"""
     
-    def __init__(self, w3: Web3, async_w3: AsyncWeb3):
+    def __init__(self, w3: Web3, async_w3: AsyncWeb3, database=None,
+                 http_session: Optional[aiohttp.ClientSession] = None):
         self.w3 = w3
         self.async_w3 = async_w3
-        self.router_address = Config.KUMBADYA_ROUTER
-        self.factory_address = Config.KUMBADYA_FACTORY
+        self.database = database
+        self.router_address = _checksum(CONFIG.KUMBADYA_ROUTER)
+        self.factory_address = _checksum(CONFIG.KUMBADYA_FACTORY)
+        self._weth_int = _a2i(CONFIG.WETH_ADDRESS)
         
         # Initialize contracts
-        self.router_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(self.router_address),
+        self.router_contract = async_w3.eth.contract(
+            address=self.router_address,
             abi=ROUTER_ABI
         )
-        self.factory_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(self.factory_address),
+        self.factory_contract = async_w3.eth.contract(
+            address=self.factory_address,
             abi=FACTORY_ABI
         )
+        self.multicall_address = _checksum(CONFIG.MULTICALL3)
         
-        # Cache for pair addresses
+        # Cache for pair addresses and their (immutable) token0
         self._pair_cache: Dict[str, str] = {}
+        self._token0_cache: Dict[str, str] = {}
         self._token_info_cache: Dict[str, Dict[str, Any]] = {}
         
+        # Set when the immutable caches gain entries the database has not seen
+        self._cache_dirty = False
+        self._cache_flush_task: Optional[asyncio.Task] = None
+        
+        # Pair keys known not to exist, with monotonic expiry
+        self._missing_pairs: Dict[str, float] = {}
+        
+        # Last (gas_price, monotonic timestamp) fetched from the node
+        self._gas_price_cache: Optional[Tuple[int, float]] = None
+        
+        # Last (pending nonce, monotonic timestamp) per checksummed wallet
+        self._nonce_cache: Dict[str, Tuple[int, float]] = {}
+        
+        # Shared HTTP session for raw JSON-RPC batches; only closed here if created here
+        self._http_session: Optional[aiohttp.ClientSession] = http_session
+        self._owns_http_session = http_session is None
+        
+        # In-flight lookups keyed by (method, *args), shared by concurrent callers
+        self._inflight: Dict[Tuple[Any, ...], asyncio.Future] = {}
+        
+    async def load_cache(self) -> None:
+        """Restore persisted pair, token0 and token info caches"""
+        if self.database is None:
+            return
+        
+        cached = await self.database.get_stat(_CACHE_STAT_KEY)
+        if cached:
+            self._pair_cache.update(cached.get('pairs', {}))
+            self._token0_cache.update(cached.get('token0', {}))
+            self._token_info_cache.update(cached.get('token_info', {}))
+            logger.info(f"Restored {len(self._pair_cache) // 2} Kumbaya pairs from cache")
+        
+        if self._cache_flush_task is None:
+            self._cache_flush_task = asyncio.create_task(self._cache_flush_loop())
+    
+    async def _cache_flush_loop(self) -> None:
+        """Persist the immutable caches periodically when they have changed"""
+        while True:
+            try:
+                await asyncio.sleep(_CACHE_FLUSH_INTERVAL)
+                if self._cache_dirty:
+                    await self._persist_cache()
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error persisting Kumbaya cache: {e}")
+    
+    async def _persist_cache(self) -> None:
+        """Write the immutable caches through to the database"""
+        if self.database is None:
+            return
+        
+        # Entries learned while the write is in flight mark the caches dirty again
+        self._cache_dirty = False
+        saved = await self.database.set_stat(_CACHE_STAT_KEY, {
+            'pairs': self._pair_cache,
+            'token0': self._token0_cache,
+            'token_info': self._token_info_cache
+        })
+        if not saved:
+            self._cache_dirty = True
+    
+    async def _json_rpc_batch(self, calls: List[Tuple[str, List[Any]]]) -> List[Optional[Any]]:
+        """Send (method, params) calls as one JSON-RPC batch on the shared session"""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession()
+            self._owns_http_session = True
+        return await json_rpc_batch(self._http_session, CONFIG.MEGAETH_RPC, calls)
+    
+    async def _rpc_batch(self, calls: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Send (to, data) eth_calls as one JSON-RPC batch, returning results in call order"""
+        return await self._json_rpc_batch([
+            ("eth_call", [{"to": to, "data": data}, "latest"]) for to, data in calls
+        ])
+    
+    async def _batch_preflight(self, address: str) -> Tuple[int, int]:
+        """Gas price and pending nonce for address in one JSON-RPC batch"""
+        now = time.monotonic()
+        
+        # Retried estimates for the same wallet reuse both values while fresh
+        cached_nonce = self._nonce_cache.get(address)
+        if (cached_nonce is not None and now - cached_nonce[1] < _NONCE_TTL
+                and self._gas_price_cache is not None and now - self._gas_price_cache[1] < _GAS_PRICE_TTL):
+            return self._gas_price_cache[0], cached_nonce[0]
+        
+        gas_price_hex, nonce_hex = await self._json_rpc_batch([
+            ("eth_gasPrice", []),
+            ("eth_getTransactionCount", [address, "pending"])
+        ])
+        if gas_price_hex is None or nonce_hex is None:
+            raise RuntimeError("Gas price / nonce batch returned an error")
+        
+        gas_price, nonce = int(gas_price_hex, 16), int(nonce_hex, 16)
+        self._gas_price_cache = (gas_price, now)
+        self._nonce_cache[address] = (nonce, now)
+        return gas_price, nonce
+    
+    def invalidate_nonce(self, address: Optional[str] = None) -> None:
+        """Drop the cached pending nonce for address, or for every wallet"""
+        if address is None:
+            self._nonce_cache.clear()
+        else:
+            self._nonce_cache.pop(_checksum(address), None)
+    
+    async def _single_flight(self, key: Tuple[Any, ...], factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory once for concurrent callers asking for the same key"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One caller being cancelled must not cancel the call for the others
+        return await asyncio.shield(future)
+    
     async def get_token_info(self, token_address: str) -> Optional[Dict[str, Any]]:
         """Get token information (name, symbol, decimals)"""
-        token_address = Web3.to_checksum_address(token_address)
-        
-        # Check cache first
+        token_address = _checksum(token_address)
         if token_address in self._token_info_cache:
             return self._token_info_cache[token_address]
+        return await self._single_flight(
+            ('tokenInfo', token_address),
+            lambda: self._first(self.get_token_info_many([token_address]))
+        )
+    
+    @staticmethod
+    async def _first(batch: Awaitable[List[Any]]) -> Any:
+        """First result of a batched lookup"""
+        return (await batch)[0]
+    
+    async def get_token_info_many(self, token_addresses: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Get token information for many tokens in a single RPC round-trip"""
+        addresses = [_checksum(address) for address in token_addresses]
         
-        try:
-            token_contract = self.async_w3.eth.contract(
-                address=token_address,
-                abi=ERC20_ABI
-            )
-            
-            # Get token info in parallel
-            name_task = token_contract.functions.name().call()
-            symbol_task = token_contract.functions.symbol().call()
-            decimals_task = token_contract.functions.decimals().call()
-            
-            name, symbol, decimals = await asyncio.gather(
-                name_task, symbol_task, decimals_task
-            )
-            
-            token_info = {
-                'address': token_address,
-                'name': name,
-                'symbol': symbol,
-                'decimals': decimals
-            }
-            
-            # Cache the result
-            self._token_info_cache[token_address] = token_info
-            
-            return token_info
-            
-        except Exception as e:
-            logger.error(f"Error getting token info for {token_address}: {e}")
-            return None
+        # Only fetch what the cache is missing
+        missing = list(dict.fromkeys(a for a in addresses if a not in self._token_info_cache))
+        if missing:
+            try:
+                calls = [(a, selector) for a in missing for _, selector in _TOKEN_INFO_SELECTORS]
+                results = await self._rpc_batch(calls)
+                
+                width = len(_TOKEN_INFO_SELECTORS)
+                for n, address in enumerate(missing):
+                    fields = results[n * width:(n + 1) * width]
+                    try:
+                        token_info = {'address': address}
+                        for (field, _), result in zip(_TOKEN_INFO_SELECTORS, fields):
+                            if result is None or result == "0x":
+                                raise ValueError(f"no {field}() result")
+                            token_info[field] = _decode_token_field(field, result)
+                    except Exception as e:
+                        logger.error(f"Error getting token info for {address}: {e}")
+                        continue
+                    
+                    # Cache the result
+                    self._token_info_cache[address] = token_info
+                
+                if any(address in self._token_info_cache for address in missing):
+                    self._cache_dirty = True
+                
+            except Exception as e:
+                logger.error(f"Error getting token info for {len(missing)} tokens: {e}")
+        
+        return [self._token_info_cache.get(address) for address in addresses]
     
-    async def get_pair_address(self, token_a: str, token_b: str) -> Optional[str]:
-        """Get pair address from factory"""
-        token_a = Web3.to_checksum_address(token_a)
-        token_b = Web3.to_checksum_address(token_b)
+    async def _aggregate(self, calls: List[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        """Run (target, calldata) calls in one Multicall3 eth_call, None for failed calls"""
+        if not calls:
+            return []
         
-        # Create cache key
-        cache_key = f"{token_a}-{token_b}"
-        if cache_key in self._pair_cache:
-            return self._pair_cache[cache_key]
+        return decode_aggregate3(await self._raw_call(self.multicall_address, encode_aggregate3(calls)))
+    
+    async def get_pair_address(self, token_a: str, token_b: str = CONFIG.WETH_ADDRESS) -> Optional[str]:
+        """Get pair address from factory (against ETH by default)"""
+        token_a, token_b = _checksum(token_a), _checksum(token_b)
+        if f"{token_a}-{token_b}" in self._pair_cache:
+            return self._pair_cache[f"{token_a}-{token_b}"]
+        return await self._single_flight(
+            ('getPair', token_a, token_b),
+            lambda: self._first(self.get_pair_addresses([token_a], token_b))
+        )
+    
+    async def get_pair_addresses(self, token_addresses: List[str], base_token: str) -> List[Optional[str]]:
+        """Get token/base pair addresses, resolving uncached ones in one multicall"""
+        base_token = _checksum(base_token)
+        tokens = [_checksum(token) for token in token_addresses]
+        
+        now = time.monotonic()
+        missing = list(dict.fromkeys(
+            t for t in tokens
+            if f"{t}-{base_token}" not in self._pair_cache
+            and self._missing_pairs.get(f"{t}-{base_token}", 0.0) <= now
+        ))
+        if missing:
+            try:
+                results = await self._aggregate([
+                    (self.factory_contract.address,
+                     _SELECTOR_GET_PAIR + abi_encode(_GET_PAIR_IN, [token, base_token]))
+                    for token in missing
+                ])
+                
+                found = False
+                for token, data in zip(missing, results):
+                    if data is None:
+                        continue
+                    pair_address = _checksum(abi_decode(_ADDRESS_OUT, data)[0])
+                    if pair_address == _ZERO_ADDRESS:
+                        self._missing_pairs[f"{token}-{base_token}"] = now + _MISSING_PAIR_TTL
+                        continue
+                    
+                    # Cache the result in both orders
+                    self._pair_cache[f"{token}-{base_token}"] = pair_address
+                    self._pair_cache[f"{base_token}-{token}"] = pair_address
+                    found = True
+                
+                if found:
+                    self._cache_dirty = True
+                    
+            except Exception as e:
+                logger.error(f"Error getting pair addresses for {len(missing)} tokens: {e}")
+        
+        return [self._pair_cache.get(f"{token}-{base_token}") for token in tokens]
+    
+    async def get_pairs_state(self, pair_addresses: List[str]) -> List[Optional[Tuple[int, int, int, int]]]:
+        """Get (reserve0, reserve1, timestamp, token0 as int) for many pairs in one multicall"""
+        pairs = [_checksum(pair) for pair in pair_addresses]
+        unique = list(dict.fromkeys(pairs))
+        need_token0 = [pair for pair in unique if pair not in self._token0_cache]
         
         try:
-            pair_address = await self.factory_contract.functions.getPair(token_a, token_b).call()
-            
-            if pair_address == "0x0000000000000000000000000000000000000000":
-                return None
-            
-            # Cache the result
-            self._pair_cache[cache_key] = pair_address
-            self._pair_cache[f"{token_b}-{token_a}"] = pair_address  # Reverse order
-            
-            return pair_address
-            
+            results = await self._aggregate(
+                [(pair, _SELECTOR_GET_RESERVES) for pair in unique] +
+                [(pair, _SELECTOR_TOKEN0) for pair in need_token0]
+            )
         except Exception as e:
-            logger.error(f"Error getting pair address for {token_a}/{token_b}: {e}")
-            return None
+            logger.error(f"Error getting state for {len(unique)} pairs: {e}")
+            return [None] * len(pairs)
+        
+        learned = False
+        for pair, data in zip(need_token0, results[len(unique):]):
+            if data is not None:
+                self._token0_cache[pair] = _checksum(abi_decode(_ADDRESS_OUT, data)[0])
+                learned = True
+        
+        if learned:
+            self._cache_dirty = True
+        
+        states = {}
+        for pair, data in zip(unique, results[:len(unique)]):
+            token0 = self._token0_cache.get(pair)
+            if data is not None and token0 is not None:
+                states[pair] = (*abi_decode(_GET_RESERVES_OUT, data), _a2i(token0))
+        
+        return [states.get(pair) for pair in pairs]
     
     async def get_pair_reserves(self, pair_address: str) -> Optional[Tuple[int, int, int]]:
         """Get pair reserves (reserve0, reserve1, timestamp)"""
-        pair_address = Web3.to_checksum_address(pair_address)
-        
+        pair_address = _checksum(pair_address)
+        state = await self._single_flight(
+            ('getReserves', pair_address),
+            lambda: self._first(self.get_pairs_state([pair_address]))
+        )
+        return state[:3] if state else None
+    
+    @staticmethod
+    def _ratio_from_state(state: Tuple[int, int, int, int], token: int) -> Optional[Tuple[int, int]]:
+        """Exact price of token (as int) in the other pair token, as (numerator, denominator)"""
+        reserve0, reserve1, _, token0 = state
+        ratio = (reserve1, reserve0) if token0 == token else (reserve0, reserve1)
+        return ratio if ratio[1] > 0 else None
+    
+    @classmethod
+    def _price_from_state(cls, state: Tuple[int, int, int, int], token: int) -> float:
+        """Price of token (as int) in the other pair token"""
+        ratio = cls._ratio_from_state(state, token)
+        # int / int rounds once, unlike dividing two already-rounded floats
+        return ratio[0] / ratio[1] if ratio else 0
+    
+    async def get_token_price(self, token_address: str, base_token: str = CONFIG.WETH_ADDRESS) -> Optional[float]:
+        """Get token price in base token (ETH by default)"""
+        return (await self.get_token_prices([token_address], base_token))[0]
+    
+    async def _token_pair_states(self, tokens: List[str],
+                                 base_token: str) -> List[Optional[Tuple[int, int, int, int]]]:
+        """Pair state of each token against base token, with at most two multicalls"""
+        pairs = await self.get_pair_addresses(tokens, base_token)
+        found = [pair for pair in pairs if pair]
+        states = dict(zip(found, await self.get_pairs_state(found)))
+        return [states.get(pair) if pair else None for pair in pairs]
+    
+    async def get_token_prices(self, token_addresses: List[str],
+                               base_token: str = CONFIG.WETH_ADDRESS) -> List[Optional[float]]:
+        """Get many token prices in base token with at most two multicalls"""
         try:
-            pair_contract = self.async_w3.eth.contract(
-                address=pair_address,
-                abi=PAIR_ABI
-            )
-            
-            reserves = await pair_contract.functions.getReserves().call()
-            return reserves
+            tokens = [_checksum(token) for token in token_addresses]
+            states = await self._token_pair_states(tokens, base_token)
+            return [
+                self._price_from_state(state, _a2i(token)) if state else None
+                for token, state in zip(tokens, states)
+            ]
             
         except Exception as e:
-            logger.error(f"Error getting reserves for pair {pair_address}: {e}")
-            return None
+            logger.error(f"Error getting prices for {len(token_addresses)} tokens: {e}")
+            return [None] * len(token_addresses)
     
-    async def get_token_price(self, token_address: str, base_token: str = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE") -> Optional[float]:
-        """Get token price in base token (ETH by default)"""
+    async def get_token_price_ratio(self, token_address: str,
+                                    base_token: str = CONFIG.WETH_ADDRESS) -> Optional[Tuple[int, int]]:
+        """Get token price in base token as an exact (numerator, denominator) reserve ratio"""
+        return (await self.get_token_price_ratios([token_address], base_token))[0]
+    
+    async def get_token_price_ratios(self, token_addresses: List[str],
+                                     base_token: str = CONFIG.WETH_ADDRESS) -> List[Optional[Tuple[int, int]]]:
+        """Get many exact price ratios in base token with at most two multicalls"""
         try:
-            pair_address = await self.get_pair_address(token_address, base_token)
-            if not pair_address:
-                return None
-            
-            reserves = await self.get_pair_reserves(pair_address)
-            if not reserves:
-                return None
-            
-            reserve0, reserve1, _ = reserves
-            
-            # Get token order
-            pair_contract = self.async_w3.eth.contract(
-                address=pair_address,
-                abi=PAIR_ABI
-            )
-            
-            token0 = await pair_contract.functions.token0().call()
-            
-            # Calculate price
-            if Web3.to_checksum_address(token0) == Web3.to_checksum_address(token_address):
-                price = float(reserve1) / float(reserve0) if reserve0 > 0 else 0
-            else:
-                price = float(reserve0) / float(reserve1) if reserve1 > 0 else 0
-            
-            return price
+            tokens = [_checksum(token) for token in token_addresses]
+            states = await self._token_pair_states(tokens, base_token)
+            return [
+                self._ratio_from_state(state, _a2i(token)) if state else None
+                for token, state in zip(tokens, states)
+            ]
             
         except Exception as e:
-            logger.error(f"Error getting price for {token_address}: {e}")
-            return None
+            logger.error(f"Error getting price ratios for {len(token_addresses)} tokens: {e}")
+            return [None] * len(token_addresses)
+    
+    async def _raw_call(self, to: str, data: bytes) -> bytes:
+        """eth_call with pre-encoded calldata, bypassing the ContractFunction wrappers"""
+        return await self.async_w3.eth.call({'to': to, 'data': '0x' + data.hex()})
+    
+    async def get_gas_price(self) -> int:
+        """Current gas price, refreshed at most every _GAS_PRICE_TTL seconds"""
+        now = time.monotonic()
+        if self._gas_price_cache is not None and now - self._gas_price_cache[1] < _GAS_PRICE_TTL:
+            return self._gas_price_cache[0]
+        
+        gas_price = await self.async_w3.eth.gas_price
+        self._gas_price_cache = (gas_price, now)
+        return gas_price
     
     async def get_amounts_out(self, amount_in: int, path: List[str]) -> Optional[List[int]]:
         """Get output amounts for a given input amount and path"""
         try:
-            amounts = await self.router_contract.functions.getAmountsOut(amount_in, path).call()
-            return amounts
+            data = _SELECTOR_GET_AMOUNTS_OUT + abi_encode(_GET_AMOUNTS_OUT_IN, [amount_in, path])
+            result = await self._raw_call(self.router_contract.address, data)
+            return list(abi_decode(_AMOUNTS_OUT, result)[0])
         except Exception as e:
             logger.error(f"Error getting amounts out: {e}")
             return None
     
+    async def get_amounts_out_many(self, amount_in: int, paths: List[List[str]]) -> List[Optional[List[int]]]:
+        """Get output amounts for many paths in one multicall"""
+        try:
+            results = await self._aggregate([
+                (self.router_contract.address,
+                 _SELECTOR_GET_AMOUNTS_OUT + abi_encode(_GET_AMOUNTS_OUT_IN, [amount_in, path]))
+                for path in paths
+            ])
+            return [list(abi_decode(_AMOUNTS_OUT, data)[0]) if data is not None else None for data in results]
+        except Exception as e:
+            logger.error(f"Error getting amounts out for {len(paths)} paths: {e}")
+            return [None] * len(paths)
+    
+    @staticmethod
+    def _amount_out(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+        """UniswapV2Library.getAmountOut on Python ints (uint112 reserves overflow int64)"""
+        amount_in_with_fee = amount_in * _FEE_NUMERATOR
+        return amount_in_with_fee * reserve_out // (reserve_in * _FEE_DENOMINATOR + amount_in_with_fee)
+    
+    async def quote_amounts_out_many(self, amount_in: int, paths: List[List[str]]) -> List[Optional[List[int]]]:
+        """Router-equivalent output amounts for many paths, computed locally from one reserves multicall"""
+        try:
+            paths = [[_checksum(token) for token in path] for path in paths]
+            hops = list(dict.fromkeys(hop for path in paths for hop in zip(path, path[1:])))
+            
+            # Pair addresses are cached; only the reserves go over the wire
+            pairs = dict(zip(hops, await asyncio.gather(*(self.get_pair_address(a, b) for a, b in hops))))
+            found = list(dict.fromkeys(pair for pair in pairs.values() if pair))
+            states = dict(zip(found, await self.get_pairs_state(found)))
+        except Exception as e:
+            logger.error(f"Error quoting amounts out for {len(paths)} paths: {e}")
+            return [None] * len(paths)
+        
+        quotes: List[Optional[List[int]]] = []
+        for path in paths:
+            amounts: Optional[List[int]] = [amount_in] if len(path) > 1 else None
+            for token_in, token_out in zip(path, path[1:]):
+                state = states.get(pairs[(token_in, token_out)])
+                if state is None:
+                    amounts = None
+                    break
+                reserve0, reserve1, _, token0 = state
+                reserve_in, reserve_out = (reserve0, reserve1) if token0 == _a2i(token_in) else (reserve1, reserve0)
+                if not reserve_in or not reserve_out:
+                    amounts = None
+                    break
+                amounts.append(self._amount_out(amounts[-1], reserve_in, reserve_out))
+            quotes.append(amounts)
+        return quotes
+    
+    def _swap_transaction(self, amount_in: int, amount_out_min: int, path: List[str],
+                          to_address: str, deadline: int, gas_price: int) -> Dict[str, Any]:
+        """Assemble a swapExactETHForTokens transaction from pre-encoded calldata"""
+        to_address = _checksum(to_address)
+        data = _SELECTOR_SWAP_EXACT_ETH_FOR_TOKENS + abi_encode(
+            _SWAP_IN, [amount_out_min, path, to_address, deadline]
+        )
+        return {
+            'from': to_address,
+            'to': self.router_contract.address,
+            'value': amount_in,
+            'gas': CONFIG.DEFAULT_GAS_LIMIT,
+            'gasPrice': gas_price,
+            'chainId': CONFIG.CHAIN_ID,
+            'data': '0x' + data.hex()
+        }
+    
     async def estimate_swap_gas(self, amount_in: int, path: List[str], to_address: str) -> Optional[int]:
         """Estimate gas for swap transaction"""
         try:
             # Build transaction
-            deadline = int((datetime.now(timezone.utc).timestamp() + 300))  # 5 minutes
+            deadline = int(time.time()) + 300  # 5 minutes
+            to_address = _checksum(to_address)
             
-            tx_data = self.router_contract.functions.swapExactETHForTokens(
+            gas_price, nonce = await self._batch_preflight(to_address)
+            tx_data = self._swap_transaction(
+                amount_in,
                 0,  # amountOutMin, will be calculated later
                 path,
-                Web3.to_checksum_address(to_address),
-                deadline
-            ).build_transaction({
-                'from': Web3.to_checksum_address(to_address),
-                'value': amount_in,
-                'gas': Config.DEFAULT_GAS_LIMIT,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': await self.async_w3.eth.get_transaction_count(to_address)
-            })
+                to_address,
+                deadline,
+                gas_price
+            )
+            tx_data['nonce'] = nonce
             
             # Estimate gas
             gas_estimate = await self.async_w3.eth.estimate_gas(tx_data)
@@ -190,32 +554,32 @@ class KumbayaDEX:
             logger.error(f"Error estimating swap gas: {e}")
             return None
     
-    def build_swap_transaction(self, amount_in: int, amount_out_min: int, path: List[str], 
+    async def build_swap_transaction(self, amount_in: int, amount_out_min: int, path: List[str], 
                               to_address: str, deadline: Optional[int] = None) -> Dict[str, Any]:
         """Build swap transaction for user to sign"""
         if deadline is None:
-            deadline = int((datetime.now(timezone.utc).timestamp() + 300))  # 5 minutes
+            deadline = int(time.time()) + 300  # 5 minutes
         
         try:
-            tx_data = self.router_contract.functions.swapExactETHForTokens(
+            return self._swap_transaction(
+                amount_in,
                 amount_out_min,
                 path,
-                Web3.to_checksum_address(to_address),
-                deadline
-            ).build_transaction({
-                'from': Web3.to_checksum_address(to_address),
-                'value': amount_in,
-                'gas': Config.DEFAULT_GAS_LIMIT,
-                'gasPrice': int(self.w3.eth.gas_price * Config.GAS_MULTIPLIER),
-                'chainId': Config.CHAIN_ID
-            })
-            
-            return tx_data
+                to_address,
+                deadline,
+                int(await self.get_gas_price() * CONFIG.GAS_MULTIPLIER)
+            )
             
         except Exception as e:
             logger.error(f"Error building swap transaction: {e}")
             return {}
     
+    @staticmethod
+    def _min_out(expected_out: int, slippage_bps: int) -> int:
+        """Apply slippage to a wei amount without going through floats"""
+        slippage_bps = min(max(slippage_bps, 0), _BPS)
+        return expected_out * (_BPS - slippage_bps) // _BPS
+    
     async def calculate_slippage(self, amount_in: int, path: List[str], slippage_percent: float) -> int:
         """Calculate minimum output amount based on slippage"""
         try:
@@ -223,47 +587,44 @@ class KumbayaDEX:
             if not amounts:
                 return 0
             
-            expected_out = amounts[-1]
-            slippage_multiplier = (100 - slippage_percent) / 100
-            min_out = int(expected_out * slippage_multiplier)
-            
-            return min_out
+            return self._min_out(amounts[-1], round(slippage_percent * 100))
             
         except Exception as e:
             logger.error(f"Error calculating slippage: {e}")
             return 0
     
+    async def calculate_slippages(self, amount_in: int, paths: List[List[str]], slippage_bps: int) -> List[int]:
+        """Minimum output amounts for many paths, quoted locally from one reserves multicall"""
+        return [
+            self._min_out(amounts[-1], slippage_bps) if amounts else 0
+            for amounts in await self.quote_amounts_out_many(amount_in, paths)
+        ]
+    
+    @staticmethod
+    def _eth_reserve(state: Tuple[int, int, int, int], token: int) -> int:
+        """Reserve on the ETH side of a token/ETH pair"""
+        reserve0, reserve1, _, token0 = state
+        return reserve1 if token0 == token else reserve0
+    
     async def check_liquidity(self, token_address: str, min_liquidity_eth: float = 1.0) -> bool:
         """Check if token has sufficient liquidity"""
         try:
-            price = await self.get_token_price(token_address)
-            if not price:
-                return False
-            
+            token_address = _checksum(token_address)
             pair_address = await self.get_pair_address(token_address)
             if not pair_address:
                 return False
             
-            reserves = await self.get_pair_reserves(pair_address)
-            if not reserves:
+            # Reserves and token order in one round-trip
+            state = (await self.get_pairs_state([pair_address]))[0]
+            if not state:
                 return False
             
-            reserve0, reserve1, _ = reserves
-            
-            # Get token order
-            pair_contract = self.async_w3.eth.contract(
-                address=pair_address,
-                abi=PAIR_ABI
-            )
-            
-            token0 = await pair_contract.functions.token0().call()
+            token = _a2i(token_address)
+            if not self._price_from_state(state, token):
+                return False
             
             # Calculate ETH liquidity
-            if Web3.to_checksum_address(token0) == Web3.to_checksum_address(token_address):
-                eth_liquidity = self.w3.from_wei(reserve1, 'ether')
-            else:
-                eth_liquidity = self.w3.from_wei(reserve0, 'ether')
-            
+            eth_liquidity = self.w3.from_wei(self._eth_reserve(state, token), 'ether')
             return eth_liquidity >= min_liquidity_eth
             
         except Exception as e:
@@ -276,40 +637,69 @@ class KumbayaDEX:
         # In production, you'd use websocket events for real-time monitoring
         return []
     
+    async def _gather_honeypot_data(self, token_address: str) -> Optional[Dict[str, Any]]:
+        """Fetch pair state and a buy/sell-back quote for a token in one multicall"""
+        token_address = _checksum(token_address)
+        weth = _checksum(CONFIG.WETH_ADDRESS)
+        pair_address = await self.get_pair_address(token_address, weth)
+        if not pair_address:
+            return None
+        
+        # A WETH -> token -> WETH path quotes the buy and selling its output back in one call
+        buy_amount = self.w3.to_wei(0.01, 'ether')
+        calls = [
+            (pair_address, _SELECTOR_GET_RESERVES),
+            (self.router_contract.address,
+             _SELECTOR_GET_AMOUNTS_OUT + abi_encode(_GET_AMOUNTS_OUT_IN, [buy_amount, [weth, token_address, weth]]))
+        ]
+        need_token0 = pair_address not in self._token0_cache
+        if need_token0:
+            calls.append((pair_address, _SELECTOR_TOKEN0))
+        
+        results = await self._aggregate(calls)
+        
+        if need_token0 and results[2] is not None:
+            self._token0_cache[pair_address] = _checksum(abi_decode(_ADDRESS_OUT, results[2])[0])
+            self._cache_dirty = True
+        
+        token0 = self._token0_cache.get(pair_address)
+        state = None
+        if results[0] is not None and token0 is not None:
+            state = (*abi_decode(_GET_RESERVES_OUT, results[0]), _a2i(token0))
+        
+        return {
+            "token_address": token_address,
+            "pair_address": pair_address,
+            "state": state,
+            "buy_amount": buy_amount,
+            "amounts": list(abi_decode(_AMOUNTS_OUT, results[1])[0]) if results[1] is not None else None
+        }
+    
     async def simulate_honeypot(self, token_address: str) -> Dict[str, Any]:
         """Basic honeypot simulation"""
         try:
+            data = await self._gather_honeypot_data(token_address)
+            
             # Check if we can get a price
-            price = await self.get_token_price(token_address)
+            state = data["state"] if data else None
+            token = _a2i(data["token_address"]) if data else 0
+            price = self._price_from_state(state, token) if state else None
             if not price:
                 return {"is_honeypot": True, "reason": "No price available"}
             
             # Check liquidity
-            has_liquidity = await self.check_liquidity(token_address, 0.1)
-            if not has_liquidity:
+            eth_liquidity = self.w3.from_wei(self._eth_reserve(state, token), 'ether')
+            if eth_liquidity < 0.1:
                 return {"is_honeypot": True, "reason": "Insufficient liquidity"}
             
             # Check buy/sell tax (simplified - would need more sophisticated analysis)
             # This is a basic check - real honeypot detection is more complex
-            buy_amount = self.w3.to_wei(0.01, 'ether')
-            
-            pair_address = await self.get_pair_address(token_address)
-            if not pair_address:
-                return {"is_honeypot": True, "reason": "No pair exists"}
-            
-            # Simulate buy
-            amounts_out = await self.get_amounts_out([buy_amount], [Config.WETH_ADDRESS, token_address])
-            if not amounts_out:
+            amounts = data["amounts"]
+            if not amounts or not amounts[1]:
                 return {"is_honeypot": True, "reason": "Cannot simulate buy"}
             
-            tokens_received = amounts_out[-1]
-            
-            # Simulate sell back
-            amounts_back = await self.get_amounts_out(tokens_received, [token_address, Config.WETH_ADDRESS])
-            if not amounts_back:
-                return {"is_honeypot": True, "reason": "Cannot simulate sell"}
-            
-            eth_received = amounts_back[-1]
+            buy_amount = data["buy_amount"]
+            eth_received = amounts[-1]
             loss_percentage = ((buy_amount - eth_received) / buy_amount) * 100
             
             # If loss > 10%, likely a honeypot
@@ -320,7 +710,7 @@ class KumbayaDEX:
                 "reason": f"{'High tax detected' if is_honeypot else 'Normal behavior'}",
                 "loss_percentage": loss_percentage,
                 "price": price,
-                "liquidity_eth": await self.get_pair_liquidity(pair_address)
+                "liquidity_eth": eth_liquidity
             }
             
         except Exception as e:
@@ -330,22 +720,14 @@ class KumbayaDEX:
     async def get_pair_liquidity(self, pair_address: str) -> float:
         """Get total liquidity in ETH for a pair"""
         try:
-            reserves = await self.get_pair_reserves(pair_address)
-            if not reserves:
+            state = (await self.get_pairs_state([pair_address]))[0]
+            if not state:
                 return 0
             
-            reserve0, reserve1, _ = reserves
-            
-            # Get token order
-            pair_contract = self.async_w3.eth.contract(
-                address=pair_address,
-                abi=PAIR_ABI
-            )
-            
-            token0 = await pair_contract.functions.token0().call()
+            reserve0, reserve1, _, token0 = state
             
             # Calculate total liquidity (simplified)
-            if token0 == Config.WETH_ADDRESS:
+            if token0 == self._weth_int:
                 eth_liquidity = self.w3.from_wei(reserve0, 'ether')
             else:
                 eth_liquidity = self.w3.from_wei(reserve1, 'ether')
@@ -356,8 +738,27 @@ class KumbayaDEX:
             logger.error(f"Error getting pair liquidity: {e}")
             return 0
     
+    async def close(self) -> None:
+        """Flush pending cache entries and close the JSON-RPC HTTP session if this instance created it"""
+        if self._cache_flush_task:
+            self._cache_flush_task.cancel()
+            try:
+                await self._cache_flush_task
+            except asyncio.CancelledError:
+                pass
+            self._cache_flush_task = None
+        
+        if self._cache_dirty:
+            await self._persist_cache()
+        
+        if self._http_session is not None and self._owns_http_session:
+            await self._http_session.close()
+        self._http_session = None
+    
     def clear_cache(self):
         """Clear internal caches"""
         self._pair_cache.clear()
+        self._missing_pairs.clear()
+        self._token0_cache.clear()
         self._token_info_cache.clear()
         logger.info("Kumbaya DEX cache cleared")
@@ -4,19 +4,53 @@ Scans and executes arbitrage opportunities across multiple DEXes on MegaETH
 """
 
 import asyncio
+import heapq
+import itertools
 import logging
-from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from collections import deque
+from typing import Awaitable, Dict, List, Optional, Tuple, Any
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from fractions import Fraction
 import time
 
-from config import Config
+import numpy as np
+
+# Optional websocket client for Sync event subscriptions
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from config import CONFIG
+from utils.rpc import dumps_rpc, loads_rpc
 from .kumbaya import KumbayaDEX
 from .prismfi import PrismFiDEX
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Upper bound on concurrent per-token RPCs, kept well under the RPC pool size
+_MAX_CONCURRENT_TOKEN_CALLS = 32
+
+# MIN_PROFIT_THRESHOLD as an exact fraction, for comparing integer price ratios
+_PROFIT_THRESHOLD = Fraction(str(CONFIG.MIN_PROFIT_THRESHOLD))
+
+# keccak256("Sync(uint112,uint112)"), emitted by a pair whenever its reserves change
+_SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+# Quote token the DEX price lookups default to
+_QUOTE_TOKEN = CONFIG.WETH_ADDRESS
+
+# DEX liveness answers are reused for this long
+_AVAILABILITY_TTL = 5.0
+
+# Swap gas depends on the route, not the moment; estimates are reused this long
+_GAS_ESTIMATE_TTL = 60.0
+
+# How long the Sync listener idles before retrying when no pair can be watched
+_PAIR_REFRESH_INTERVAL = 60.0
+
+@dataclass(slots=True, frozen=True)
 class ArbitrageOpportunity:
     """Arbitrage opportunity data structure"""
     token_address: str
@@ -29,7 +63,12 @@ class ArbitrageOpportunity:
     gas_estimate: float
     net_profit: float
     is_executable: bool
-    discovered_at: datetime
+    discovered_at_ns: int = field(default_factory=time.time_ns)
+    
+    @property
+    def discovered_at(self) -> datetime:
+        """Discovery time as an aware UTC datetime"""
+        return datetime.fromtimestamp(self.discovered_at_ns / 1e9, timezone.utc)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for database storage"""
@@ -50,9 +89,10 @@ class ArbitrageOpportunity:
 class MultiDEXScanner:
     """Multi-DEX arbitrage scanner and executor"""
     
-    def __init__(self, kumbaya: KumbayaDEX, prismfi: PrismFiDEX):
+    def __init__(self, kumbaya: KumbayaDEX, prismfi: PrismFiDEX, database=None):
         self.kumbaya = kumbaya
         self.prismfi = prismfi
+        self.database = database
         
         # Available DEXes
         self.dexes = {
@@ -67,13 +107,35 @@ class MultiDEXScanner:
         ]
         
         # Recent opportunities cache
-        self.recent_opportunities: List[ArbitrageOpportunity] = []
         self.max_cache_size = 100
+        self.recent_opportunities: deque[ArbitrageOpportunity] = deque(maxlen=self.max_cache_size)
+        
+        # Max-heap of (-net_profit, seq, opportunity); entries older than the deque are stale
+        self._best_heap: List[Tuple[float, int, ArbitrageOpportunity]] = []
+        self._opportunity_seq = 0
         
         # Scanning state
         self.is_scanning = False
         self.scan_task: Optional[asyncio.Task] = None
         
+        # Bounds per-token fan-out across concurrent pair scans
+        self._token_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_TOKEN_CALLS)
+        
+        # Last (is_available, monotonic timestamp) per DEX name
+        self._availability: Dict[str, Tuple[bool, float]] = {}
+        
+        # (dex name, path) -> (swap gas estimate, monotonic timestamp)
+        self._gas_estimate_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[int, float]] = {}
+        
+        # Sync-driven rescans: watched pair (lowercase) -> token, and tokens touched since the last scan
+        self._pair_tokens: Dict[str, str] = {}
+        self._watched_tokens: set[str] = set()
+        self._dirty_tokens: set[str] = set()
+        self._sync_connected = False
+        self._sync_ws = None
+        self._pairs_changed = asyncio.Event()
+        self.sync_task: Optional[asyncio.Task] = None
+        
     async def start_scanning(self) -> None:
         """Start continuous arbitrage scanning"""
         if self.is_scanning:
@@ -82,178 +144,352 @@ class MultiDEXScanner:
         
         self.is_scanning = True
         self.scan_task = asyncio.create_task(self._scan_loop())
+        if websockets is not None:
+            self.sync_task = asyncio.create_task(self._sync_listener())
+        else:
+            logger.warning("websockets not installed, polling every monitored token")
         logger.info("Started arbitrage scanning")
     
     async def stop_scanning(self) -> None:
         """Stop continuous arbitrage scanning"""
         self.is_scanning = False
-        if self.scan_task:
-            self.scan_task.cancel()
+        for task in (self.scan_task, self.sync_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        logger.info("Stopped arbitrage scanning")
+    
+    def _tokens_to_scan(self) -> List[str]:
+        """Monitored tokens whose prices may have moved since the last scan"""
+        dirty, self._dirty_tokens = self._dirty_tokens, set()
+        if not self._sync_connected:
+            return list(self.monitor_tokens)
+        return [t for t in self.monitor_tokens if t in dirty or t not in self._watched_tokens]
+    
+    async def _refresh_watched_pairs(self) -> None:
+        """Map monitored tokens to their pairs, watching only tokens covered on every DEX"""
+        tokens = list(self.monitor_tokens)
+        pair_tokens: Dict[str, str] = {}
+        covered = set(tokens)
+        
+        for name, dex in self.dexes.items():
+            if not await self._is_available(name):
+                continue
+            if not hasattr(dex, 'get_pair_addresses'):
+                # Quotes we can't tie to a pair must be polled
+                covered.clear()
+                break
+            
+            pairs = await dex.get_pair_addresses(tokens, _QUOTE_TOKEN)
+            for token, pair in zip(tokens, pairs):
+                if pair:
+                    pair_tokens[pair.lower()] = token
+                else:
+                    covered.discard(token)
+        
+        self._watched_tokens = covered
+        self._pair_tokens = {pair: token for pair, token in pair_tokens.items() if token in covered}
+    
+    async def _resubscribe(self) -> None:
+        """Make the Sync listener pick up a changed set of monitored tokens"""
+        self._pairs_changed.set()
+        if self._sync_ws is not None:
+            await self._sync_ws.close()
+    
+    async def _sync_listener(self) -> None:
+        """Mark tokens dirty whenever one of their pairs emits Sync"""
+        while self.is_scanning:
             try:
-                await self.scan_task
+                self._pairs_changed.clear()
+                await self._refresh_watched_pairs()
+                if not self._pair_tokens:
+                    # Nothing to subscribe to; the scan loop polls every token meanwhile
+                    try:
+                        await asyncio.wait_for(self._pairs_changed.wait(), _PAIR_REFRESH_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                async with websockets.connect(CONFIG.MEGAETH_WS, open_timeout=CONFIG.WEBSOCKET_TIMEOUT) as ws:
+                    self._sync_ws = ws
+                    await ws.send(dumps_rpc({
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["logs", {"address": list(self._pair_tokens), "topics": [_SYNC_TOPIC]}]
+                    }))
+                    reply = loads_rpc(await ws.recv())
+                    if 'result' not in reply:
+                        raise RuntimeError(f"eth_subscribe failed: {reply.get('error')}")
+                    
+                    # Reserves may have moved while we were unsubscribed
+                    self._sync_connected = True
+                    self._dirty_tokens.update(self._watched_tokens)
+                    logger.info(f"Watching {len(self._pair_tokens)} pairs for Sync events")
+                    
+                    async for message in ws:
+                        log = loads_rpc(message).get('params', {}).get('result', {})
+                        token = self._pair_tokens.get(log.get('address', '').lower())
+                        if token is not None:
+                            self._dirty_tokens.add(token)
+                
             except asyncio.CancelledError:
-                pass
-        logger.info("Stopped arbitrage scanning")
+                break
+            except Exception as e:
+                logger.error(f"Error in Sync event listener: {e}")
+                await asyncio.sleep(CONFIG.SCAN_INTERVAL)
+            finally:
+                self._sync_connected = False
+                self._sync_ws = None
     
     async def _scan_loop(self) -> None:
         """Main scanning loop"""
         while self.is_scanning:
             try:
-                opportunities = await self.scan_arbitrage_opportunities()
+                # Only re-price tokens whose pairs synced, plus any not covered by the subscription
+                tokens = self._tokens_to_scan()
+                opportunities = await self.scan_arbitrage_opportunities(tokens) if tokens else []
                 
                 # Filter profitable opportunities
                 profitable_opps = [
                     opp for opp in opportunities 
-                    if opp.profit_percentage > Config.MIN_PROFIT_THRESHOLD and opp.is_executable
+                    if opp.profit_percentage > CONFIG.MIN_PROFIT_THRESHOLD and opp.is_executable
                 ]
                 
                 if profitable_opps:
                     logger.info(f"Found {len(profitable_opps)} profitable arbitrage opportunities")
                     
                     # Add to cache
-                    self.recent_opportunities.extend(profitable_opps)
+                    self._add_recent_opportunities(profitable_opps)
                     
-                    # Limit cache size
-                    if len(self.recent_opportunities) > self.max_cache_size:
-                        self.recent_opportunities = self.recent_opportunities[-self.max_cache_size:]
+                    # Persist the whole scan in one bulk insert
+                    if self.database is not None:
+                        await self.database.save_arbitrage_opportunities(profitable_opps)
                 
-                await asyncio.sleep(Config.SCAN_INTERVAL)
+                await asyncio.sleep(CONFIG.SCAN_INTERVAL)
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in arbitrage scan loop: {e}")
-                await asyncio.sleep(Config.SCAN_INTERVAL)
+                await asyncio.sleep(CONFIG.SCAN_INTERVAL)
     
-    async def scan_arbitrage_opportunities(self) -> List[ArbitrageOpportunity]:
+    async def _is_available(self, name: str) -> bool:
+        """DEX liveness, memoized for _AVAILABILITY_TTL seconds"""
+        dex = self.dexes[name]
+        if not hasattr(dex, 'is_available'):
+            return True
+        
+        now = time.monotonic()
+        cached = self._availability.get(name)
+        if cached is not None and now - cached[1] < _AVAILABILITY_TTL:
+            return cached[0]
+        
+        available = bool(await dex.is_available())
+        self._availability[name] = (available, now)
+        return available
+    
+    async def scan_arbitrage_opportunities(self, tokens: Optional[List[str]] = None) -> List[ArbitrageOpportunity]:
         """Scan for arbitrage opportunities across all DEX pairs"""
-        opportunities = []
+        # Check each DEX once, concurrently, rather than per DEX combination
+        dex_names = list(self.dexes.keys())
+        flags = await asyncio.gather(*(self._is_available(name) for name in dex_names))
+        available = [name for name, ok in zip(dex_names, flags) if ok]
         
         # Get all DEX combinations
-        dex_names = list(self.dexes.keys())
-        for i in range(len(dex_names)):
-            for j in range(i + 1, len(dex_names)):
-                dex_a_name = dex_names[i]
-                dex_b_name = dex_names[j]
-                dex_a = self.dexes[dex_a_name]
-                dex_b = self.dexes[dex_b_name]
-                
-                # Check if both DEXes are available
-                if (not hasattr(dex_a, 'is_available') or await dex_a.is_available()) and \
-                   (not hasattr(dex_b, 'is_available') or await dex_b.is_available()):
-                    
-                    # Scan tokens for arbitrage between these DEXes
-                    opps = await self._scan_dex_pair(dex_a, dex_b, dex_a_name, dex_b_name)
-                    opportunities.extend(opps)
+        scans = [
+            self._scan_dex_pair(self.dexes[dex_a_name], self.dexes[dex_b_name], dex_a_name, dex_b_name, tokens)
+            for dex_a_name, dex_b_name in itertools.combinations(available, 2)
+        ]
         
+        # Scan every DEX pair concurrently
+        opportunities = []
+        for opps in await asyncio.gather(*scans):
+            opportunities.extend(opps)
         return opportunities
     
-    async def _scan_dex_pair(self, dex_a, dex_b, dex_a_name: str, dex_b_name: str) -> List[ArbitrageOpportunity]:
+    async def _scan_dex_pair(self, dex_a, dex_b, dex_a_name: str, dex_b_name: str,
+                             tokens: Optional[List[str]] = None) -> List[ArbitrageOpportunity]:
         """Scan for arbitrage opportunities between two specific DEXes"""
         opportunities = []
+        tokens = list(self.monitor_tokens if tokens is None else tokens)
+        if not tokens:
+            return opportunities
         
-        # For each token, compare prices
-        for token_address in self.monitor_tokens:
-            try:
-                # Get prices from both DEXes
-                price_a_task = dex_a.get_token_price(token_address)
-                price_b_task = dex_b.get_token_price(token_address)
-                
-                price_a, price_b = await asyncio.gather(
-                    price_a_task, price_b_task, return_exceptions=True
-                )
-                
-                # Skip if either price is not available
-                if isinstance(price_a, Exception) or isinstance(price_b, Exception):
-                    continue
-                
-                if price_a is None or price_b is None:
-                    continue
-                
-                # Calculate price difference
-                if price_a > 0 and price_b > 0:
-                    price_diff_pct = abs(price_a - price_b) / min(price_a, price_b) * 100
-                    
-                    if price_diff_pct > Config.MIN_PROFIT_THRESHOLD:
-                        # Determine direction of arbitrage
-                        if price_a < price_b:
-                            # Buy on DEX A, sell on DEX B
-                            buy_dex, sell_dex = dex_a_name, dex_b_name
-                            buy_price, sell_price = price_a, price_b
-                        else:
-                            # Buy on DEX B, sell on DEX A
-                            buy_dex, sell_dex = dex_b_name, dex_a_name
-                            buy_price, sell_price = price_b, price_a
-                        
-                        # Estimate gas costs
-                        gas_estimate = await self._estimate_arbitrage_gas(token_address, buy_dex, sell_dex)
-                        
-                        # Calculate net profit
-                        trade_amount = 0.1  # 0.1 ETH for estimation
-                        gross_profit = (sell_price - buy_price) * trade_amount
-                        gas_cost_eth = gas_estimate * self._get_gas_price() / 1e18
-                        net_profit = gross_profit - gas_cost_eth
-                        
-                        # Check if profitable after gas
-                        is_executable = net_profit > 0.001  # Minimum 0.001 ETH profit
-                        
-                        # Get token info
-                        token_info = await dex_a.get_token_info(token_address)
-                        token_symbol = token_info['symbol'] if token_info else "UNKNOWN"
-                        
-                        opportunity = ArbitrageOpportunity(
-                            token_address=token_address,
-                            token_symbol=token_symbol,
-                            dex_a=buy_dex,
-                            dex_b=sell_dex,
-                            price_a=buy_price,
-                            price_b=sell_price,
-                            profit_percentage=price_diff_pct,
-                            gas_estimate=gas_estimate,
-                            net_profit=net_profit,
-                            is_executable=is_executable,
-                            discovered_at=datetime.now(timezone.utc)
-                        )
-                        
-                        opportunities.append(opportunity)
-                        
-            except Exception as e:
-                logger.error(f"Error scanning token {token_address} between {dex_a_name} and {dex_b_name}: {e}")
+        if hasattr(dex_a, 'get_token_price_ratios') and hasattr(dex_b, 'get_token_price_ratios'):
+            # Exact reserve ratios from both DEXes, compared as integers
+            ratios_a, ratios_b = await asyncio.gather(
+                dex_a.get_token_price_ratios(tokens),
+                dex_b.get_token_price_ratios(tokens)
+            )
+            prices_a, prices_b, diff_pct, mask = self._compare_ratios(ratios_a, ratios_b)
+        else:
+            # Fetch every token price from both DEXes concurrently
+            prices_a, prices_b = await asyncio.gather(
+                self._fetch_prices(dex_a, tokens),
+                self._fetch_prices(dex_b, tokens)
+            )
+            
+            # Price difference for all tokens at once
+            with np.errstate(divide='ignore', invalid='ignore'):
+                diff_pct = np.abs(prices_a - prices_b) / np.minimum(prices_a, prices_b) * 100
+            mask = (prices_a > 0) & (prices_b > 0) & (diff_pct > CONFIG.MIN_PROFIT_THRESHOLD)
+        idx = np.flatnonzero(mask)
+        if idx.size == 0:
+            return opportunities
+        
+        # Determine direction of arbitrage: buy where cheaper, sell where dearer
+        buy_on_a = prices_a[idx] < prices_b[idx]
+        buy_prices = np.where(buy_on_a, prices_a[idx], prices_b[idx])
+        sell_prices = np.where(buy_on_a, prices_b[idx], prices_a[idx])
+        candidates = [tokens[k] for k in idx]
+        routes = [
+            (dex_a_name, dex_b_name) if a_first else (dex_b_name, dex_a_name)
+            for a_first in buy_on_a
+        ]
+        
+        # Estimate gas and fetch token info only for the candidates
+        if hasattr(dex_a, 'get_token_info_many'):
+            # One batched RPC round-trip for all candidates
+            info_task = dex_a.get_token_info_many(candidates)
+        else:
+            info_task = asyncio.gather(
+                *(self._bounded(dex_a.get_token_info(token)) for token in candidates),
+                return_exceptions=True
+            )
+        gas_estimates, token_infos = await asyncio.gather(
+            asyncio.gather(*(
+                self._bounded(self._estimate_arbitrage_gas(token, buy_dex, sell_dex))
+                for token, (buy_dex, sell_dex) in zip(candidates, routes)
+            )),
+            info_task
+        )
+        
+        # Calculate net profit for all candidates
+        trade_amount = 0.1  # 0.1 ETH for estimation
+        gas = np.array(gas_estimates, dtype=np.float64)
+        gross_profit = (sell_prices - buy_prices) * trade_amount
+        net_profit = gross_profit - gas * await self._get_gas_price() / 1e18
+        
+        # Check if profitable after gas
+        is_executable = net_profit > 0.001  # Minimum 0.001 ETH profit
+        
+        discovered_at_ns = time.time_ns()
+        for n, k in enumerate(idx):
+            token_address = candidates[n]
+            token_info = token_infos[n]
+            if isinstance(token_info, Exception):
+                logger.error(f"Error scanning token {token_address} between {dex_a_name} and {dex_b_name}: {token_info}")
                 continue
+            
+            buy_dex, sell_dex = routes[n]
+            opportunities.append(ArbitrageOpportunity(
+                token_address=token_address,
+                token_symbol=token_info['symbol'] if token_info else "UNKNOWN",
+                dex_a=buy_dex,
+                dex_b=sell_dex,
+                price_a=float(buy_prices[n]),
+                price_b=float(sell_prices[n]),
+                profit_percentage=float(diff_pct[k]),
+                gas_estimate=gas_estimates[n],
+                net_profit=float(net_profit[n]),
+                is_executable=bool(is_executable[n]),
+                discovered_at_ns=discovered_at_ns
+            ))
         
         return opportunities
     
+    @staticmethod
+    def _compare_ratios(ratios_a: List[Optional[Tuple[int, int]]],
+                        ratios_b: List[Optional[Tuple[int, int]]]) -> Tuple[np.ndarray, ...]:
+        """Prices, percent difference and threshold mask from exact (num, den) price ratios"""
+        count = len(ratios_a)
+        prices_a = np.full(count, np.nan)
+        prices_b = np.full(count, np.nan)
+        diff_pct = np.full(count, np.nan)
+        mask = np.zeros(count, dtype=bool)
+        
+        for k, (ratio_a, ratio_b) in enumerate(zip(ratios_a, ratios_b)):
+            if not ratio_a or not ratio_b:
+                continue
+            (num_a, den_a), (num_b, den_b) = ratio_a, ratio_b
+            prices_a[k] = num_a / den_a
+            prices_b[k] = num_b / den_b
+            
+            # Both prices over the common denominator den_a * den_b
+            cross_a, cross_b = num_a * den_b, num_b * den_a
+            low = min(cross_a, cross_b)
+            if low <= 0:
+                continue
+            diff = abs(cross_a - cross_b)
+            diff_pct[k] = diff * 100 / low
+            mask[k] = diff * 100 * _PROFIT_THRESHOLD.denominator > _PROFIT_THRESHOLD.numerator * low
+        
+        return prices_a, prices_b, diff_pct, mask
+    
+    async def _bounded(self, coro: Awaitable[Any]) -> Any:
+        """Await coro while holding a per-token concurrency slot"""
+        async with self._token_semaphore:
+            return await coro
+    
+    async def _fetch_prices(self, dex, tokens: List[str]) -> np.ndarray:
+        """Quote every token on one DEX; unavailable prices become NaN"""
+        if hasattr(dex, 'get_token_prices'):
+            # Batched multicall quotes for every monitored pair
+            quotes = await dex.get_token_prices(tokens)
+        else:
+            quotes = await asyncio.gather(
+                *(self._bounded(dex.get_token_price(token)) for token in tokens),
+                return_exceptions=True
+            )
+        
+        return np.array(
+            [q if isinstance(q, (int, float)) else np.nan for q in quotes],
+            dtype=np.float64
+        )
+    
+    async def _cached_swap_gas(self, dex_name: str, amount_in: int, path: List[str],
+                               from_address: str) -> Optional[int]:
+        """Swap gas estimate for a DEX route, cached for _GAS_ESTIMATE_TTL seconds"""
+        dex = self.dexes[dex_name]
+        if not hasattr(dex, 'estimate_swap_gas'):
+            return None
+        
+        key = (dex_name, tuple(path))
+        now = time.monotonic()
+        cached = self._gas_estimate_cache.get(key)
+        if cached is not None and now - cached[1] < _GAS_ESTIMATE_TTL:
+            return cached[0]
+        
+        gas = await dex.estimate_swap_gas(amount_in, path, from_address)
+        if gas is not None:
+            self._gas_estimate_cache[key] = (gas, now)
+        return gas
+    
     async def _estimate_arbitrage_gas(self, token_address: str, buy_dex: str, sell_dex: str) -> int:
         """Estimate gas for arbitrage execution"""
         try:
-            # Estimate gas for buy transaction
-            buy_dex_obj = self.dexes[buy_dex]
-            sell_dex_obj = self.dexes[sell_dex]
-            
             # Sample address for estimation
             sample_address = "0x1234567890123456789012345678901234567890"
             amount_in = 10000000000000000  # 0.01 ETH
             
             # Path for buy
-            buy_path = [Config.WETH_ADDRESS, token_address]
+            buy_path = [CONFIG.WETH_ADDRESS, token_address]
             
             # Path for sell
-            sell_path = [token_address, Config.WETH_ADDRESS]
-            
-            # Estimate gas for both transactions
-            buy_gas_task = None
-            sell_gas_task = None
-            
-            if hasattr(buy_dex_obj, 'estimate_swap_gas'):
-                buy_gas_task = buy_dex_obj.estimate_swap_gas(amount_in, buy_path, sample_address)
+            sell_path = [token_address, CONFIG.WETH_ADDRESS]
             
-            if hasattr(sell_dex_obj, 'estimate_swap_gas'):
-                # Estimate token amount for sell (simplified)
-                token_amount = 1000000  # Placeholder
-                sell_gas_task = sell_dex_obj.estimate_swap_gas(token_amount, sell_path, sample_address)
+            # Estimate token amount for sell (simplified)
+            token_amount = 1000000  # Placeholder
             
+            # Estimate gas for both transactions concurrently, reusing recent estimates
             gas_estimates = await asyncio.gather(
-                buy_gas_task, sell_gas_task, return_exceptions=True
+                self._cached_swap_gas(buy_dex, amount_in, buy_path, sample_address),
+                self._cached_swap_gas(sell_dex, token_amount, sell_path, sample_address),
+                return_exceptions=True
             )
             
             total_gas = 0
@@ -261,16 +497,16 @@ class MultiDEXScanner:
                 if not isinstance(gas, Exception) and gas is not None:
                     total_gas += gas
             
-            return total_gas or Config.DEFAULT_GAS_LIMIT * 2
+            return total_gas or CONFIG.DEFAULT_GAS_LIMIT * 2
             
         except Exception as e:
             logger.error(f"Error estimating arbitrage gas: {e}")
-            return Config.DEFAULT_GAS_LIMIT * 2
+            return CONFIG.DEFAULT_GAS_LIMIT * 2
     
-    def _get_gas_price(self) -> int:
+    async def _get_gas_price(self) -> int:
         """Get current gas price"""
         try:
-            return self.kumbaya.w3.eth.gas_price
+            return await self.kumbaya.get_gas_price()
         except Exception:
             return int(1e10)  # 10 gwei fallback
     
@@ -290,8 +526,8 @@ class MultiDEXScanner:
             amount_in = int(amount_eth * 1e18)
             
             # Build buy transaction
-            buy_path = [Config.WETH_ADDRESS, opportunity.token_address]
-            buy_tx = buy_dex.build_swap_transaction(
+            buy_path = [CONFIG.WETH_ADDRESS, opportunity.token_address]
+            buy_tx = await buy_dex.build_swap_transaction(
                 amount_in, 0, buy_path, user_address
             )
             
@@ -303,29 +539,46 @@ class MultiDEXScanner:
             # In production, you'd handle the full execution flow
             logger.info(f"Arbitrage transaction prepared for {opportunity.token_symbol}")
             
-            return json.dumps({
+            return dumps_rpc({
                 'buy_transaction': buy_tx,
                 'opportunity': opportunity.to_dict()
-            })
+            }).decode()
             
         except Exception as e:
             logger.error(f"Error executing arbitrage: {e}")
             return None
     
+    def _add_recent_opportunities(self, opportunities: List[ArbitrageOpportunity]) -> None:
+        """Append to the bounded cache and index executable ones by net profit"""
+        for opp in opportunities:
+            self.recent_opportunities.append(opp)
+            if opp.is_executable and opp.net_profit > 0:
+                heapq.heappush(self._best_heap, (-opp.net_profit, self._opportunity_seq, opp))
+            self._opportunity_seq += 1
+        
+        # Drop stale heap entries once they outnumber the live cache
+        if len(self._best_heap) > 2 * self.max_cache_size:
+            oldest = self._opportunity_seq - len(self.recent_opportunities)
+            self._best_heap = [entry for entry in self._best_heap if entry[1] >= oldest]
+            heapq.heapify(self._best_heap)
+    
     async def get_recent_opportunities(self, limit: int = 20) -> List[ArbitrageOpportunity]:
         """Get recent arbitrage opportunities"""
-        return self.recent_opportunities[-limit:]
+        size = len(self.recent_opportunities)
+        return list(itertools.islice(self.recent_opportunities, max(0, size - limit), size))
     
     async def add_monitor_token(self, token_address: str) -> None:
         """Add a token to monitor for arbitrage"""
         if token_address not in self.monitor_tokens:
             self.monitor_tokens.append(token_address)
+            await self._resubscribe()
             logger.info(f"Added token {token_address} to arbitrage monitoring")
     
     async def remove_monitor_token(self, token_address: str) -> None:
         """Remove a token from arbitrage monitoring"""
         if token_address in self.monitor_tokens:
             self.monitor_tokens.remove(token_address)
+            await self._resubscribe()
             logger.info(f"Removed token {token_address} from arbitrage monitoring")
     
     def get_scanning_status(self) -> Dict[str, Any]:
@@ -334,24 +587,22 @@ class MultiDEXScanner:
             'is_scanning': self.is_scanning,
             'monitor_tokens_count': len(self.monitor_tokens),
             'recent_opportunities_count': len(self.recent_opportunities),
-            'available_dexes': [name for name, dex in self.dexes.items() 
-                               if not hasattr(dex, 'is_available') or dex.is_available()]
+            'available_dexes': [name for name, dex in self.dexes.items()
+                               if getattr(dex, 'available', True)]
         }
     
     async def get_best_opportunity(self) -> Optional[ArbitrageOpportunity]:
         """Get the best current arbitrage opportunity"""
-        executable_opps = [
-            opp for opp in self.recent_opportunities 
-            if opp.is_executable and opp.net_profit > 0
-        ]
-        
-        if not executable_opps:
-            return None
+        # Pop entries already evicted from the bounded cache
+        oldest = self._opportunity_seq - len(self.recent_opportunities)
+        while self._best_heap and self._best_heap[0][1] < oldest:
+            heapq.heappop(self._best_heap)
         
         # Return the opportunity with highest net profit
-        return max(executable_opps, key=lambda x: x.net_profit)
+        return self._best_heap[0][2] if self._best_heap else None
     
     def clear_cache(self) -> None:
         """Clear opportunities cache"""
         self.recent_opportunities.clear()
+        self._best_heap.clear()
         logger.info("Arbitrage opportunities cache cleared")
@@ -4,25 +4,67 @@ Handles interactions with PrismFi protocol on MegaETH
 """
 
 import asyncio
+import functools
 import logging
+import time
 from typing import Dict, List, Optional, Tuple, Any
+import aiohttp
+from eth_abi import decode as abi_decode, encode as abi_encode
 from web3 import Web3, AsyncWeb3
 from web3.contract import Contract
 from web3.exceptions import TransactionNotFound, ContractLogicError
 import json
-from datetime import datetime, timezone
 
-from config import Config, ROUTER_ABI, FACTORY_ABI, PAIR_ABI, ERC20_ABI
+from config import CONFIG, ROUTER_ABI, FACTORY_ABI, PAIR_ABI, ERC20_ABI
+from utils.rpc import json_rpc_batch, encode_aggregate3, decode_aggregate3
 
 logger = logging.getLogger(__name__)
 
+# Checksumming costs a keccak256; hot paths see the same few addresses
+@functools.lru_cache(maxsize=4096)
+def _checksum(address: str) -> str:
+    return Web3.to_checksum_address(address)
+
+# Gas price is reused for this long before hitting the RPC again
+_GAS_PRICE_TTL = 0.5
+
+# Pending nonces are reused this long by retried gas estimates
+_NONCE_TTL = 0.5
+
+# getAmountsOut(uint256,address[]) selector and codec types for Multicall3 batches
+_SELECTOR_GET_AMOUNTS_OUT = bytes.fromhex("d06ca61f")
+_GET_AMOUNTS_OUT_IN = ('uint256', 'address[]')
+_AMOUNTS_OUT = ('uint256[]',)
+
+# swapExactETHForTokens(uint256,address[],address,uint256) selector and argument types
+_SELECTOR_SWAP_EXACT_ETH_FOR_TOKENS = bytes.fromhex("7ff36ab5")
+_SWAP_IN = ('uint256', 'address[]', 'address', 'uint256')
+
 class PrismFiDEX:
     """PrismFi DEX integration class"""
     
-    def __init__(self, w3: Web3, async_w3: AsyncWeb3):
+    def __init__(self, w3: Web3, async_w3: AsyncWeb3,
+                 http_session: Optional[aiohttp.ClientSession] = None):
         self.w3 = w3
         self.async_w3 = async_w3
-        self.router_address = Config.PRISMFI_ROUTER
+        self.router_address = CONFIG.PRISMFI_ROUTER and _checksum(CONFIG.PRISMFI_ROUTER)
+        
+        # Last (gas_price, monotonic timestamp) fetched from the node
+        self._gas_price_cache: Optional[Tuple[int, float]] = None
+        
+        # Last (pending nonce, monotonic timestamp) per checksummed wallet
+        self._nonce_cache: Dict[str, Tuple[int, float]] = {}
+        
+        # eth_gasPrice request shared by callers that miss the cache together
+        self._gas_price_fetch: Optional[asyncio.Future] = None
+        
+        # Shared HTTP session for raw JSON-RPC batches; only closed here if created here
+        self._http_session: Optional[aiohttp.ClientSession] = http_session
+        self._owns_http_session = http_session is None
+        self.multicall_address = _checksum(CONFIG.MULTICALL3)
+        
+        # Configuration is fixed for the process, so availability is decided once
+        self.available = False
         
         if not self.router_address:
             logger.warning("PrismFi router address not configured")
@@ -30,22 +72,19 @@ class PrismFiDEX:
             return
         
         # Initialize router contract
-        self.router_contract = w3.eth.contract(
-            address=Web3.to_checksum_address(self.router_address),
+        self.router_contract = async_w3.eth.contract(
+            address=self.router_address,
             abi=ROUTER_ABI
         )
-        
-        # Cache for token info and pairs
-        self._token_info_cache: Dict[str, Dict[str, Any]] = {}
-        self._pair_cache: Dict[str, str] = {}
+        self.available = True
         
     async def is_available(self) -> bool:
         """Check if PrismFi is available and configured"""
-        return self.router_contract is not None and bool(self.router_address)
+        return self.available
     
     async def get_token_price(self, token_address: str, base_token: str = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE") -> Optional[float]:
         """Get token price from PrismFi"""
-        if not await self.is_available():
+        if not self.available:
             return None
         
         try:
@@ -58,9 +97,28 @@ class PrismFiDEX:
             logger.error(f"Error getting PrismFi price for {token_address}: {e}")
             return None
     
+    async def get_gas_price(self) -> int:
+        """Current gas price, refreshed at most every _GAS_PRICE_TTL seconds"""
+        now = time.monotonic()
+        if self._gas_price_cache is not None and now - self._gas_price_cache[1] < _GAS_PRICE_TTL:
+            return self._gas_price_cache[0]
+        
+        if self._gas_price_fetch is None:
+            self._gas_price_fetch = asyncio.ensure_future(self._fetch_gas_price(now))
+        return await asyncio.shield(self._gas_price_fetch)
+    
+    async def _fetch_gas_price(self, requested_at: float) -> int:
+        """Fetch the gas price from the node and cache it"""
+        try:
+            gas_price = await self.async_w3.eth.gas_price
+            self._gas_price_cache = (gas_price, requested_at)
+            return gas_price
+        finally:
+            self._gas_price_fetch = None
+    
     async def get_amounts_out(self, amount_in: int, path: List[str]) -> Optional[List[int]]:
         """Get output amounts for swap on PrismFi"""
-        if not await self.is_available():
+        if not self.available:
             return None
         
         try:
@@ -70,26 +128,92 @@ class PrismFiDEX:
             logger.error(f"Error getting PrismFi amounts out: {e}")
             return None
     
+    async def _batch_preflight(self, address: str) -> Tuple[int, int]:
+        """Gas price and pending nonce for address in one JSON-RPC batch"""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession()
+            self._owns_http_session = True
+        
+        now = time.monotonic()
+        
+        # Retried estimates for the same wallet reuse both values while fresh
+        cached_nonce = self._nonce_cache.get(address)
+        if (cached_nonce is not None and now - cached_nonce[1] < _NONCE_TTL
+                and self._gas_price_cache is not None and now - self._gas_price_cache[1] < _GAS_PRICE_TTL):
+            return self._gas_price_cache[0], cached_nonce[0]
+        
+        gas_price_hex, nonce_hex = await json_rpc_batch(
+            self._http_session,
+            CONFIG.MEGAETH_RPC,
+            [("eth_gasPrice", []), ("eth_getTransactionCount", [address, "pending"])]
+        )
+        if gas_price_hex is None or nonce_hex is None:
+            raise RuntimeError("Gas price / nonce batch returned an error")
+        
+        gas_price, nonce = int(gas_price_hex, 16), int(nonce_hex, 16)
+        self._gas_price_cache = (gas_price, now)
+        self._nonce_cache[address] = (nonce, now)
+        return gas_price, nonce
+    
+    def invalidate_nonce(self, address: Optional[str] = None) -> None:
+        """Drop the cached pending nonce for address, or for every wallet"""
+        if address is None:
+            self._nonce_cache.clear()
+        else:
+            self._nonce_cache.pop(_checksum(address), None)
+    
+    async def get_amounts_out_batch(self, requests: List[Tuple[int, List[str]]]) -> List[Optional[List[int]]]:
+        """Get output amounts for many (amount_in, path) quotes in one Multicall3 eth_call"""
+        if not requests or not self.available:
+            return [None] * len(requests)
+        
+        try:
+            calls = [
+                (self.router_contract.address,
+                 _SELECTOR_GET_AMOUNTS_OUT + abi_encode(_GET_AMOUNTS_OUT_IN, [amount_in, path]))
+                for amount_in, path in requests
+            ]
+            raw = await self.async_w3.eth.call({
+                'to': self.multicall_address,
+                'data': '0x' + encode_aggregate3(calls).hex()
+            })
+            return [
+                list(abi_decode(_AMOUNTS_OUT, data)[0]) if data is not None else None
+                for data in decode_aggregate3(raw)
+            ]
+        except Exception as e:
+            logger.error(f"Error getting PrismFi amounts out for {len(requests)} quotes: {e}")
+            return [None] * len(requests)
+    
+    def _swap_transaction(self, amount_in: int, amount_out_min: int, path: List[str],
+                          to_address: str, deadline: int, gas_price: int) -> Dict[str, Any]:
+        """Assemble a swapExactETHForTokens transaction from pre-encoded calldata"""
+        to_address = _checksum(to_address)
+        data = _SELECTOR_SWAP_EXACT_ETH_FOR_TOKENS + abi_encode(
+            _SWAP_IN, [amount_out_min, path, to_address, deadline]
+        )
+        return {
+            'from': to_address,
+            'to': self.router_address,
+            'value': amount_in,
+            'gas': CONFIG.DEFAULT_GAS_LIMIT,
+            'gasPrice': gas_price,
+            'chainId': CONFIG.CHAIN_ID,
+            'data': '0x' + data.hex()
+        }
+    
     async def estimate_swap_gas(self, amount_in: int, path: List[str], to_address: str) -> Optional[int]:
         """Estimate gas for PrismFi swap"""
-        if not await self.is_available():
+        if not self.available:
             return None
         
         try:
-            deadline = int((datetime.now(timezone.utc).timestamp() + 300))
+            deadline = int(time.time()) + 300
+            to_address = _checksum(to_address)
+            gas_price, nonce = await self._batch_preflight(to_address)
             
-            tx_data = self.router_contract.functions.swapExactETHForTokens(
-                0,
-                path,
-                Web3.to_checksum_address(to_address),
-                deadline
-            ).build_transaction({
-                'from': Web3.to_checksum_address(to_address),
-                'value': amount_in,
-                'gas': Config.DEFAULT_GAS_LIMIT,
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': await self.async_w3.eth.get_transaction_count(to_address)
-            })
+            tx_data = self._swap_transaction(amount_in, 0, path, to_address, deadline, gas_price)
+            tx_data['nonce'] = nonce
             
             gas_estimate = await self.async_w3.eth.estimate_gas(tx_data)
             return gas_estimate
@@ -98,30 +222,24 @@ class PrismFiDEX:
             logger.error(f"Error estimating PrismFi swap gas: {e}")
             return None
     
-    def build_swap_transaction(self, amount_in: int, amount_out_min: int, path: List[str], 
+    async def build_swap_transaction(self, amount_in: int, amount_out_min: int, path: List[str], 
                               to_address: str, deadline: Optional[int] = None) -> Dict[str, Any]:
         """Build PrismFi swap transaction"""
         if not self.router_contract:
             return {}
         
         if deadline is None:
-            deadline = int((datetime.now(timezone.utc).timestamp() + 300))
+            deadline = int(time.time()) + 300
         
         try:
-            tx_data = self.router_contract.functions.swapExactETHForTokens(
+            return self._swap_transaction(
+                amount_in,
                 amount_out_min,
                 path,
-                Web3.to_checksum_address(to_address),
-                deadline
-            ).build_transaction({
-                'from': Web3.to_checksum_address(to_address),
-                'value': amount_in,
-                'gas': Config.DEFAULT_GAS_LIMIT,
-                'gasPrice': int(self.w3.eth.gas_price * Config.GAS_MULTIPLIER),
-                'chainId': Config.CHAIN_ID
-            })
-            
-            return tx_data
+                to_address,
+                deadline,
+                int(await self.get_gas_price() * CONFIG.GAS_MULTIPLIER)
+            )
             
         except Exception as e:
             logger.error(f"Error building PrismFi swap transaction: {e}")
@@ -129,15 +247,21 @@ class PrismFiDEX:
     
     async def get_liquidity_pools(self) -> List[Dict[str, Any]]:
         """Get available liquidity pools on PrismFi"""
-        if not await self.is_available():
+        if not self.available:
             return []
         
         # This would need to be implemented based on PrismFi's specific API
         logger.info("PrismFi liquidity pools query - not implemented yet")
         return []
     
+    async def close(self) -> None:
+        """Close the JSON-RPC HTTP session if this instance created it"""
+        if self._http_session is not None and self._owns_http_session:
+            await self._http_session.close()
+        self._http_session = None
+    
     def clear_cache(self):
         """Clear internal caches"""
-        self._token_info_cache.clear()
-        self._pair_cache.clear()
+        self._gas_price_cache = None
+        self._nonce_cache.clear()
         logger.info("PrismFi DEX cache cleared")
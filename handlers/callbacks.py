@@ -12,12 +12,142 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 
-from config import Config, ERROR_MESSAGES, SUCCESS_MESSAGES
+from config import CONFIG, ERROR_MESSAGES, SUCCESS_MESSAGES
 from database import Database
 from sniper.executor import SnipeRequest, SniperExecutor
+from utils.formatting import format_leaderboard, format_time_ago
 
 logger = logging.getLogger(__name__)
 
+# Static menus are immutable, so build their markup and text once at import
+_MAIN_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🎯 Snipe", callback_data="menu_snipe"),
+        InlineKeyboardButton("💱 Arbitrage", callback_data="menu_arb")
+    ],
+    [
+        InlineKeyboardButton("🤖 AI Predict", callback_data="menu_predict"),
+        InlineKeyboardButton("📊 Stats", callback_data="stats_leaderboard")
+    ],
+    [
+        InlineKeyboardButton("🔗 Wallet", callback_data="wallet_connect"),
+        InlineKeyboardButton("⚙️ Settings", callback_data="menu_settings")
+    ]
+])
+_MAIN_MENU_MESSAGE = (
+    "🚀 **Atalanta Main Menu**\n\n"
+    "Choose your trading action:"
+)
+
+_SNIPE_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🎯 New Snipe", callback_data="snipe_new"),
+        InlineKeyboardButton("📋 Active Snipes", callback_data="snipe_active")
+    ],
+    [
+        InlineKeyboardButton("🔄 Refresh", callback_data="snipe_refresh"),
+        InlineKeyboardButton("⚙️ Settings", callback_data="snipe_settings")
+    ],
+    [
+        InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
+    ]
+])
+_SNIPE_MENU_MESSAGE = (
+    "🎯 **Token Sniping**\n\n"
+    "• Real-time launch monitoring\n"
+    "• AI-powered safety checks\n"
+    "• Instant execution\n\n"
+    "Ready to snipe the next 100x? 🚀"
+)
+
+_ARB_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🔄 Scan Now", callback_data="arb_refresh"),
+        InlineKeyboardButton("⚡ Execute Best", callback_data="arb_execute_best")
+    ],
+    [
+        InlineKeyboardButton("📊 History", callback_data="arb_history"),
+        InlineKeyboardButton("⚙️ Settings", callback_data="arb_settings")
+    ],
+    [
+        InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
+    ]
+])
+_ARB_MENU_MESSAGE = (
+    "💱 **Multi-DEX Arbitrage**\n\n"
+    "• Scan across all major DEXes\n"
+    "• Calculate profitable opportunities\n"
+    "• Execute with single click\n\n"
+    "Finding arbitrage opportunities... 🔍"
+)
+
+_PREDICT_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🎯 Predict Token", callback_data="predict_token"),
+        InlineKeyboardButton("📈 Market Analysis", callback_data="predict_market")
+    ],
+    [
+        InlineKeyboardButton("🚀 Pump Detection", callback_data="predict_pump"),
+        InlineKeyboardButton("⚙️ Settings", callback_data="predict_settings")
+    ],
+    [
+        InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
+    ]
+])
+_PREDICT_MENU_MESSAGE = (
+    "🤖 **AI Predictions**\n\n"
+    "• Token launch scoring\n"
+    "• Price movement prediction\n"
+    "• Pump signal detection\n"
+    "• Risk assessment\n\n"
+    "Powered by advanced machine learning 🧠"
+)
+
+_SETTINGS_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("⚡ Gas Settings", callback_data="settings_gas"),
+        InlineKeyboardButton("🎯 Snipe Settings", callback_data="settings_snipe")
+    ],
+    [
+        InlineKeyboardButton("🔔 Notifications", callback_data="settings_notifications"),
+        InlineKeyboardButton("🔒 Security", callback_data="settings_security")
+    ],
+    [
+        InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
+    ]
+])
+_SETTINGS_MENU_MESSAGE = (
+    "⚙️ **Bot Settings**\n\n"
+    "Customize your trading experience:\n"
+    "• Gas price limits\n"
+    "• Slippage tolerance\n"
+    "• Notification preferences\n"
+    "• Security options"
+)
+
+_WALLET_CONNECT_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔗 Connect with WalletConnect", callback_data="wallet_wc_connect")],
+    [InlineKeyboardButton("📱 Scan QR Code", callback_data="wallet_qr_connect")],
+    [InlineKeyboardButton("🔙 Cancel", callback_data="menu_main")]
+])
+_WALLET_CONNECT_MESSAGE = (
+    "🔗 **Connect Wallet**\n\n"
+    "Choose your connection method:\n\n"
+    "• **WalletConnect** - Mobile app\n"
+    "• **QR Code** - Scan with wallet\n\n"
+    "🔒 Your private keys never leave your device"
+)
+
+_USER_STATS_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🏆 Leaderboard", callback_data="stats_leaderboard")],
+    [InlineKeyboardButton("🔙 Back", callback_data="wallet_balance")]
+])
+
+_LEADERBOARD_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Refresh", callback_data="stats_refresh")],
+    [InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")]
+])
+
 class CallbackHandler:
     """Handles all callback queries from inline keyboards"""
     
@@ -27,6 +157,15 @@ class CallbackHandler:
         
         # Pending operations
         self.pending_snipes: Dict[str, Dict[str, Any]] = {}
+        
+        # Handlers keyed by the first segment of callback_data
+        self._dispatch = {
+            "menu": self._handle_menu_callback,
+            "snipe": self._handle_snipe_callback,
+            "arb": self._handle_arb_callback,
+            "wallet": self._handle_wallet_callback,
+            "stats": self._handle_stats_callback
+        }
     
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Main callback handler"""
@@ -45,23 +184,15 @@ class CallbackHandler:
             if not callback_data:
                 return
             
-            # Parse callback data
-            parts = callback_data.split('_')
-            action = parts[0]
+            # Parse callback data; only the action prefix is needed to route
+            action, _, rest = callback_data.partition('_')
             
             # Route to appropriate handler
-            if action == "menu":
-                await self._handle_menu_callback(query, parts[1:], user, context)
-            elif action == "snipe":
-                await self._handle_snipe_callback(query, parts[1:], user, context)
-            elif action == "arb":
-                await self._handle_arb_callback(query, parts[1:], user, context)
-            elif action == "wallet":
-                await self._handle_wallet_callback(query, parts[1:], user, context)
-            elif action == "stats":
-                await self._handle_stats_callback(query, parts[1:], user, context)
-            else:
+            handler = self._dispatch.get(action)
+            if handler is None:
                 await self._handle_unknown_callback(query)
+            else:
+                await handler(query, rest.split('_') if rest else [], user, context)
                 
         except Exception as e:
             logger.error(f"Error handling callback: {e}")
@@ -101,7 +232,7 @@ class CallbackHandler:
             await self._cancel_snipe(query, user)
         
         elif action == "refresh":
-            await self._refresh_snipe_opportunities(query)
+            await self._refresh_snipe_opportunities(query, context)
     
     async def _handle_arb_callback(self, query, parts: list, user, context) -> None:
         """Handle arbitrage callbacks"""
@@ -147,160 +278,53 @@ class CallbackHandler:
     
     async def _show_main_menu(self, query) -> None:
         """Show main menu"""
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("🎯 Snipe", callback_data="menu_snipe"),
-                InlineKeyboardButton("💱 Arbitrage", callback_data="menu_arb")
-            ],
-            [
-                InlineKeyboardButton("🤖 AI Predict", callback_data="menu_predict"),
-                InlineKeyboardButton("📊 Stats", callback_data="stats_leaderboard")
-            ],
-            [
-                InlineKeyboardButton("🔗 Wallet", callback_data="wallet_connect"),
-                InlineKeyboardButton("⚙️ Settings", callback_data="menu_settings")
-            ]
-        ])
-        
-        message = (
-            "🚀 **Atalanta Main Menu**\n\n"
-            "Choose your trading action:"
-        )
-        
         await query.edit_message_text(
-            message,
+            _MAIN_MENU_MESSAGE,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_MAIN_MENU_KEYBOARD
         )
     
     async def _show_snipe_menu(self, query) -> None:
         """Show sniping menu"""
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("🎯 New Snipe", callback_data="snipe_new"),
-                InlineKeyboardButton("📋 Active Snipes", callback_data="snipe_active")
-            ],
-            [
-                InlineKeyboardButton("🔄 Refresh", callback_data="snipe_refresh"),
-                InlineKeyboardButton("⚙️ Settings", callback_data="snipe_settings")
-            ],
-            [
-                InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
-            ]
-        ])
-        
-        message = (
-            "🎯 **Token Sniping**\n\n"
-            "• Real-time launch monitoring\n"
-            "• AI-powered safety checks\n"
-            "• Instant execution\n\n"
-            "Ready to snipe the next 100x? 🚀"
-        )
-        
         await query.edit_message_text(
-            message,
+            _SNIPE_MENU_MESSAGE,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_SNIPE_MENU_KEYBOARD
         )
     
     async def _show_arb_menu(self, query) -> None:
         """Show arbitrage menu"""
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("🔄 Scan Now", callback_data="arb_refresh"),
-                InlineKeyboardButton("⚡ Execute Best", callback_data="arb_execute_best")
-            ],
-            [
-                InlineKeyboardButton("📊 History", callback_data="arb_history"),
-                InlineKeyboardButton("⚙️ Settings", callback_data="arb_settings")
-            ],
-            [
-                InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
-            ]
-        ])
-        
-        message = (
-            "💱 **Multi-DEX Arbitrage**\n\n"
-            "• Scan across all major DEXes\n"
-            "• Calculate profitable opportunities\n"
-            "• Execute with single click\n\n"
-            "Finding arbitrage opportunities... 🔍"
-        )
-        
         await query.edit_message_text(
-            message,
+            _ARB_MENU_MESSAGE,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_ARB_MENU_KEYBOARD
         )
     
     async def _show_predict_menu(self, query) -> None:
         """Show AI prediction menu"""
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("🎯 Predict Token", callback_data="predict_token"),
-                InlineKeyboardButton("📈 Market Analysis", callback_data="predict_market")
-            ],
-            [
-                InlineKeyboardButton("🚀 Pump Detection", callback_data="predict_pump"),
-                InlineKeyboardButton("⚙️ Settings", callback_data="predict_settings")
-            ],
-            [
-                InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
-            ]
-        ])
-        
-        message = (
-            "🤖 **AI Predictions**\n\n"
-            "• Token launch scoring\n"
-            "• Price movement prediction\n"
-            "• Pump signal detection\n"
-            "• Risk assessment\n\n"
-            "Powered by advanced machine learning 🧠"
-        )
-        
         await query.edit_message_text(
-            message,
+            _PREDICT_MENU_MESSAGE,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_PREDICT_MENU_KEYBOARD
         )
     
     async def _show_settings_menu(self, query) -> None:
         """Show settings menu"""
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("⚡ Gas Settings", callback_data="settings_gas"),
-                InlineKeyboardButton("🎯 Snipe Settings", callback_data="settings_snipe")
-            ],
-            [
-                InlineKeyboardButton("🔔 Notifications", callback_data="settings_notifications"),
-                InlineKeyboardButton("🔒 Security", callback_data="settings_security")
-            ],
-            [
-                InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")
-            ]
-        ])
-        
-        message = (
-            "⚙️ **Bot Settings**\n\n"
-            "Customize your trading experience:\n"
-            "• Gas price limits\n"
-            "• Slippage tolerance\n"
-            "• Notification preferences\n"
-            "• Security options"
-        )
-        
         await query.edit_message_text(
-            message,
+            _SETTINGS_MENU_MESSAGE,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_SETTINGS_MENU_KEYBOARD
         )
     
     async def _execute_snipe(self, query, user, token_address: str, amount_eth: float, 
                            max_slippage: float, context) -> None:
         """Execute a snipe operation"""
         try:
-            # Get user info
-            db_user = await self.database.get_user(user.id)
+            # Get user info while warming the executor's token info cache
+            db_user, _ = await asyncio.gather(
+                self.database.get_user(user.id),
+                self.sniper_executor.kumbaya.get_token_info(token_address)
+            )
             if not db_user or not db_user.wallet_address:
                 await query.edit_message_text(
                     "❌ Wallet not connected. Use /wallet to connect first."
@@ -352,22 +376,27 @@ class CallbackHandler:
             "The snipe operation has been cancelled."
         )
     
-    async def _refresh_snipe_opportunities(self, query) -> None:
-        """Refresh snipe opportunities"""
-        await query.edit_message_text(
-            "🔄 **Scanning for new launches...**\n\n"
-            "Monitoring Kumbaya factory for new pairs...\n"
-            "⏱️ This may take a few seconds"
-        )
+    async def _refresh_snipe_opportunities(self, query, context) -> None:
+        """Show launches pushed by the token monitor's PairCreated subscription"""
+        token_monitor = context.bot_data.get('token_monitor')
+        launches = await token_monitor.get_recent_launches(limit=5) if token_monitor else []
         
-        # In a real implementation, you would fetch recent launches
-        await asyncio.sleep(2)
+        if not launches:
+            await query.edit_message_text(
+                "🎯 **Recent Launches**\n\n"
+                "No new launches detected yet.\n"
+                "Check back soon! 🚀"
+            )
+            return
         
-        await query.edit_message_text(
-            "🎯 **Recent Launches**\n\n"
-            "No new launches detected in the last 5 minutes.\n"
-            "Check back soon! 🚀"
-        )
+        parts = ["🎯 **Recent Launches**\n\n"]
+        for launch in reversed(launches):
+            parts.append(
+                f"• `{launch.token_address}`\n"
+                f"   Block {launch.block_number}, {format_time_ago(launch.timestamp)}\n"
+            )
+        
+        await query.edit_message_text("".join(parts), parse_mode=ParseMode.MARKDOWN)
     
     async def _refresh_arb_opportunities(self, query, context) -> None:
         """Refresh arbitrage opportunities"""
@@ -376,10 +405,11 @@ class CallbackHandler:
             await query.edit_message_text("❌ Arbitrage scanner not available")
             return
         
-        await query.edit_message_text("🔄 Scanning for arbitrage opportunities...")
-        
-        # Get opportunities
-        opportunities = await multi_dex.get_recent_opportunities(limit=5)
+        # Get opportunities while the scanning notice is sent
+        _, opportunities = await asyncio.gather(
+            query.edit_message_text("🔄 Scanning for arbitrage opportunities..."),
+            multi_dex.get_recent_opportunities(limit=5)
+        )
         
         if not opportunities:
             await query.edit_message_text(
@@ -390,11 +420,11 @@ class CallbackHandler:
             return
         
         # Format opportunities
-        message = "💱 **Arbitrage Opportunities**\n\n"
+        parts = ["💱 **Arbitrage Opportunities**\n\n"]
         
         keyboard_buttons = []
         for i, opp in enumerate(opportunities, 1):
-            message += (
+            parts.append(
                 f"{i}. **{opp.token_symbol}**\n"
                 f"   {opp.dex_a} → {opp.dex_b}\n"
                 f"   Profit: {opp.profit_percentage:.2f}%\n"
@@ -411,7 +441,7 @@ class CallbackHandler:
         keyboard = InlineKeyboardMarkup(keyboard_buttons)
         
         await query.edit_message_text(
-            message,
+            "".join(parts),
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=keyboard
         )
@@ -438,24 +468,10 @@ class CallbackHandler:
     
     async def _initiate_wallet_connect(self, query, user) -> None:
         """Initiate wallet connection"""
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔗 Connect with WalletConnect", callback_data="wallet_wc_connect")],
-            [InlineKeyboardButton("📱 Scan QR Code", callback_data="wallet_qr_connect")],
-            [InlineKeyboardButton("🔙 Cancel", callback_data="menu_main")]
-        ])
-        
-        message = (
-            "🔗 **Connect Wallet**\n\n"
-            "Choose your connection method:\n\n"
-            "• **WalletConnect** - Mobile app\n"
-            "• **QR Code** - Scan with wallet\n\n"
-            "🔒 Your private keys never leave your device"
-        )
-        
         await query.edit_message_text(
-            message,
+            _WALLET_CONNECT_MESSAGE,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_WALLET_CONNECT_KEYBOARD
         )
     
     async def _show_wallet_balance(self, query, user, context) -> None:
@@ -484,13 +500,15 @@ class CallbackHandler:
     
     async def _show_user_stats(self, query, user) -> None:
         """Show user statistics"""
-        db_user = await self.database.get_user(user.id)
+        # Both lookups are served from the database's TTL caches when warm
+        db_user, stats = await asyncio.gather(
+            self.database.get_user(user.id),
+            self.database.get_user_stats(user.id)
+        )
         if not db_user:
             await query.edit_message_text("❌ User not found")
             return
         
-        stats = await self.database.get_user_stats(user.id)
-        
         message = (
             f"📊 **Your Statistics**\n\n"
             f"**Points:** {db_user.points:,}\n"
@@ -507,37 +525,20 @@ class CallbackHandler:
                 f"• Best Trade: {stats['best_trade']:.4f} ETH\n\n"
             )
         
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🏆 Leaderboard", callback_data="stats_leaderboard")],
-            [InlineKeyboardButton("🔙 Back", callback_data="wallet_balance")]
-        ])
-        
         await query.edit_message_text(
             message,
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_USER_STATS_KEYBOARD
         )
     
     async def _show_leaderboard(self, query) -> None:
         """Show global leaderboard"""
         leaderboard = await self.database.get_leaderboard(limit=10)
         
-        message = "🏆 **Global Leaderboard**\n\n"
-        
-        for i, (telegram_id, username, points) in enumerate(leaderboard, 1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            display_name = username or f"User {telegram_id}"
-            message += f"{medal} {display_name}: {points:,} points\n"
-        
-        keyboard = InlineKeyboardMarkup([
-            [InlineKeyboardButton("🔄 Refresh", callback_data="stats_refresh")],
-            [InlineKeyboardButton("🔙 Main Menu", callback_data="menu_main")]
-        ])
-        
         await query.edit_message_text(
-            message,
+            format_leaderboard(leaderboard),
             parse_mode=ParseMode.MARKDOWN,
-            reply_markup=keyboard
+            reply_markup=_LEADERBOARD_KEYBOARD
         )
     
     async def _refresh_stats(self, query) -> None:
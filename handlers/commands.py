@@ -5,6 +5,8 @@ Handles all Telegram bot commands
 
 import asyncio
 import logging
+import re
+import time
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 
@@ -12,13 +14,106 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler as TelegramCommandHandler, MessageHandler, filters
 from telegram.constants import ParseMode
 
-from config import Config, WELCOME_MESSAGE, ERROR_MESSAGES, SUCCESS_MESSAGES, KEYBOARD_TEMPLATES
+from config import CONFIG, WELCOME_MESSAGE, ERROR_MESSAGES, SUCCESS_MESSAGES, KEYBOARD_TEMPLATES
 from database import Database, User, Trade
 from ai.predictor import AIPredictor, TokenFeatures
-from utils.formatting import format_number, format_address, format_time_ago
+from utils.formatting import format_number, format_address, format_time_ago, format_leaderboard
+from utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# 0x-prefixed 20-byte hex address; fullmatch also rejects a trailing newline
+_ADDRESS_MATCH = re.compile(r'0x[0-9a-fA-F]{40}').fullmatch
+
+# Gathered token features are shared across users for this long
+_FEATURE_TTL = 30.0
+
+# Background analyses a single user may have in flight at once
+_MAX_USER_ANALYSES = 3
+
+# Immediate acknowledgement while a background analysis runs
+_ANALYZING_MESSAGE = "⏳ Analyzing token..."
+
+# Static keyboards and texts are immutable, so build them once at import
+_START_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🎯 Start Sniping", callback_data="menu_snipe")],
+    [InlineKeyboardButton("💱 Arbitrage", callback_data="menu_arb")],
+    [InlineKeyboardButton("🔗 Connect Wallet", callback_data="wallet_connect")],
+    [InlineKeyboardButton("📊 My Stats", callback_data="stats_my")]
+])
+
+_SNIPE_USAGE_MESSAGE = (
+    "🎯 **Snipe Command Usage:**\n\n"
+    "`/snipe <token_address> [amount_eth] [slippage%]`\n\n"
+    "**Examples:**\n"
+    "`/snipe 0x1234... 0.1 2`\n"
+    "`/snipe 0x5678... 0.05`"
+)
+
+_NO_ARB_MESSAGE = (
+    "🔄 **No Arbitrage Opportunities Found**\n\n"
+    "Scanning for profitable opportunities across DEXes...\n"
+    "Check back in a few moments!"
+)
+
+_ARB_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔄 Refresh", callback_data="arb_refresh")],
+    [InlineKeyboardButton("⚡ Execute Best", callback_data="arb_execute_best")]
+])
+
+_PREDICT_USAGE_MESSAGE = (
+    "🤖 **AI Prediction Command:**\n\n"
+    "`/predict <token_address>`\n\n"
+    "Get AI-powered analysis and predictions for any token."
+)
+
+_WALLET_CONNECT_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🔗 Connect Wallet", callback_data="wallet_connect")]
+])
+_WALLET_CONNECT_MESSAGE = (
+    "💼 **Wallet Not Connected**\n\n"
+    "Connect your wallet to start trading:"
+)
+
+_WALLET_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📊 Portfolio", callback_data="wallet_portfolio")],
+    [InlineKeyboardButton("⚙️ Settings", callback_data="wallet_settings")]
+])
+
+_FARM_MESSAGE = (
+    "🌾 **KPI Farming**\n\n"
+    "Auto-farming features coming soon!\n\n"
+    "• Adaptive DCA strategies\n"
+    "• Volume generation for rewards\n"
+    "• Milestone tracking\n"
+    "• Gas optimization\n\n"
+    "Stay tuned for updates! 🚀"
+)
+
+_HELP_MESSAGE = (
+    "🤖 **Atalanta Bot Help**\n\n"
+    "**Commands:**\n"
+    "/start - Start the bot and show main menu\n"
+    "/snipe <address> [amount] [slippage] - Snipe new tokens\n"
+    "/arb - Show arbitrage opportunities\n"
+    "/predict <address> - Get AI predictions\n"
+    "/wallet - Manage your wallet\n"
+    "/farm - KPI farming features\n"
+    "/stats - Global leaderboard\n"
+    "/help - Show this help message\n\n"
+    "**Features:**\n"
+    "• ⚡ Real-time token sniping\n"
+    "• 💱 Multi-DEX arbitrage\n"
+    "• 🤖 AI-powered predictions\n"
+    "• 🔒 Secure wallet connection\n"
+    "• 🎮 Gamification & rewards\n\n"
+    "**Security:**\n"
+    "• No private keys stored\n"
+    "• WalletConnect integration\n"
+    "• All actions require your signature\n\n"
+    "Need help? Contact support! 📞"
+)
+
 class CommandHandler:
     """Handles all bot commands"""
     
@@ -26,9 +121,17 @@ class CommandHandler:
         self.database = database
         self.ai_predictor = ai_predictor
         
-        # Rate limiting
-        self.user_last_command: Dict[int, datetime] = {}
+        # Rate limiting; last command time per user as a monotonic float, bounded and self-expiring
         self.command_cooldown = 1.0  # seconds
+        self.user_last_command = TTLCache(maxsize=100_000, ttl=60)
+        
+        # Token features keyed by lowercase address; launch scores are cached by the predictor
+        self._feature_cache = TTLCache(maxsize=10_000, ttl=_FEATURE_TTL)
+        
+        # Slow analyses run off the update path; in-flight counts cap them per user
+        # and are dropped once a user has none running
+        self._user_analyses: Dict[int, int] = {}
+        self._analysis_tasks: set = set()
     
     async def handle_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command"""
@@ -52,17 +155,10 @@ class CommandHandler:
                 await self.database.update_user(db_user)
             
             # Send welcome message
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🎯 Start Sniping", callback_data="menu_snipe")],
-                [InlineKeyboardButton("💱 Arbitrage", callback_data="menu_arb")],
-                [InlineKeyboardButton("🔗 Connect Wallet", callback_data="wallet_connect")],
-                [InlineKeyboardButton("📊 My Stats", callback_data="stats_my")]
-            ])
-            
             await update.message.reply_text(
                 WELCOME_MESSAGE,
                 parse_mode=ParseMode.MARKDOWN,
-                reply_markup=keyboard
+                reply_markup=_START_KEYBOARD
             )
             
         except Exception as e:
@@ -84,30 +180,23 @@ class CommandHandler:
             # Parse command arguments
             args = context.args
             if len(args) < 1:
-                await update.message.reply_text(
-                    "🎯 **Snipe Command Usage:**\n\n"
-                    "`/snipe <token_address> [amount_eth] [slippage%]`\n\n"
-                    "**Examples:**\n"
-                    "`/snipe 0x1234... 0.1 2`\n"
-                    "`/snipe 0x5678... 0.05`",
-                    parse_mode=ParseMode.MARKDOWN
-                )
+                await update.message.reply_text(_SNIPE_USAGE_MESSAGE, parse_mode=ParseMode.MARKDOWN)
                 return
             
             token_address = args[0]
             amount_eth = float(args[1]) if len(args) > 1 else 0.1
-            max_slippage = float(args[2]) if len(args) > 2 else Config.DEFAULT_SLIPPAGE * 100
+            max_slippage = float(args[2]) if len(args) > 2 else CONFIG.DEFAULT_SLIPPAGE * 100
             
             # Validate inputs
             if not self._is_valid_address(token_address):
                 await update.message.reply_text(ERROR_MESSAGES["invalid_address"])
                 return
             
-            if amount_eth < Config.MIN_TRADE_AMOUNT:
+            if amount_eth < CONFIG.MIN_TRADE_AMOUNT:
                 await update.message.reply_text(ERROR_MESSAGES["invalid_amount"])
                 return
             
-            if max_slippage > Config.MAX_SLIPPAGE * 100:
+            if max_slippage > CONFIG.MAX_SLIPPAGE * 100:
                 await update.message.reply_text(ERROR_MESSAGES["high_slippage"])
                 return
             
@@ -117,66 +206,16 @@ class CommandHandler:
                 await update.message.reply_text(ERROR_MESSAGES["wallet_not_connected"])
                 return
             
-            # Get token info
-            from ..dex.kumbaya import KumbayaDEX
             kumbaya = context.bot_data.get('kumbaya')
             if not kumbaya:
                 await update.message.reply_text("❌ DEX not available")
                 return
             
-            token_info = await kumbaya.get_token_info(token_address)
-            if not token_info:
-                await update.message.reply_text(ERROR_MESSAGES["token_not_found"])
-                return
-            
-            # Perform AI analysis
-            features = await self._gather_token_features(token_address, kumbaya)
-            ai_score = await self.ai_predictor.score_token_launch(features)
-            
-            # Perform safety checks
-            honeypot_check = await kumbaya.simulate_honeypot(token_address)
-            liquidity_check = await kumbaya.check_liquidity(token_address, amount_eth * 0.5)
-            
-            # Build confirmation message
-            checks = []
-            if honeypot_check.get('is_honeypot'):
-                checks.append("⚠️ **Potential Honeypot Detected**")
-            else:
-                checks.append("✅ **Honeypot Check Passed**")
-            
-            if liquidity_check:
-                checks.append("✅ **Sufficient Liquidity**")
-            else:
-                checks.append("⚠️ **Low Liquidity**")
-            
-            checks.append(f"🤖 **AI Score:** {ai_score.prediction_value:.1f}/100 ({ai_score.confidence:.1%} confidence)")
-            
-            # Create confirmation keyboard
-            keyboard = InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton(
-                        "⚡ EXECUTE SNIPE",
-                        callback_data=f"snipe_execute_{token_address}_{amount_eth}_{max_slippage}"
-                    ),
-                    InlineKeyboardButton("❌ CANCEL", callback_data="snipe_cancel")
-                ]
-            ])
-            
-            message = (
-                f"🎯 **Snipe Confirmation**\n\n"
-                f"**Token:** `{token_info['symbol']}`\n"
-                f"**Address:** `{format_address(token_address)}`\n"
-                f"**Amount:** {amount_eth} ETH\n"
-                f"**Max Slippage:** {max_slippage}%\n\n"
-                f"**Quick Checks:**\n"
-                + "\n".join(checks) +
-                f"\n\n⚡ **Ready to execute...**"
-            )
-            
-            await update.message.reply_text(
-                message,
-                parse_mode=ParseMode.MARKDOWN,
-                reply_markup=keyboard
+            # Acknowledge now and finish the RPC-heavy analysis off the update path
+            await self._start_analysis(
+                update,
+                "❌ Error processing snipe command",
+                self._run_snipe_analysis, kumbaya, token_address, amount_eth, max_slippage
             )
             
         except ValueError as e:
@@ -185,6 +224,61 @@ class CommandHandler:
             logger.error(f"Error in snipe command: {e}")
             await update.message.reply_text("❌ Error processing snipe command")
     
+    async def _run_snipe_analysis(self, kumbaya, token_address: str, amount_eth: float,
+                                  max_slippage: float) -> Optional[tuple]:
+        """Safety checks and AI score for /snipe as (text, keyboard), or None if the token is unknown"""
+        token_info = await kumbaya.get_token_info(token_address)
+        if not token_info:
+            return None
+        
+        # Feature gathering and safety checks are independent RPC round-trips
+        features, honeypot_check, liquidity_check = await asyncio.gather(
+            self._gather_token_features(token_address, kumbaya),
+            kumbaya.simulate_honeypot(token_address),
+            kumbaya.check_liquidity(token_address, amount_eth * 0.5)
+        )
+        
+        # Perform AI analysis
+        ai_score = await self.ai_predictor.score_token_launch(features)
+        
+        # Build confirmation message
+        checks = []
+        if honeypot_check.get('is_honeypot'):
+            checks.append("⚠️ **Potential Honeypot Detected**")
+        else:
+            checks.append("✅ **Honeypot Check Passed**")
+        
+        if liquidity_check:
+            checks.append("✅ **Sufficient Liquidity**")
+        else:
+            checks.append("⚠️ **Low Liquidity**")
+        
+        checks.append(f"🤖 **AI Score:** {ai_score.prediction_value:.1f}/100 ({ai_score.confidence:.1%} confidence)")
+        
+        # Create confirmation keyboard
+        keyboard = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton(
+                    "⚡ EXECUTE SNIPE",
+                    callback_data=f"snipe_execute_{token_address}_{amount_eth}_{max_slippage}"
+                ),
+                InlineKeyboardButton("❌ CANCEL", callback_data="snipe_cancel")
+            ]
+        ])
+        
+        message = (
+            f"🎯 **Snipe Confirmation**\n\n"
+            f"**Token:** `{token_info['symbol']}`\n"
+            f"**Address:** `{format_address(token_address)}`\n"
+            f"**Amount:** {amount_eth} ETH\n"
+            f"**Max Slippage:** {max_slippage}%\n\n"
+            f"**Quick Checks:**\n"
+            + "\n".join(checks) +
+            f"\n\n⚡ **Ready to execute...**"
+        )
+        
+        return message, keyboard
+    
     async def handle_arb(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /arb command"""
         user = update.effective_user
@@ -202,34 +296,26 @@ class CommandHandler:
             opportunities = await multi_dex.get_recent_opportunities(limit=10)
             
             if not opportunities:
-                await update.message.reply_text(
-                    "🔄 **No Arbitrage Opportunities Found**\n\n"
-                    "Scanning for profitable opportunities across DEXes...\n"
-                    "Check back in a few moments!"
-                )
+                await update.message.reply_text(_NO_ARB_MESSAGE)
                 return
             
             # Format opportunities
-            message = "💱 **Recent Arbitrage Opportunities**\n\n"
+            parts = ["💱 **Recent Arbitrage Opportunities**\n\n"]
             
             for i, opp in enumerate(opportunities[:5], 1):
-                message += (
+                parts.append(
                     f"{i}. **{opp.token_symbol}**\n"
                     f"   Buy: {opp.dex_a} → Sell: {opp.dex_b}\n"
                     f"   Profit: {opp.profit_percentage:.2f}%\n"
                     f"   Net: {opp.net_profit:.4f} ETH\n"
                     f"   Status: {'✅ Executable' if opp.is_executable else '❌ Not executable'}\n\n"
                 )
-            
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔄 Refresh", callback_data="arb_refresh")],
-                [InlineKeyboardButton("⚡ Execute Best", callback_data="arb_execute_best")]
-            ])
+            message = "".join(parts)
             
             await update.message.reply_text(
                 message,
                 parse_mode=ParseMode.MARKDOWN,
-                reply_markup=keyboard
+                reply_markup=_ARB_KEYBOARD
             )
             
         except Exception as e:
@@ -245,11 +331,7 @@ class CommandHandler:
         try:
             args = context.args
             if len(args) < 1:
-                await update.message.reply_text(
-                    "🤖 **AI Prediction Command:**\n\n"
-                    "`/predict <token_address>`\n\n"
-                    "Get AI-powered analysis and predictions for any token."
-                )
+                await update.message.reply_text(_PREDICT_USAGE_MESSAGE)
                 return
             
             token_address = args[0]
@@ -263,53 +345,57 @@ class CommandHandler:
                 await update.message.reply_text("❌ DEX not available")
                 return
             
-            # Get token info
-            token_info = await kumbaya.get_token_info(token_address)
-            if not token_info:
-                await update.message.reply_text(ERROR_MESSAGES["token_not_found"])
-                return
-            
-            # Gather features and make predictions
-            features = await self._gather_token_features(token_address, kumbaya)
-            
-            # Multiple predictions
-            launch_score = await self.ai_predictor.score_token_launch(features)
-            
-            # Simulate price prediction (would need historical data in production)
-            price_prediction = await self.ai_predictor.predict_price_movement(
-                token_address, [1.0, 1.1, 1.05, 1.15, 1.12]  # Sample data
-            )
-            
-            # Simulate pump detection
-            pump_signal = await self.ai_predictor.detect_pump_signals(token_address, [])
-            
-            # Format results
-            message = (
-                f"🤖 **AI Analysis for {token_info['symbol']}**\n\n"
-                f"**Address:** `{format_address(token_address)}`\n\n"
-                f"📊 **Launch Score:** {launch_score.prediction_value:.1f}/100\n"
-                f"   Confidence: {launch_score.confidence:.1%}\n\n"
-                f"📈 **Price Prediction:** {price_prediction.prediction_value:+.2f}%\n"
-                f"   Confidence: {price_prediction.confidence:.1%}\n\n"
-                f"🚀 **Pump Signal:** {pump_signal.prediction_value:.1f}/100\n"
-                f"   Confidence: {pump_signal.confidence:.1%}\n\n"
-                f"**Key Features:**\n"
-                f"• Liquidity: {features.liquidity_eth:.2f} ETH\n"
-                f"• Holders: {features.holder_count}\n"
-                f"• 24h Transactions: {features.transaction_count_24h}\n"
-                f"• Buy/Sell Ratio: {features.buy_sell_ratio:.2f}\n"
-                f"• Honeypot Risk: {features.honeypot_score:.2f}"
-            )
-            
-            await update.message.reply_text(
-                message,
-                parse_mode=ParseMode.MARKDOWN
+            # Acknowledge now and finish the RPC-heavy analysis off the update path
+            await self._start_analysis(
+                update,
+                "❌ Error generating prediction",
+                self._run_predict_analysis, kumbaya, token_address
             )
             
         except Exception as e:
             logger.error(f"Error in predict command: {e}")
             await update.message.reply_text("❌ Error generating prediction")
     
+    async def _run_predict_analysis(self, kumbaya, token_address: str) -> Optional[tuple]:
+        """AI predictions for /predict as (text, None), or None if the token is unknown"""
+        token_info = await kumbaya.get_token_info(token_address)
+        if not token_info:
+            return None
+        
+        # Gather features and make predictions
+        features = await self._gather_token_features(token_address, kumbaya)
+        
+        # Multiple predictions
+        launch_score = await self.ai_predictor.score_token_launch(features)
+        
+        # Simulate price prediction (would need historical data in production)
+        price_prediction = await self.ai_predictor.predict_price_movement(
+            token_address, [1.0, 1.1, 1.05, 1.15, 1.12]  # Sample data
+        )
+        
+        # Simulate pump detection
+        pump_signal = await self.ai_predictor.detect_pump_signals(token_address, [])
+        
+        # Format results
+        message = (
+            f"🤖 **AI Analysis for {token_info['symbol']}**\n\n"
+            f"**Address:** `{format_address(token_address)}`\n\n"
+            f"📊 **Launch Score:** {launch_score.prediction_value:.1f}/100\n"
+            f"   Confidence: {launch_score.confidence:.1%}\n\n"
+            f"📈 **Price Prediction:** {price_prediction.prediction_value:+.2f}%\n"
+            f"   Confidence: {price_prediction.confidence:.1%}\n\n"
+            f"🚀 **Pump Signal:** {pump_signal.prediction_value:.1f}/100\n"
+            f"   Confidence: {pump_signal.confidence:.1%}\n\n"
+            f"**Key Features:**\n"
+            f"• Liquidity: {features.liquidity_eth:.2f} ETH\n"
+            f"• Holders: {features.holder_count}\n"
+            f"• 24h Transactions: {features.transaction_count_24h}\n"
+            f"• Buy/Sell Ratio: {features.buy_sell_ratio:.2f}\n"
+            f"• Honeypot Risk: {features.honeypot_score:.2f}"
+        )
+        
+        return message, None
+    
     async def handle_wallet(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /wallet command"""
         user = update.effective_user
@@ -317,36 +403,33 @@ class CommandHandler:
             return
         
         try:
-            db_user = await self.database.get_user(user.id)
+            # User, stats and recent trades are independent queries
+            db_user, stats, trades = await asyncio.gather(
+                self.database.get_user(user.id),
+                self.database.get_user_stats(user.id),
+                self.database.get_user_trades(user.id, limit=3)
+            )
             if not db_user:
                 await update.message.reply_text("❌ User not found. Please use /start first.")
                 return
             
             if not db_user.wallet_address:
-                keyboard = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("🔗 Connect Wallet", callback_data="wallet_connect")]
-                ])
                 await update.message.reply_text(
-                    "💼 **Wallet Not Connected**\n\n"
-                    "Connect your wallet to start trading:",
-                    reply_markup=keyboard
+                    _WALLET_CONNECT_MESSAGE,
+                    reply_markup=_WALLET_CONNECT_KEYBOARD
                 )
                 return
             
-            # Get user stats
-            stats = await self.database.get_user_stats(user.id)
-            trades = await self.database.get_user_trades(user.id, limit=5)
-            
-            message = (
+            parts = [
                 f"💼 **Wallet Information**\n\n"
                 f"**Address:** `{format_address(db_user.wallet_address)}`\n"
                 f"**Status:** {'🟢 Connected' if db_user.wallet_address else '🔴 Not Connected'}\n"
                 f"**Premium:** {'✅ Yes' if db_user.is_premium else '❌ No'}\n"
                 f"**Points:** {db_user.points:,}\n\n"
-            )
+            ]
             
             if stats:
-                message += (
+                parts.append(
                     f"📊 **Trading Stats:**\n"
                     f"• Total Trades: {stats['total_trades']}\n"
                     f"• Success Rate: {stats['successful_trades']}/{stats['total_trades']}\n"
@@ -355,20 +438,16 @@ class CommandHandler:
                 )
             
             if trades:
-                message += "📈 **Recent Trades:**\n"
-                for trade in trades[:3]:
+                parts.append("📈 **Recent Trades:**\n")
+                for trade in trades:
                     status_emoji = "✅" if trade.status == "completed" else "⏳" if trade.status == "pending" else "❌"
-                    message += f"• {status_emoji} {trade.token_symbol} - {trade.amount_in:.3f} ETH\n"
-            
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("📊 Portfolio", callback_data="wallet_portfolio")],
-                [InlineKeyboardButton("⚙️ Settings", callback_data="wallet_settings")]
-            ])
+                    parts.append(f"• {status_emoji} {trade.token_symbol} - {trade.amount_in:.3f} ETH\n")
+            message = "".join(parts)
             
             await update.message.reply_text(
                 message,
                 parse_mode=ParseMode.MARKDOWN,
-                reply_markup=keyboard
+                reply_markup=_WALLET_KEYBOARD
             )
             
         except Exception as e:
@@ -377,15 +456,7 @@ class CommandHandler:
     
     async def handle_farm(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /farm command"""
-        await update.message.reply_text(
-            "🌾 **KPI Farming**\n\n"
-            "Auto-farming features coming soon!\n\n"
-            "• Adaptive DCA strategies\n"
-            "• Volume generation for rewards\n"
-            "• Milestone tracking\n"
-            "• Gas optimization\n\n"
-            "Stay tuned for updates! 🚀"
-        )
+        await update.message.reply_text(_FARM_MESSAGE)
     
     async def handle_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /stats command"""
@@ -397,12 +468,7 @@ class CommandHandler:
             # Get global leaderboard
             leaderboard = await self.database.get_leaderboard(limit=10)
             
-            message = "🏆 **Global Leaderboard**\n\n"
-            
-            for i, (telegram_id, username, points) in enumerate(leaderboard, 1):
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                display_name = username or f"User {telegram_id}"
-                message += f"{medal} {display_name}: {points:,} points\n"
+            message = format_leaderboard(leaderboard)
             
             # Get user's rank
             db_user = await self.database.get_user(user.id)
@@ -424,63 +490,91 @@ class CommandHandler:
     
     async def handle_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /help command"""
-        help_text = (
-            "🤖 **Atalanta Bot Help**\n\n"
-            "**Commands:**\n"
-            "/start - Start the bot and show main menu\n"
-            "/snipe <address> [amount] [slippage] - Snipe new tokens\n"
-            "/arb - Show arbitrage opportunities\n"
-            "/predict <address> - Get AI predictions\n"
-            "/wallet - Manage your wallet\n"
-            "/farm - KPI farming features\n"
-            "/stats - Global leaderboard\n"
-            "/help - Show this help message\n\n"
-            "**Features:**\n"
-            "• ⚡ Real-time token sniping\n"
-            "• 💱 Multi-DEX arbitrage\n"
-            "• 🤖 AI-powered predictions\n"
-            "• 🔒 Secure wallet connection\n"
-            "• 🎮 Gamification & rewards\n\n"
-            "**Security:**\n"
-            "• No private keys stored\n"
-            "• WalletConnect integration\n"
-            "• All actions require your signature\n\n"
-            "Need help? Contact support! 📞"
-        )
-        
         await update.message.reply_text(
-            help_text,
+            _HELP_MESSAGE,
             parse_mode=ParseMode.MARKDOWN
         )
     
+    async def _start_analysis(self, update: Update, error_message: str, analysis, *args) -> None:
+        """Acknowledge a command at once and run analysis(*args) in a background task"""
+        user_id = update.effective_user.id
+        
+        # Refuse rather than queue once the user has the maximum in flight
+        in_flight = self._user_analyses.get(user_id, 0)
+        if in_flight >= _MAX_USER_ANALYSES:
+            await update.message.reply_text(ERROR_MESSAGES["rate_limit"])
+            return
+        self._user_analyses[user_id] = in_flight + 1
+        
+        try:
+            placeholder = await update.message.reply_text(_ANALYZING_MESSAGE)
+            task = asyncio.create_task(self._finish_analysis(placeholder, user_id, error_message, analysis, *args))
+        except BaseException:
+            self._release_analysis(user_id)
+            raise
+        
+        # The event loop only keeps weak references to tasks
+        self._analysis_tasks.add(task)
+        task.add_done_callback(self._analysis_tasks.discard)
+    
+    def _release_analysis(self, user_id: int) -> None:
+        """Count one of the user's analyses as finished"""
+        in_flight = self._user_analyses.pop(user_id, 0) - 1
+        if in_flight > 0:
+            self._user_analyses[user_id] = in_flight
+    
+    async def _finish_analysis(self, placeholder, user_id: int,
+                               error_message: str, analysis, *args) -> None:
+        """Run a background analysis, replace the placeholder with its result and free the slot"""
+        try:
+            try:
+                result = await analysis(*args)
+                if result is None:
+                    await placeholder.edit_text(ERROR_MESSAGES["token_not_found"])
+                    return
+                
+                message, keyboard = result
+                await placeholder.edit_text(
+                    message,
+                    parse_mode=ParseMode.MARKDOWN,
+                    reply_markup=keyboard
+                )
+                
+            except Exception as e:
+                logger.error(f"Error in background analysis: {e}")
+                try:
+                    await placeholder.edit_text(error_message)
+                except Exception as e:
+                    logger.error(f"Error reporting background analysis failure: {e}")
+        finally:
+            self._release_analysis(user_id)
+    
     async def _check_rate_limit(self, user_id: int) -> bool:
         """Check if user is rate limited"""
-        now = datetime.now(timezone.utc)
+        now = time.monotonic()
         last_command = self.user_last_command.get(user_id)
         
-        if last_command and (now - last_command).total_seconds() < self.command_cooldown:
+        if last_command is not None and now - last_command < self.command_cooldown:
             return False
         
-        self.user_last_command[user_id] = now
+        self.user_last_command.set(user_id, now)
         return True
     
     def _is_valid_address(self, address: str) -> bool:
         """Check if address is valid Ethereum address"""
-        try:
-            return len(address) == 42 and address.startswith('0x')
-        except:
-            return False
+        return isinstance(address, str) and _ADDRESS_MATCH(address) is not None
     
     async def _gather_token_features(self, token_address: str, kumbaya) -> TokenFeatures:
         """Gather features for AI analysis"""
+        cache_key = token_address.lower()
+        features = self._feature_cache.get(cache_key)
+        if features is not None:
+            return features
+        
         try:
-            # Get basic token info
-            token_info = await kumbaya.get_token_info(token_address)
-            
-            # Get liquidity
-            liquidity = await kumbaya.get_pair_liquidity(
-                await kumbaya.get_pair_address(token_address)
-            ) if await kumbaya.get_pair_address(token_address) else 0
+            # Get liquidity; the pair address is resolved once
+            pair_address = await kumbaya.get_pair_address(token_address)
+            liquidity = await kumbaya.get_pair_liquidity(pair_address) if pair_address else 0
             
             # Simulate other features (would need real data sources in production)
             features = TokenFeatures(
@@ -496,6 +590,8 @@ class CommandHandler:
                 social_mentions=50  # Placeholder
             )
             
+            # Fallback features below are not cached so the next call retries
+            self._feature_cache.set(cache_key, features)
             return features
             
         except Exception as e:
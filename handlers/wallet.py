@@ -15,7 +15,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from telegram.constants import ParseMode
 
-from config import Config, ERROR_MESSAGES, SUCCESS_MESSAGES
+from config import CONFIG, ERROR_MESSAGES, SUCCESS_MESSAGES
 from database import Database
 
 logger = logging.getLogger(__name__)
@@ -50,8 +50,8 @@ class WalletHandler:
         self.pending_connections: Dict[str, Dict[str, Any]] = {}
         
         # WalletConnect settings
-        self.walletconnect_project_id = Config.WALLETCONNECT_PROJECT_ID
-        self.max_connections_per_user = Config.MAX_WALLET_CONNECTIONS
+        self.walletconnect_project_id = CONFIG.WALLETCONNECT_PROJECT_ID
+        self.max_connections_per_user = CONFIG.MAX_WALLET_CONNECTIONS
         
         # Transaction signing
         self.pending_signatures: Dict[str, Dict[str, Any]] = {}
@@ -300,7 +300,7 @@ class WalletHandler:
             'domain': {
                 'name': 'Atalanta Bot',
                 'version': '1',
-                'chainId': Config.CHAIN_ID,
+                'chainId': CONFIG.CHAIN_ID,
                 'verifyingContract': transaction_data.get('to', '0x0000000000000000000000000000000000000000')
             },
             'message': {
@@ -9,11 +9,19 @@ import signal
 import sys
 from contextlib import suppress
 
+import aiohttp
+
+# Optional faster event loop (libuv); falls back to the default asyncio loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from telegram import Update
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 from telegram.error import TelegramError
 
-from config import Config, Config as BotConfig
+from config import CONFIG
 from database import Database
 from dex.kumbaya import KumbayaDEX
 from dex.prismfi import PrismFiDEX
@@ -25,13 +33,14 @@ from handlers.commands import CommandHandler as CmdHandler
 from handlers.callbacks import CallbackHandler
 from handlers.wallet import WalletHandler
 from utils.security import RateLimiter, security_logger
+from utils.rpc import OrjsonAsyncHTTPProvider
 
 # Configure logging
 logging.basicConfig(
-    level=getattr(logging, BotConfig.LOG_LEVEL),
+    level=getattr(logging, CONFIG.LOG_LEVEL),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(BotConfig.LOG_FILE),
+        logging.FileHandler(CONFIG.LOG_FILE),
         logging.StreamHandler(sys.stdout)
     ]
 )
@@ -49,6 +58,7 @@ class AtalantaBot:
         # DEX integrations
         self.w3 = None
         self.async_w3 = None
+        self.rpc_session = None
         self.kumbaya = None
         self.prismfi = None
         self.multi_dex = None
@@ -73,10 +83,10 @@ class AtalantaBot:
             logger.info("Initializing Atalanta Bot...")
             
             # Validate configuration
-            BotConfig.validate()
+            CONFIG.validate()
             
             # Initialize database
-            self.database = Database(BotConfig.DATABASE_PATH)
+            self.database = Database(CONFIG.DATABASE_PATH)
             await self.database.initialize()
             logger.info("Database initialized")
             
@@ -103,35 +113,86 @@ class AtalantaBot:
     
     async def _initialize_web3(self) -> None:
         """Initialize Web3 connections"""
-        from web3 import Web3
+        from web3 import AsyncWeb3, Web3
+        
+        # Initialize sync Web3 (offline helpers such as unit conversion)
+        self.w3 = Web3(Web3.HTTPProvider(CONFIG.MEGAETH_RPC))
+        
+        # Initialize async Web3 for every RPC issued from the event loop
+        if CONFIG.RPC_TRANSPORT == "ws":
+            self.async_w3 = await self._connect_websocket()
         
-        # Initialize sync Web3
-        self.w3 = Web3(Web3.HTTPProvider(BotConfig.MEGAETH_RPC))
+        if self.async_w3 is None:
+            provider = OrjsonAsyncHTTPProvider(
+                CONFIG.MEGAETH_RPC,
+                request_kwargs={'timeout': aiohttp.ClientTimeout(total=CONFIG.RPC_TIMEOUT)}
+            )
+            
+            # Large keep-alive pool so scanner fan-out doesn't queue on connections
+            self.rpc_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=CONFIG.RPC_POOL_SIZE,
+                    limit_per_host=CONFIG.RPC_POOL_PER_HOST,
+                    keepalive_timeout=60,
+                    enable_cleanup_closed=True
+                )
+            )
+            await provider.cache_async_session(self.rpc_session)
+            self.async_w3 = AsyncWeb3(provider)
         
-        # Store async reference (same instance for compatibility)
-        self.async_w3 = self.w3
+        # Every transaction we build pins CONFIG.CHAIN_ID, so skip the per-call eth_chainId probe
+        with suppress(ValueError):
+            self.async_w3.middleware_onion.remove('validation')
+        
+        # Optionally bundle eth_calls issued in the same loop tick into Multicall3/batches
+        if CONFIG.RPC_AUTO_BATCH:
+            try:
+                from dank_mids.helpers import setup_dank_w3_from_sync
+                self.async_w3 = setup_dank_w3_from_sync(self.w3)
+                logger.info("RPC auto-batching enabled (dank_mids)")
+            except ImportError:
+                logger.warning("RPC_AUTO_BATCH is set but dank_mids is not installed; batching disabled")
         
         # Test connection (skip chain validation for now - MegaETH may not be live)
         try:
-            chain_id = self.w3.eth.chain_id
+            chain_id = await self.async_w3.eth.chain_id
             logger.info(f"Connected to chain (Chain ID: {chain_id})")
         except Exception as e:
             logger.warning(f"Could not connect to RPC: {e}. Bot will work in limited mode.")
             self.w3 = None
             self.async_w3 = None
     
+    async def _connect_websocket(self):
+        """Open a persistent WebSocket AsyncWeb3, or None to fall back to HTTP"""
+        try:
+            from web3 import AsyncWeb3, WebSocketProvider
+        except ImportError:
+            logger.warning("RPC_TRANSPORT=ws needs web3>=7 (WebSocketProvider); using HTTP")
+            return None
+        
+        try:
+            async_w3 = AsyncWeb3(WebSocketProvider(CONFIG.MEGAETH_WS))
+            await async_w3.provider.connect()
+            logger.info("Using persistent WebSocket RPC connection")
+            return async_w3
+        except Exception as e:
+            logger.warning(f"Could not open WebSocket RPC: {e}. Using HTTP.")
+            return None
+    
     async def _initialize_dex(self) -> None:
         """Initialize DEX integrations"""
         # Initialize Kumbaya
-        self.kumbaya = KumbayaDEX(self.w3, self.async_w3)
+        # Raw JSON-RPC batches share the provider's keep-alive pool when it exists
+        self.kumbaya = KumbayaDEX(self.w3, self.async_w3, self.database, self.rpc_session)
+        await self.kumbaya.load_cache()
         logger.info("Kumbaya DEX initialized")
         
         # Initialize PrismFi
-        self.prismfi = PrismFiDEX(self.w3, self.async_w3)
+        self.prismfi = PrismFiDEX(self.w3, self.async_w3, self.rpc_session)
         logger.info("PrismFi DEX initialized")
         
         # Initialize Multi-DEX scanner
-        self.multi_dex = MultiDEXScanner(self.kumbaya, self.prismfi)
+        self.multi_dex = MultiDEXScanner(self.kumbaya, self.prismfi, self.database)
         logger.info("Multi-DEX scanner initialized")
     
     async def _initialize_components(self) -> None:
@@ -147,13 +208,14 @@ class AtalantaBot:
         logger.info("Sniper executor started")
         
         # Initialize AI predictor
-        self.ai_predictor = AIPredictor(BotConfig.MODEL_PATH)
+        self.ai_predictor = AIPredictor(CONFIG.MODEL_PATH)
+        await self.ai_predictor.initialize()
         logger.info("AI predictor initialized")
         
         # Initialize rate limiter
         self.rate_limiter = RateLimiter(
-            BotConfig.REQUESTS_PER_SECOND,
-            BotConfig.REQUESTS_PER_MINUTE
+            CONFIG.REQUESTS_PER_SECOND,
+            CONFIG.REQUESTS_PER_MINUTE
         )
         await self.rate_limiter.start_cleanup()
         logger.info("Rate limiter initialized")
@@ -168,7 +230,7 @@ class AtalantaBot:
     async def _initialize_telegram(self) -> None:
         """Initialize Telegram application"""
         # Create application
-        self.application = Application.builder().token(BotConfig.TELEGRAM_TOKEN).build()
+        self.application = Application.builder().token(CONFIG.TELEGRAM_TOKEN).build()
         
         # Add bot data to context
         self.application.bot_data.update({
@@ -231,6 +293,12 @@ class AtalantaBot:
             if self.multi_dex:
                 await self.multi_dex.stop_scanning()
             
+            if self.kumbaya:
+                await self.kumbaya.close()
+            
+            if self.prismfi:
+                await self.prismfi.close()
+            
             if self.token_monitor:
                 await self.token_monitor.stop_monitoring()
             
@@ -246,9 +314,16 @@ class AtalantaBot:
                 await self.application.stop()
                 await self.application.shutdown()
             
+            if self.rpc_session:
+                await self.rpc_session.close()
+            elif self.async_w3 is not None and hasattr(self.async_w3.provider, 'disconnect'):
+                # Persistent WebSocket provider
+                await self.async_w3.provider.disconnect()
+            
             # Cleanup database
             if self.database:
                 await self.database.cleanup_old_data()
+                await self.database.close()
             
             logger.info("Atalanta Bot stopped successfully")
             
@@ -288,7 +363,7 @@ class AtalantaBot:
             
             # Check Web3 connection
             try:
-                chain_id = self.w3.eth.chain_id
+                chain_id = await self.async_w3.eth.chain_id
                 health_status['components']['web3'] = f'healthy (chain: {chain_id})'
             except Exception as e:
                 health_status['components']['web3'] = f'unhealthy: {e}'
@@ -357,7 +432,10 @@ async def main():
 if __name__ == '__main__':
     # Run the bot
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
@@ -11,7 +11,7 @@ from datetime import datetime, timezone
 from web3 import Web3, AsyncWeb3
 import json
 
-from config import Config
+from config import CONFIG
 from ..dex.kumbaya import KumbayaDEX
 from ..database import Trade
 
@@ -81,7 +81,7 @@ class SniperExecutor:
         
         # Snipe settings
         self.max_concurrent_snipes: int = 5
-        self.max_gas_price: int = int(Config.MAX_GAS_PRICE)
+        self.max_gas_price: int = int(CONFIG.MAX_GAS_PRICE)
         self.priority_fee_multiplier: float = 1.2
         
         # Active snipes tracking
@@ -180,7 +180,7 @@ class SniperExecutor:
             
             # Build swap transaction
             amount_in_wei = int(snipe_request.amount_eth * 1e18)
-            path = [Config.WETH_ADDRESS, snipe_request.token_address]
+            path = [CONFIG.WETH_ADDRESS, snipe_request.token_address]
             
             # Calculate minimum output with slippage
             min_out = await self.kumbaya.calculate_slippage(
@@ -188,7 +188,7 @@ class SniperExecutor:
             )
             
             # Build transaction
-            tx_data = self.kumbaya.build_swap_transaction(
+            tx_data = await self.kumbaya.build_swap_transaction(
                 amount_in_wei, min_out, path, snipe_request.wallet_address
             )
             
@@ -204,9 +204,11 @@ class SniperExecutor:
                     execution_time=0
                 )
             
-            # Estimate gas and adjust if needed
-            gas_estimate = await self.async_w3.eth.estimate_gas(tx_data)
-            gas_price = await self._get_optimal_gas_price()
+            # Estimate gas and adjust if needed; both round-trips run concurrently
+            gas_estimate, gas_price = await asyncio.gather(
+                self.async_w3.eth.estimate_gas(tx_data),
+                self._get_optimal_gas_price()
+            )
             
             tx_data['gas'] = gas_estimate
             tx_data['gasPrice'] = gas_price
@@ -231,7 +233,7 @@ class SniperExecutor:
                 tx_hash="pending",
                 status='pending',
                 profit_loss=None,
-                created_at=datetime.now(timezone.utc)
+                created_at=None  # Filled by the database default
             )
             
             trade_id = await self.database.create_trade(trade)
@@ -291,7 +293,7 @@ class SniperExecutor:
                 return False
             
             # Check gas price
-            current_gas_price = await self.async_w3.eth.gas_price
+            current_gas_price = await self.kumbaya.get_gas_price()
             if current_gas_price > self.max_gas_price:
                 logger.warning(f"Gas price too high: {current_gas_price}")
                 return False
@@ -305,7 +307,7 @@ class SniperExecutor:
     async def _get_optimal_gas_price(self) -> int:
         """Get optimal gas price for execution"""
         try:
-            base_gas_price = await self.async_w3.eth.gas_price
+            base_gas_price = await self.kumbaya.get_gas_price()
             
             # Add priority fee for faster execution
             optimal_gas_price = int(base_gas_price * self.priority_fee_multiplier)
@@ -325,6 +327,9 @@ class SniperExecutor:
             # Send transaction
             tx_hash = await self.async_w3.eth.send_raw_transaction(signed_tx)
             
+            # A sent transaction bumps its wallet's pending nonce
+            self.kumbaya.invalidate_nonce()
+            
             # Wait for receipt
             receipt = await self.async_w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
             
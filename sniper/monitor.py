@@ -1,6 +1,6 @@
 """
 Token Launch Monitor
-Real-time monitoring of new token launches via polling
+Real-time monitoring of new token launches via PairCreated log subscriptions
 """
 
 import asyncio
@@ -9,10 +9,30 @@ from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from config import Config
+from eth_abi import decode as abi_decode
+from web3 import Web3
+
+# Optional WebSocket client for push-based PairCreated logs
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from config import CONFIG
+from utils.rpc import dumps_rpc, loads_rpc
 
 logger = logging.getLogger(__name__)
 
+# keccak256("PairCreated(address,address,address,uint256)")
+_PAIR_CREATED_TOPIC = "0x0d3648bd0f6ba80134a33ba9275ac585d9d315f0ad8355cddefde31afa28d0e9"
+
+# Non-indexed PairCreated fields: pair address and allPairs length
+_PAIR_CREATED_DATA = ('address', 'uint256')
+
+def _topic_address(topic: str) -> str:
+    """Checksummed address from a 32-byte indexed log topic"""
+    return Web3.to_checksum_address("0x" + topic[-40:])
+
 @dataclass
 class TokenLaunch:
     """Token launch event data"""
@@ -39,11 +59,11 @@ class TokenLaunch:
         }
 
 class TokenMonitor:
-    """Token launch monitor using polling (simplified for reliability)"""
+    """Token launch monitor fed by factory PairCreated logs"""
     
     def __init__(self, w3=None):
         self.w3 = w3
-        self.factory_address = Config.KUMBADYA_FACTORY
+        self.factory_address = CONFIG.KUMBADYA_FACTORY
         
         # Event callbacks
         self.launch_callbacks: List[Callable[[TokenLaunch], None]] = []
@@ -69,7 +89,11 @@ class TokenMonitor:
             return
         
         self.is_monitoring = True
-        self.monitor_task = asyncio.create_task(self._monitor_loop())
+        if websockets is not None:
+            self.monitor_task = asyncio.create_task(self._pair_created_listener())
+        else:
+            logger.warning("websockets not installed, PairCreated events will not be received")
+            self.monitor_task = asyncio.create_task(self._monitor_loop())
         logger.info("Started token launch monitoring")
     
     async def stop_monitoring(self) -> None:
@@ -84,12 +108,40 @@ class TokenMonitor:
         
         logger.info("Stopped token launch monitoring")
     
+    async def _pair_created_listener(self) -> None:
+        """Receive factory PairCreated logs as they are mined over eth_subscribe"""
+        while self.is_monitoring:
+            try:
+                async with websockets.connect(CONFIG.MEGAETH_WS, open_timeout=CONFIG.WEBSOCKET_TIMEOUT) as ws:
+                    await ws.send(dumps_rpc({
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["logs", {"address": self.factory_address, "topics": [_PAIR_CREATED_TOPIC]}]
+                    }))
+                    reply = loads_rpc(await ws.recv())
+                    if 'result' not in reply:
+                        raise RuntimeError(f"eth_subscribe failed: {reply.get('error')}")
+                    logger.info(f"Watching factory {self.factory_address} for PairCreated events")
+                    
+                    async for message in ws:
+                        log = loads_rpc(message).get('params', {}).get('result')
+                        # Logs dropped by a reorg are re-sent with removed set
+                        if log and not log.get('removed'):
+                            await self._handle_pair_created_event(log)
+                
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in PairCreated listener: {e}")
+                await asyncio.sleep(5)
+    
     async def _monitor_loop(self) -> None:
-        """Main monitoring loop using polling"""
+        """Keep-alive loop used when no WebSocket client is available"""
         while self.is_monitoring:
             try:
                 # Simple polling loop - check for new events periodically
-                await asyncio.sleep(Config.SCAN_INTERVAL)
+                await asyncio.sleep(CONFIG.SCAN_INTERVAL)
                 
                 # In production, this would poll for new PairCreated events
                 # For now, just keep the loop alive
@@ -101,17 +153,19 @@ class TokenMonitor:
                 logger.error(f"Error in monitor loop: {e}")
                 await asyncio.sleep(5)
     
-    async def _handle_pair_created_event(self, event) -> None:
-        """Handle PairCreated event"""
+    async def _handle_pair_created_event(self, log: Dict[str, Any]) -> None:
+        """Handle a raw PairCreated log"""
         try:
             # Extract event data
-            token0 = event.args.token0
-            token1 = event.args.token1
-            pair = event.args.pair
-            all_pairs_length = event.args.allPairsLength
+            token0 = _topic_address(log['topics'][1])
+            token1 = _topic_address(log['topics'][2])
+            pair, all_pairs_length = abi_decode(_PAIR_CREATED_DATA, bytes.fromhex(log['data'][2:]))
+            pair = Web3.to_checksum_address(pair)
+            block_number = int(log['blockNumber'], 16)
+            self.last_block = max(self.last_block, block_number)
             
             # Determine which is the new token (not WETH)
-            weth_address = "0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE"  # WETH placeholder
+            weth_address = CONFIG.WETH_ADDRESS
             
             if token0.lower() == weth_address.lower():
                 new_token_address = token1
@@ -132,8 +186,8 @@ class TokenMonitor:
                 token1=token1,
                 pair_address=pair,
                 all_pairs_length=all_pairs_length,
-                block_number=event.blockNumber,
-                transaction_hash=event.transactionHash.hex(),
+                block_number=block_number,
+                transaction_hash=log['transactionHash'],
                 timestamp=datetime.now(timezone.utc)
             )
             
@@ -5,8 +5,24 @@ Utility functions and helpers
 
 from .formatting import format_number, format_address, format_time_ago, truncate_string
 from .security import RateLimiter, validate_address, validate_amount, sanitize_input
+from .cache import TTLCache
+
+# RPC helpers pull in web3, so they load on first use rather than with the package
+_RPC_EXPORTS = frozenset({
+    'OrjsonAsyncHTTPProvider', 'dumps_rpc', 'loads_rpc', 'json_rpc_batch',
+    'encode_aggregate3', 'decode_aggregate3'
+})
+
+def __getattr__(name):
+    if name in _RPC_EXPORTS:
+        from . import rpc
+        return getattr(rpc, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'format_number', 'format_address', 'format_time_ago', 'truncate_string',
-    'RateLimiter', 'validate_address', 'validate_amount', 'sanitize_input'
+    'RateLimiter', 'validate_address', 'validate_amount', 'sanitize_input',
+    'TTLCache',
+    'OrjsonAsyncHTTPProvider', 'dumps_rpc', 'loads_rpc', 'json_rpc_batch',
+    'encode_aggregate3', 'decode_aggregate3'
 ]
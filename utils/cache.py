@@ -0,0 +1,61 @@
+"""
+Cache Utilities
+Bounded in-memory caches with time-based expiry
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire a fixed time after insertion"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Any, Tuple[float, Any]] = OrderedDict()
+        
+        # Outstanding fill tokens per key; pop revokes them so a read that raced
+        # a write can't cache what it saw. Dropping one only skips a fill.
+        self._fills: Dict[Any, object] = {}
+    
+    def get(self, key: Any) -> Any:
+        """Return a live entry and mark it recently used, or None"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Any, value: Any) -> None:
+        """Insert an entry, evicting the least recently used one when full"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def reserve(self, key: Any) -> object:
+        """Token to pass to fill once the value for key has been read"""
+        token = object()
+        self._fills.pop(key, None)
+        self._fills[key] = token
+        if len(self._fills) > self.maxsize:
+            del self._fills[next(iter(self._fills))]
+        return token
+    
+    def fill(self, key: Any, value: Any, token: object) -> None:
+        """Insert a value read after reserve, unless key was popped in between"""
+        if self._fills.get(key) is token:
+            del self._fills[key]
+            self.set(key, value)
+    
+    def pop(self, key: Any) -> None:
+        """Drop an entry if present and revoke pending fills for it"""
+        self._data.pop(key, None)
+        self._fills.pop(key, None)
@@ -4,10 +4,13 @@ Helper functions for formatting numbers, addresses, and messages
 """
 
 import re
-from typing import Union, Optional
+from typing import Iterable, Optional, Tuple, Union
 from datetime import datetime, timezone
 import math
 
+# Leaderboard prefixes for the top three ranks
+_MEDALS = ("🥇", "🥈", "🥉")
+
 def format_number(number: Union[int, float], decimals: int = 4, suffix: str = "") -> str:
     """Format number with appropriate decimal places and suffixes"""
     try:
@@ -270,6 +273,14 @@ def format_rank(rank: int) -> str:
     else:
         return f"#{rank}"
 
+def format_leaderboard(leaderboard: Iterable[Tuple[int, Optional[str], int]]) -> str:
+    """Format (telegram_id, username, points) rows as the global leaderboard message"""
+    lines = ["🏆 **Global Leaderboard**\n"]
+    for i, (telegram_id, username, points) in enumerate(leaderboard):
+        medal = _MEDALS[i] if i < 3 else f"{i + 1}."
+        lines.append(f"{medal} {username or f'User {telegram_id}'}: {points:,} points")
+    return "\n".join(lines) + "\n"
+
 def format_duration(seconds: float) -> str:
     """Format duration in seconds to human readable format"""
     try:
@@ -0,0 +1,98 @@
+"""
+RPC Utilities
+Fast JSON codec for the JSON-RPC transport
+"""
+
+import json
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+import aiohttp
+from eth_abi import decode as abi_decode, encode as abi_encode
+from web3 import AsyncWeb3
+
+# Optional fast JSON codec for RPC payloads
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Multicall3 aggregate3((address,bool,bytes)[]) selector and codec types
+_SELECTOR_AGGREGATE3 = bytes.fromhex("82ad56cb")
+_AGGREGATE3_IN = ('(address,bool,bytes)[]',)
+_AGGREGATE3_OUT = ('(bool,bytes)[]',)
+
+def _encode_default(value: Any) -> Any:
+    """Serialize the non-JSON types web3 and payload dicts carry"""
+    if isinstance(value, (bytes, bytearray)):
+        return '0x' + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, datetime):
+        # Same RFC 3339 text orjson emits natively
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_rpc(payload: Any) -> bytes:
+    """Encode a JSON-RPC request or batch as UTF-8 bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=_encode_default)
+        except orjson.JSONEncodeError:
+            # orjson rejects integers wider than 64 bits
+            pass
+    return json.dumps(payload, default=_encode_default, separators=(',', ':')).encode()
+
+def loads_rpc(raw: bytes) -> Any:
+    """Decode a JSON-RPC response or batch"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def encode_aggregate3(calls: List[Tuple[str, bytes]]) -> bytes:
+    """Multicall3 aggregate3 calldata running (target, calldata) calls with allowFailure set"""
+    return _SELECTOR_AGGREGATE3 + abi_encode(_AGGREGATE3_IN, [[(target, True, data) for target, data in calls]])
+
+def decode_aggregate3(raw: bytes) -> List[Optional[bytes]]:
+    """Per-call return data from an aggregate3 result, None where a call failed"""
+    return [data if success and data else None for success, data in abi_decode(_AGGREGATE3_OUT, raw)[0]]
+
+async def json_rpc_batch(session: aiohttp.ClientSession, url: str,
+                         calls: List[Tuple[str, List[Any]]]) -> List[Optional[Any]]:
+    """POST (method, params) calls as one JSON-RPC batch, returning results in call order"""
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    
+    async with session.post(url, data=dumps_rpc(payload), headers={'Content-Type': 'application/json'}) as response:
+        response.raise_for_status()
+        replies = loads_rpc(await response.read())
+    
+    # Batch replies may arrive in any order; failed calls stay None
+    results: List[Optional[Any]] = [None] * len(calls)
+    for reply in replies:
+        if 'result' in reply:
+            results[reply['id']] = reply['result']
+    return results
+
+class OrjsonAsyncHTTPProvider(AsyncWeb3.AsyncHTTPProvider):
+    """AsyncHTTPProvider that encodes and decodes JSON-RPC with orjson"""
+
+    def encode_rpc_request(self, method, params) -> bytes:
+        """Encode a single JSON-RPC request"""
+        if orjson is None:
+            return super().encode_rpc_request(method, params)
+        return dumps_rpc({
+            'jsonrpc': '2.0',
+            'method': method,
+            'params': params or [],
+            'id': next(self.request_counter)
+        })
+
+    def decode_rpc_response(self, raw_response: bytes):
+        """Decode a single JSON-RPC response"""
+        if orjson is None:
+            return super().decode_rpc_response(raw_response)
+        return loads_rpc(raw_response)